@@ -0,0 +1,86 @@
+"""Benchmark of BracketIndex against repeated find_matching_bracket() scans.
+
+Generates a synthetic Earth Engine JavaScript with deeply nested blocks and resolves the matching
+bracket of every opening curly bracket, once with a find_matching_bracket() scan per bracket and
+once with a single BracketIndex.
+
+Usage:                                          python benchmarks/bracket_index_benchmark.py [--lines 50000] [--depth 40]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion import BracketIndex, find_matching_bracket
+
+
+def synthetic_script(num_lines=50000, depth=40):
+    """Generates a synthetic JavaScript with nested function and object literal blocks.
+
+    Args:
+        num_lines (int, optional): Approximate number of lines to generate. Defaults to 50000.
+        depth (int, optional): Nesting depth of each top-level block. Defaults to 40.
+
+    Returns:
+        list: List of lines.
+    """
+    lines = []
+    block = 0
+    while len(lines) < num_lines:
+        for level in range(depth):
+            indent = "  " * level
+            if level % 2 == 0:
+                lines.append(f"{indent}var f{block}_{level} = function(image) {{\n")
+            else:
+                lines.append(f"{indent}var vis{block}_{level} = {{\n")
+            lines.append(f"{indent}  // level {level}: {{min: 0, max: 3000}}\n")
+            lines.append(f"{indent}  var band = image.select(['B4', 'B3']).multiply(2);\n")
+        for level in reversed(range(depth)):
+            indent = "  " * level
+            lines.append(f"{indent}  return band;\n")
+            lines.append(f"{indent}}};\n")
+        block += 1
+
+    return lines
+
+
+def opening_brackets(lines):
+    return [
+        (line_index, char_index)
+        for line_index, line in enumerate(lines)
+        for char_index, char in enumerate(line)
+        if char == "{"
+    ]
+
+
+def run(num_lines=50000, depth=40):
+    lines = synthetic_script(num_lines, depth)
+    openers = opening_brackets(lines)
+    print(f"Lines: {len(lines)}, opening brackets: {len(openers)}, depth: {depth}")
+
+    start = time.perf_counter()
+    expected = [find_matching_bracket(lines, *opener) for opener in openers]
+    scan_time = time.perf_counter() - start
+    print(f"find_matching_bracket: {scan_time:.3f} s")
+
+    start = time.perf_counter()
+    index = BracketIndex(lines, "{")
+    build_time = time.perf_counter() - start
+    result = [index.match(*opener) for opener in openers]
+    index_time = time.perf_counter() - start
+    print(f"BracketIndex:          {index_time:.3f} s (build {build_time:.3f} s)")
+
+    if result != expected:
+        raise AssertionError("BracketIndex and find_matching_bracket disagree.")
+    print(f"Speedup: {scan_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--depth", type=int, default=40)
+    args = parser.parse_args()
+    run(args.lines, args.depth)
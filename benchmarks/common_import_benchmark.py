@@ -0,0 +1,80 @@
+"""Import-time and memory benchmark of the common module.
+
+Compares importing common.py on its own, as headless batch jobs do, with importing it together with
+the widget, tree, display and HTTP modules it used to import eagerly. Each case runs in a fresh
+interpreter and reports the wall time of the imports and the peak resident memory of the process.
+
+Usage:                                          python benchmarks/common_import_benchmark.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "lazy (import common)": "import common",
+    "eager (previous module-level imports)": "import requests, ipywidgets, IPython.display, ipytree; import common",
+}
+
+SCRIPT = """
+import resource, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss = rss / 1024
+print({{"seconds": elapsed, "rss_kb": rss}})
+"""
+
+
+def measure(statement, runs=5):
+    """Runs a statement in fresh interpreters and measures its time and the peak resident memory.
+
+    Args:
+        statement (str): The Python statement to run, e.g., 'import common'.
+        runs (int, optional): Number of interpreters to start. The best time is kept. Defaults to 5.
+
+    Returns:
+        dict: The best time in seconds and the peak resident memory in KB.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join([REPO_DIR, env.get("PYTHONPATH", "")])
+
+    best = None
+    for _ in range(runs + 1):
+        result = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=statement)],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=REPO_DIR,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        measurement = json.loads(result.stdout.strip().replace("'", '"'))
+        if best is None or measurement["seconds"] < best["seconds"]:
+            best = measurement
+
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, statement in CASES.items():
+        try:
+            measurement = measure(statement, args.runs)
+        except RuntimeError as e:
+            print(f"{name:40s} failed: {e}")
+            continue
+        print(
+            f"{name:40s} {measurement['seconds'] * 1000:8.1f} ms {measurement['rss_kb'] / 1024:8.1f} MB"
+        )
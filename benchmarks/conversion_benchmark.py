@@ -0,0 +1,421 @@
+"""Benchmark suite of the converter on a synthetic corpus of Earth Engine JavaScripts.
+
+Generates JavaScripts with nested function blocks, .map(function ...) chains, object literals, for loops
+and comments at several sizes, and runs js_to_python() on a single script, js_to_python_dir() on a folder
+of scripts and py_to_ipynb_dir() on the converted scripts. For every size it reports the throughput in
+input lines per second, the peak memory allocated by Python and the scaling exponent between consecutive
+sizes, i.e., 1.0 for linear time. The results are compared with a stored baseline and the script fails
+if a throughput or peak memory regressed by more than the tolerance. Throughputs are scaled by the time
+of a fixed calibration workload, so that a baseline saved on another machine stays comparable.
+
+Usage:                                          python benchmarks/conversion_benchmark.py [--sizes 100 1000 10000 100000] [--baseline benchmarks/conversion_baseline.json] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion import __version__, js_to_python, js_to_python_dir, py_to_ipynb_dir
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "conversion_baseline.json"
+)
+
+# A minimal notebook template with the markers that py_to_ipynb() splits on.
+NOTEBOOK_TEMPLATE = """# %%
+\"\"\"
+## Install Earth Engine API and geemap
+\"\"\"
+
+# %%
+import ee
+import geemap
+
+# %%
+\"\"\"
+## Add Earth Engine Python script
+\"\"\"
+
+# %%
+Map = geemap.Map()
+
+# %%
+\"\"\"
+## Display the interactive map
+\"\"\"
+
+# %%
+Map.addLayerControl()
+Map
+"""
+
+
+def _function_block(n, rng):
+    return [
+        f"// Scales the reflectance bands of image {n}.\n",
+        f"var scale{n} = function(image) {{\n",
+        "  var mask = image.select('QA60').bitwiseAnd(1 << 10).eq(0);\n",
+        "  var inner = function(band) {\n",
+        f"    return image.select(band).multiply({rng.randint(1, 9)} / 10000);\n",
+        "  };\n",
+        "  return inner('B4').updateMask(mask);\n",
+        "};\n",
+    ]
+
+
+def _map_chain(n, rng):
+    year = rng.randint(2015, 2022)
+    return [
+        f"var collection{n} = ee.ImageCollection('COPERNICUS/S2_SR')\n",
+        f"  .filterDate('{year}-01-01', '{year}-12-31')\n",
+        "  .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))\n",
+        "  .map(function(image) {\n",
+        "    var ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI');\n",
+        "    return image.addBands(ndvi);\n",
+        "  });\n",
+    ]
+
+
+def _object_literal(n, rng):
+    return [
+        f"var vis{n} = {{\n",
+        "  min: 0,\n",
+        f"  max: {rng.randint(1, 30) * 100},\n",
+        "  bands: ['B4', 'B3', 'B2'],\n",
+        "  palette: ['blue', 'white', 'green'],\n",
+        "};\n",
+        f"Map.addLayer(ee.Image('USGS/SRTMGL1_003'), vis{n}, 'Layer {n}', true);\n",
+    ]
+
+
+def _for_loop(n, rng):
+    return [
+        f"var values{n} = [];\n",
+        f"for (var i{n} = 0; i{n} < {rng.randint(2, 20)}; i{n}++) {{\n",
+        f"  values{n}.push(ee.Number(i{n}).multiply(2));\n",
+        "}\n",
+    ]
+
+
+def _comments(n, rng):
+    return [
+        f"/* Section {n}: {{min: 0, max: 1}} */\n",
+        f"// var unused{n} = null; // false\n",
+        "\n",
+    ]
+
+
+BLOCKS = [_function_block, _map_chain, _object_literal, _for_loop, _comments]
+
+
+def synthetic_corpus_script(num_lines=1000, seed=0):
+    """Generates a synthetic Earth Engine JavaScript from a random mix of typical blocks.
+
+    Args:
+        num_lines (int, optional): Approximate number of lines to generate. Defaults to 1000.
+        seed (int, optional): Seed of the random generator, so that the script is reproducible. Defaults to 0.
+
+    Returns:
+        list: List of lines.
+    """
+    rng = random.Random(seed)
+    lines = []
+    n = 0
+    while len(lines) < num_lines:
+        lines.extend(rng.choice(BLOCKS)(n, rng))
+        n += 1
+
+    return lines
+
+
+def write_corpus(out_dir, num_lines, lines_per_file=200, seed=0):
+    """Writes a folder of synthetic JavaScripts.
+
+    Args:
+        out_dir (str): The output folder.
+        num_lines (int): Approximate total number of lines.
+        lines_per_file (int, optional): Approximate number of lines per script. Defaults to 200.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        int: The total number of lines written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    total = 0
+    for index in range(max(1, num_lines // lines_per_file)):
+        lines = synthetic_corpus_script(min(num_lines, lines_per_file), seed + index)
+        with open(os.path.join(out_dir, f"script_{index:05d}.js"), "w") as f:
+            f.writelines(lines)
+        total += len(lines)
+
+    return total
+
+
+def measure(func, repeat=3, memory=True):
+    """Measures the best wall time and the peak memory allocated by Python of a function call.
+
+    The function is called once before the timed calls, which warms up the caches of the converter.
+    The peak memory is measured in that call, since tracing allocations slows the call down.
+
+    Args:
+        func (callable): The function to call without arguments.
+        repeat (int, optional): Number of timed calls. The best time is kept. Defaults to 3.
+        memory (bool, optional): Whether to measure the peak memory. Defaults to True.
+
+    Returns:
+        tuple: The time in seconds and the peak memory in bytes, or None if memory is False.
+    """
+    peak = None
+    if memory:
+        tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, peak
+
+
+def calibrate(repeat=5):
+    """Times a fixed pure Python workload, to compare throughputs measured on machines of different speed.
+
+    Args:
+        repeat (int, optional): Number of timed runs. The best time is kept. Defaults to 5.
+
+    Returns:
+        float: The time of the workload in seconds.
+    """
+    lines = synthetic_corpus_script(2000)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(50):
+            for line in lines:
+                line.strip().replace("var ", "").split("(")
+                "{" in line and line.index("{")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def run_size(work_dir, num_lines, repeat=3, memory=True, workers=1):
+    """Runs the benchmarks on a corpus of one size.
+
+    Args:
+        work_dir (str): An empty folder for the corpus and the outputs.
+        num_lines (int): Approximate number of lines of the corpus.
+        repeat (int, optional): Number of timed runs of each benchmark. Defaults to 3.
+        memory (bool, optional): Whether to measure the peak memory. Defaults to True.
+        workers (int, optional): Number of processes of js_to_python_dir(). Defaults to 1.
+
+    Returns:
+        dict: Benchmark name -> {"lines", "seconds", "lines_per_second", "peak_mb"}.
+    """
+    js_file = os.path.join(work_dir, "script.js")
+    lines = synthetic_corpus_script(num_lines)
+    with open(js_file, "w") as f:
+        f.writelines(lines)
+
+    corpus_dir = os.path.join(work_dir, "corpus")
+    py_dir = os.path.join(work_dir, "py")
+    nb_dir = os.path.join(work_dir, "ipynb")
+    corpus_lines = write_corpus(corpus_dir, num_lines)
+    template_file = os.path.join(work_dir, "template.py")
+    with open(template_file, "w") as f:
+        f.write(NOTEBOOK_TEMPLATE)
+
+    benchmarks = [
+        (
+            "js_to_python",
+            len(lines),
+            lambda: js_to_python(js_file, os.path.join(work_dir, "script.py")),
+        ),
+        (
+            "js_to_python_dir",
+            corpus_lines,
+            lambda: js_to_python_dir(corpus_dir, py_dir, workers=workers),
+        ),
+        (
+            "py_to_ipynb_dir",
+            corpus_lines,
+            lambda: py_to_ipynb_dir(py_dir, template_file, nb_dir),
+        ),
+    ]
+
+    results = {}
+    for name, num, func in benchmarks:
+        seconds, peak = measure(func, repeat, memory)
+        results[name] = {
+            "lines": num,
+            "seconds": seconds,
+            "lines_per_second": num / seconds,
+            "peak_mb": None if peak is None else peak / 1e6,
+        }
+
+    return results
+
+
+def scaling_exponents(results):
+    """Computes the scaling exponent of the time between consecutive sizes, e.g., 1.0 for linear time.
+
+    Args:
+        results (dict): Size -> benchmark name -> result, as returned by run_size().
+
+    Returns:
+        dict: Benchmark name -> list of (size, next size, exponent) tuples.
+    """
+    sizes = sorted(results, key=int)
+    exponents = {}
+    for small, large in zip(sizes, sizes[1:]):
+        for name, result in results[large].items():
+            before = results[small][name]
+            exponent = math.log(result["seconds"] / before["seconds"]) / math.log(
+                result["lines"] / before["lines"]
+            )
+            exponents.setdefault(name, []).append((small, large, exponent))
+
+    return exponents
+
+
+def compare(results, baseline, speed=1.0, tolerance=0.3):
+    """Compares results with a baseline.
+
+    Args:
+        results (dict): Size -> benchmark name -> result, as returned by run_size().
+        baseline (dict): Results of an earlier run in the same format.
+        speed (float, optional): The speed of this machine relative to the one of the baseline, see calibrate(). Throughputs are divided by it. Defaults to 1.0.
+        tolerance (float, optional): The allowed relative loss of throughput or growth of peak memory. Defaults to 0.3.
+
+    Returns:
+        list: Descriptions of the regressions.
+    """
+    regressions = []
+    for size, benchmarks in results.items():
+        for name, result in benchmarks.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            ratio = result["lines_per_second"] / speed / expected["lines_per_second"]
+            print(f"{name:18s} {size:>7s} lines: {ratio:5.2f}x baseline throughput")
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    f"{name} at {size} lines: {ratio:.2f}x the baseline throughput of "
+                    f"{expected['lines_per_second']:.0f} lines/s"
+                )
+            if result["peak_mb"] is not None and expected["peak_mb"] is not None:
+                if result["peak_mb"] > expected["peak_mb"] * (1 + tolerance):
+                    regressions.append(
+                        f"{name} at {size} lines: peak memory {result['peak_mb']:.1f} MB, "
+                        f"baseline {expected['peak_mb']:.1f} MB"
+                    )
+
+    return regressions
+
+
+def run(
+    sizes=(100, 1000, 10000, 100000),
+    repeat=3,
+    memory=True,
+    workers=1,
+    baseline_file=BASELINE_FILE,
+    update_baseline=False,
+    tolerance=0.3,
+):
+    calibration = calibrate()
+    results = {}
+    print(f"{'Benchmark':18s} {'lines':>7s} {'seconds':>8s} {'lines/s':>9s} {'peak MB':>8s}")
+    for num_lines in sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            size_results = run_size(work_dir, num_lines, repeat, memory, workers)
+        results[str(num_lines)] = size_results
+        for name, result in size_results.items():
+            peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:.1f}"
+            print(
+                f"{name:18s} {result['lines']:7d} {result['seconds']:8.3f} "
+                f"{result['lines_per_second']:9.0f} {peak:>8s}"
+            )
+
+    print("\nScaling exponents (1.0 is linear):")
+    for name, exponents in scaling_exponents(results).items():
+        steps = ", ".join(f"{small}->{large}: {exponent:.2f}" for small, large, exponent in exponents)
+        print(f"{name:18s} {steps}")
+
+    if update_baseline:
+        with open(baseline_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": __version__,
+                    "python": platform.python_version(),
+                    "calibration_seconds": calibration,
+                    "results": results,
+                },
+                f,
+                indent=1,
+                sort_keys=True,
+            )
+        print(f"\nSaved the baseline to {baseline_file}")
+        return
+
+    if not os.path.exists(baseline_file):
+        print(f"\nNo baseline at {baseline_file}. Run with --update-baseline to create one.")
+        return
+
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = json.load(f)
+    speed = baseline["calibration_seconds"] / calibration
+    print(
+        f"\nBaseline of version {baseline['version']} on Python {baseline['python']}, "
+        f"this machine is {speed:.2f}x as fast:"
+    )
+    regressions = compare(results, baseline["results"], speed, tolerance)
+    if regressions:
+        sys.exit("Performance regressions:\n" + "\n".join(regressions))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory")
+    parser.add_argument("--workers", type=int, default=1, help="Processes of js_to_python_dir()")
+    parser.add_argument("--baseline", type=str, default=BASELINE_FILE)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Save the results as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="Allowed relative regression"
+    )
+    args = parser.parse_args()
+    run(
+        args.sizes,
+        args.repeat,
+        not args.no_memory,
+        args.workers,
+        args.baseline,
+        args.update_baseline,
+        args.tolerance,
+    )
@@ -0,0 +1,27 @@
+import ee
+
+ee.Initialize()
+
+image = ee.Image("LANDSAT/LC09/C02/T1_L2/LC09_044034_20220111")
+count = 3
+cond = True
+
+# Independent values of Earth Engine objects are fetched in one request.
+_info = ee.Dictionary({
+    'bands': image.bandNames(),
+    'projection': image.projection(),
+    'date': image.get("DATE_ACQUIRED"),
+    'properties': image.propertyNames().slice(0, 2),
+}).getInfo()
+bands = _info.get('bands')
+projection = _info.get('projection')
+date = _info.get('date')
+properties = _info.get('properties')
+
+# getInfo() only applies to the last operand here, so these must not be batched.
+size = image.bandNames().size()
+total = count * size.getInfo()
+flag = bands if cond else size.getInfo()
+negative = -size.getInfo()
+
+print(bands, projection, date, properties, total, flag, negative)
@@ -0,0 +1,20 @@
+var Landsat9 = ee.ImageCollection("LANDSAT/LC09/C02/T1_TOA");
+var area = ee.Geometry.Point([48.2, 20.8]).buffer(1000);
+var L9CollectionList = Landsat9.toList(Landsat9.size());
+var Landsat9List = ee.List.sequence(0, Landsat9.size().subtract(1));
+
+var func = function(number) {
+  var index = Landsat9List.get(number);
+  return (ee.Number(number)).subtract(ee.Number(number))
+         .add(ee.Number(ee.Image(L9CollectionList.get(index))
+    .select("B1")
+    .reduceRegion({
+          reducer: ee.Reducer.mean().unweighted(),
+          geometry: area,
+          maxPixels: 1e15
+          })
+    .get("B1")));
+};
+
+var Landsat9Values = ee.Array(Landsat9List.map(func));
+print(Landsat9Values);
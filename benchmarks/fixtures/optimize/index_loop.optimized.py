@@ -0,0 +1,16 @@
+import ee 
+from ee_plugin import Map
+
+Landsat9 = ee.ImageCollection("LANDSAT/LC09/C02/T1_TOA")
+area = ee.Geometry.Point([48.2, 20.8]).buffer(1000)
+
+def func(image):
+  return image.set('Landsat9Values', ee.List([image.select("B1").reduceRegion({
+          'reducer': ee.Reducer.mean().unweighted(),
+          'geometry': area,
+          'maxPixels': 1e15
+          }).get("B1")]))
+
+
+Landsat9Values = ee.Array(Landsat9.map(func).aggregate_array('Landsat9Values').flatten())
+print(Landsat9Values)
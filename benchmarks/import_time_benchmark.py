@@ -0,0 +1,67 @@
+"""Import-time benchmark of the conversion module.
+
+Imports the module in fresh interpreters with -X importtime and fails if the best cumulative import
+time is above the budget, so that heavy module-level imports do not creep back in.
+
+Usage:                                          python benchmarks/import_time_benchmark.py [--module conversion] [--budget-ms 50] [--runs 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module, runs=5):
+    """Measures the cumulative time it takes to import a module in a fresh interpreter.
+
+    Args:
+        module (str): The module name.
+        runs (int, optional): Number of interpreters to start. The best time is kept. Defaults to 5.
+
+    Returns:
+        float: The best cumulative import time in milliseconds.
+    """
+    env = dict(os.environ)
+    # Let the first run write the bytecode cache so that compiling is not measured.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join([REPO_DIR, env.get("PYTHONPATH", "")])
+
+    best = None
+    for _ in range(runs + 1):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=REPO_DIR,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative = int(fields[1]) / 1000
+                break
+        else:
+            raise RuntimeError(f"Could not find the import time of {module}.")
+        if best is None or cumulative < best:
+            best = cumulative
+
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", type=str, default="conversion")
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    elapsed = import_time(args.module, args.runs)
+    print(f"import {args.module}: {elapsed:.1f} ms (budget {args.budget_ms:.1f} ms)")
+    if elapsed > args.budget_ms:
+        print(f"import {args.module} is slower than the budget.")
+        sys.exit(1)
@@ -0,0 +1,129 @@
+"""Checks the optimization passes against before/after fixtures and counts the Earth Engine calls they save.
+
+Each fixture in benchmarks/fixtures/optimize is an Earth Engine Python script or JavaScript taken from this
+repository, next to the expected output of all optimization passes (<name>.optimized.py). JavaScripts are
+converted with js_to_python(optimize=True), Python scripts are passed to optimize_python(). For each fixture
+the number of call sites of the Earth Engine methods that the passes rewrite is reported before and after.
+
+Usage:                                          python benchmarks/optimization_benchmark.py [--update]
+"""
+
+import argparse
+import collections
+import contextlib
+import difflib
+import io
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion import js_to_python, optimize_python
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "optimize")
+
+# Methods whose call sites are counted.
+COUNTED_CALLS = [
+    "sequence",
+    "toList",
+    "map",
+    "reduceRegion",
+    "reduceRegions",
+    "aggregate_array",
+    "getInfo",
+]
+
+
+def count_calls(source):
+    """Counts the call sites of the methods in COUNTED_CALLS in a Python script, outside comments.
+
+    Converted scripts are not always valid Python, so the calls are matched as text.
+
+    Args:
+        source (str): The Python script.
+
+    Returns:
+        collections.Counter: The number of call sites per method name.
+    """
+    code = "\n".join(
+        line for line in source.splitlines() if not line.lstrip().startswith("#")
+    )
+    counts = collections.Counter()
+    for method in re.findall(r"\.(\w+)\(", code):
+        if method in COUNTED_CALLS:
+            counts[method] += 1
+    return counts
+
+
+def optimize_fixture(in_file):
+    """Converts or optimizes a fixture.
+
+    Args:
+        in_file (str): File path of the fixture.
+
+    Returns:
+        tuple: The Python script before and after the optimization passes.
+    """
+    if in_file.endswith(".py"):
+        with open(in_file, encoding="utf-8") as f:
+            source = f.read()
+        return source, optimize_python(source)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_file = os.path.join(tmp_dir, "out.py")
+        with contextlib.redirect_stdout(io.StringIO()):
+            before = js_to_python(in_file, out_file)
+            after = js_to_python(in_file, out_file, optimize=True)
+    return before, after
+
+
+def run(update=False):
+    failed = 0
+    names = sorted(
+        name
+        for name in os.listdir(FIXTURE_DIR)
+        if name.endswith((".py", ".js")) and not name.endswith(".optimized.py")
+    )
+    for name in names:
+        in_file = os.path.join(FIXTURE_DIR, name)
+        expected_file = os.path.join(FIXTURE_DIR, os.path.splitext(name)[0] + ".optimized.py")
+        before, after = optimize_fixture(in_file)
+
+        if update or not os.path.exists(expected_file):
+            with open(expected_file, "w", encoding="utf-8") as f:
+                f.write(after)
+        with open(expected_file, encoding="utf-8") as f:
+            expected = f.read()
+
+        status = "ok"
+        if after != expected:
+            status = "MISMATCH"
+            failed += 1
+            sys.stdout.writelines(
+                difflib.unified_diff(
+                    expected.splitlines(True),
+                    after.splitlines(True),
+                    expected_file,
+                    "optimized",
+                )
+            )
+        print(f"{name}: {status}")
+
+        counts_before, counts_after = count_calls(before), count_calls(after)
+        for method in COUNTED_CALLS:
+            if counts_before[method] or counts_after[method]:
+                print(f"    {method:16s} {counts_before[method]:4d} -> {counts_after[method]:4d}")
+
+    if failed:
+        sys.exit(f"{failed} of {len(names)} fixtures do not match.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--update", action="store_true", help="Rewrite the expected outputs"
+    )
+    args = parser.parse_args()
+    run(args.update)
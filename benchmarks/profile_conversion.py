@@ -0,0 +1,67 @@
+"""Profiles the conversion of a folder of Earth Engine JavaScripts and lists the slowest stages and scripts.
+
+Converts every JavaScript in the input folder with js_to_python_dir() under a ConversionProfiler, prints the
+time, calls and bytes per stage and per rewrite rule and the scripts that took the longest, and optionally
+saves the statistics as JSON and the stage stacks in the folded format of flamegraph.pl.
+
+Usage:                                          python benchmarks/profile_conversion.py in_dir [--workers 1] [--top 10] [--json profile.json] [--stacks profile.folded]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversion import ConversionProfiler, js_to_python_dir
+
+
+def run(in_dir, workers=1, top=10, json_file=None, stacks_file=None, optimize=False):
+    with tempfile.TemporaryDirectory() as out_dir:
+        with ConversionProfiler() as profiler, contextlib.redirect_stdout(io.StringIO()):
+            reports = js_to_python_dir(in_dir, out_dir, workers=workers, optimize=optimize)
+
+    failed = sum(1 for report in reports if report["status"] == "error")
+    print(f"Scripts: {len(reports)}, failed: {failed}")
+
+    print(f"\n{'Stage':28s} {'calls':>9s} {'seconds':>9s} {'MB':>8s}")
+    stages = sorted(profiler.stages.items(), key=lambda item: -item[1]["seconds"])
+    for name, stage in stages:
+        print(
+            f"{name:28s} {stage['calls']:9d} {stage['seconds']:9.3f} {stage['bytes'] / 1e6:8.2f}"
+        )
+
+    print(f"\n{'Rewrite rule':28s} {'matches':>9s} {'KB':>9s}")
+    rules = sorted(profiler.rules.items(), key=lambda item: -item[1]["calls"])
+    for old, rule in rules[:top]:
+        print(f"{old!r:28s} {rule['calls']:9d} {rule['bytes'] / 1e3:9.1f}")
+
+    print("\nSlowest scripts:")
+    for path, seconds in profiler.slowest_files(top):
+        entry = profiler.files[path]
+        slowest_stage = max(
+            (name for name in entry["stages"] if name != "js_to_python"),
+            key=entry["stages"].get,
+            default="-",
+        )
+        print(f"{seconds:9.3f} s {entry['bytes'] / 1e3:8.1f} KB  {slowest_stage:24s} {path}")
+
+    if json_file:
+        profiler.save_json(json_file)
+    if stacks_file:
+        profiler.save_stacks(stacks_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("in_dir", help="Folder of Earth Engine JavaScripts")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--top", type=int, default=10, help="Number of scripts and rules to list")
+    parser.add_argument("--json", help="Save the statistics to this JSON file")
+    parser.add_argument("--stacks", help="Save the folded stage stacks to this file")
+    parser.add_argument("--optimize", action="store_true", help="Apply the optimization passes")
+    args = parser.parse_args()
+    run(args.in_dir, args.workers, args.top, args.json, args.stacks, args.optimize)
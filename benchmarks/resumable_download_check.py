@@ -0,0 +1,166 @@
+"""Checks that DownloadManager survives dropped connections, using a local HTTP server that injects disconnects.
+
+The local server serves a generated file, answers byte range requests unless told not to, and closes the
+connection in the middle of the first responses of each scenario. Every scenario must produce the original
+file; the bytes received and the number of requests are reported, so that a resumed download can be told
+apart from one that started over. Failed scenarios must keep the partial file only if it can be resumed.
+
+Usage:                                          python benchmarks/resumable_download_check.py [--size 20]
+"""
+
+import argparse
+import hashlib
+import http.server
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import DownloadManager
+
+
+class _DisconnectingHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body):
+        server = self.server
+        body = server.body
+        if server.missing:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end, status = 0, len(body), 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if server.ranges and match and if_range in (None, server.etag):
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(body)
+            status = 206
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(end - start))
+        self.send_header("ETag", server.etag)
+        if server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(body)}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        with server.lock:
+            drop = server.drops > 0
+            server.drops -= drop
+        if drop:
+            # Send part of the range, then cut the connection without finishing the response.
+            self.wfile.write(body[start : start + (end - start) * 2 // 5])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:end])
+
+
+def start_server(body):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _DisconnectingHandler)
+    server.daemon_threads = True
+    server.body = body
+    server.etag = '"v1"'
+    server.ranges = True
+    server.drops = 0
+    server.missing = False
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(size_mb=20):
+    body = os.urandom(size_mb * 1024 * 1024)
+    sha256 = "sha256:" + hashlib.sha256(body).hexdigest()
+    server = start_server(body)
+    url = f"http://127.0.0.1:{server.server_port}/export.tif"
+    failed = 0
+
+    def scenario(
+        name, manager, drops=0, ranges=True, checksum=None, expect_error=False, partial=False
+    ):
+        nonlocal failed
+        server.drops, server.ranges = drops, ranges
+        try:
+            report = manager.download(url, out_file, checksum=checksum)
+        except Exception as e:
+            report = {"error": f"{type(e).__name__}: {e}"}
+        if expect_error:
+            # Only a download that can be resumed keeps its partial file and state file.
+            left = [os.path.exists(out_file + ext) for ext in [".part", ".download.json"]]
+            ok = "error" in report and left == [partial, partial]
+        else:
+            with open(out_file, "rb") as f:
+                ok = "error" not in report and f.read() == body
+        failed += not ok
+        details = report.get("error") or (
+            f"received {report['received'] / 1e6:.1f} MB, resumed {report['resumed'] / 1e6:.1f} MB, "
+            f"{report['requests']} requests, {report['segments']} segments"
+        )
+        print(f"{name:40s} {'ok' if ok else 'FAILED':6s} {details}")
+        return report
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_file = os.path.join(tmp_dir, "export.tif")
+        fast = dict(backoff=0.01, min_segment_size=1024 * 1024)
+
+        scenario("one stream, 3 disconnects", DownloadManager(**fast), drops=3)
+        scenario("one stream, no ranges, 2 disconnects", DownloadManager(**fast), 2, False)
+        scenario("4 segments, 6 disconnects", DownloadManager(4, **fast), drops=6)
+        scenario("4 segments, no ranges", DownloadManager(4, **fast), ranges=False)
+        scenario("checksum", DownloadManager(**fast), drops=1, checksum=sha256)
+        scenario(
+            "wrong checksum",
+            DownloadManager(**fast),
+            checksum="sha256:" + "0" * 64,
+            expect_error=True,
+        )
+        no_retries = DownloadManager(4, retries=0, **fast)
+        scenario("interrupted call", no_retries, drops=2, expect_error=True, partial=True)
+        scenario("resumed by the next call", no_retries)
+        scenario(
+            "interrupted call", DownloadManager(retries=0, **fast), 1, expect_error=True, partial=True
+        )
+        server.etag = '"v2"'
+        scenario("resumed after the file changed", DownloadManager(**fast))
+        scenario("interrupted call", DownloadManager(retries=0, **fast), 1, expect_error=True, partial=True)
+        server.missing = True
+        scenario("not found on the next call", DownloadManager(**fast), expect_error=True)
+        server.missing = False
+
+    server.shutdown()
+    server.server_close()
+    if failed:
+        sys.exit(f"{failed} scenarios failed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=20, help="Size of the served file in MB")
+    args = parser.parse_args()
+    run(args.size)
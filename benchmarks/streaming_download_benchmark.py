@@ -0,0 +1,194 @@
+"""Measures the download throughput of zipped and plain exports against a local HTTP stand-in server.
+
+A local server stands in for the Earth Engine download URLs and serves a generated zip archive of GeoTIFF-like
+files and a plain GeoTIFF-like file. Each is downloaded the way ee_export_image() used to, i.e., in 1 KB chunks
+to a zip file that is then extracted and deleted, and with the streaming path of common.py, which reads large
+growing chunks and extracts the zip members as they arrive. The throughput and the bytes written to disk are
+reported per method.
+
+Usage:                                          python benchmarks/streaming_download_benchmark.py [--size 200] [--files 4] [--repeat 3]
+"""
+
+import argparse
+import http.server
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import _save_response, get_http_session
+
+
+def synthetic_raster(size, seed=0):
+    """Generates bytes that compress like a GeoTIFF band, i.e., smooth values with some noise.
+
+    Args:
+        size (int): The number of bytes.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        bytes: The generated bytes.
+    """
+    rnd = random.Random(seed)
+    row = bytes(sorted(rnd.randbytes(4096)))
+    data = bytearray()
+    while len(data) < size:
+        data += row
+        data += rnd.randbytes(rnd.randrange(4096))
+    return bytes(data[:size])
+
+
+def synthetic_zip(size, files=4):
+    """Generates a deflated zip archive of GeoTIFF-like files.
+
+    Args:
+        size (int): The total size of the uncompressed files in bytes.
+        files (int, optional): The number of files. Defaults to 4.
+
+    Returns:
+        bytes: The zip archive.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        for index in range(files):
+            z.writestr(f"image.b{index + 1}.tif", synthetic_raster(size // files, index))
+    return buffer.getvalue()
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = self.server.bodies.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(bodies):
+    """Starts the local stand-in server in a background thread.
+
+    Args:
+        bodies (dict): The response body per URL path.
+
+    Returns:
+        http.server.ThreadingHTTPServer: The server.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    server.bodies = bodies
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def disk_bytes(out_dir):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(out_dir)
+        for name in names
+    )
+
+
+def legacy_download(url, out_dir, unzip):
+    """Downloads like ee_export_image() used to: 1 KB chunks to a file, then extracts the zip file.
+
+    Returns:
+        int: The number of bytes written to disk.
+    """
+    r = get_http_session().get(url, stream=True, timeout=300)
+    out_file = os.path.join(out_dir, "image.zip" if unzip else "image.tif")
+    with open(out_file, "wb") as fd:
+        for chunk in r.iter_content(chunk_size=1024):
+            fd.write(chunk)
+    written = os.path.getsize(out_file)
+    if unzip:
+        with zipfile.ZipFile(out_file) as z:
+            z.extractall(out_dir)
+        os.remove(out_file)
+        written += disk_bytes(out_dir)
+    return written
+
+
+def streaming_download(url, out_dir, unzip):
+    """Downloads with the streaming path of common.py.
+
+    Returns:
+        int: The number of bytes written to disk.
+    """
+    r = get_http_session().get(url, stream=True, timeout=300)
+    if unzip:
+        _save_response(r, out_dir=out_dir, url=url)
+    else:
+        _save_response(r, os.path.join(out_dir, "image.tif"))
+    return disk_bytes(out_dir)
+
+
+def measure(method, url, unzip, repeat=3):
+    """Returns the best time of several downloads and the bytes written to disk by one download."""
+    best = None
+    for _ in range(repeat):
+        out_dir = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            written = method(url, out_dir, unzip)
+            seconds = time.perf_counter() - start
+        finally:
+            shutil.rmtree(out_dir)
+        best = seconds if best is None else min(best, seconds)
+    return best, written
+
+
+def run(size_mb=200, files=4, repeat=3):
+    size = size_mb * 1024 * 1024
+    print(f"Generating {size_mb} MB of GeoTIFF-like data in {files} files ...")
+    archive = synthetic_zip(size, files)
+    server = start_server({"/image.zip": archive, "/image.tif": synthetic_raster(size)})
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"Zip archive: {len(archive) / 1e6:.1f} MB\n")
+    print(f"{'Download':12s} {'method':10s} {'seconds':>8s} {'MB/s':>8s} {'MB written':>11s}")
+    try:
+        for label, path, unzip in [
+            ("zipped", "/image.zip", True),
+            ("GeoTIFF", "/image.tif", False),
+        ]:
+            received = len(server.bodies[path])
+            for name, method in [
+                ("legacy", legacy_download),
+                ("streaming", streaming_download),
+            ]:
+                seconds, written = measure(method, base + path, unzip, repeat)
+                print(
+                    f"{label:12s} {name:10s} {seconds:8.3f} {received / 1e6 / seconds:8.1f} {written / 1e6:11.1f}"
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--size", type=int, default=200, help="Uncompressed size of the export in MB"
+    )
+    parser.add_argument("--files", type=int, default=4, help="Number of files in the zip archive")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of downloads per method")
+    args = parser.parse_args()
+    run(args.size, args.files, args.repeat)
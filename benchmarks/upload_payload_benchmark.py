@@ -0,0 +1,79 @@
+"""Compares the request payload of numpy_to_ee() with the list and the compact encoding on synthetic grids.
+
+The grids stand in for what netcdf_to_ee() reads from climate files (smooth float32 fields with noise and a
+masked area), for a digital elevation model (int16) and for a land cover map (uint8 classes). For each grid
+the bytes of the values sent with encoding="list", i.e., one nested list per band, are compared with the
+bytes of the tiles of encoding="compact".
+
+Usage:                                          python benchmarks/upload_payload_benchmark.py [--rows 720] [--columns 1440] [--precision 2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import _encode_numpy_band
+
+
+def synthetic_grids(rows, columns, seed=0):
+    """Generates the grids to encode.
+
+    Args:
+        rows (int): The number of rows.
+        columns (int): The number of columns.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        dict: The 2D numpy arrays per name.
+    """
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(
+        np.linspace(0, 6, rows), np.linspace(0, 3, columns), indexing="ij"
+    )
+    temperature = 15 + 10 * np.sin(x) * np.cos(y) + rng.normal(0, 0.05, x.shape)
+    temperature = temperature.astype(np.float32)
+    temperature[: rows // 10, : columns // 5] = np.nan
+    elevation = np.cumsum(rng.integers(-3, 4, (rows, columns)), axis=1) + 500
+    classes = np.repeat(rng.integers(0, 12, (rows, -(-columns // 16))), 16, axis=1)
+    return {
+        "temperature (float32)": temperature,
+        "elevation (int16)": elevation.astype(np.int16),
+        "land cover (uint8)": classes[:, :columns].astype(np.uint8),
+    }
+
+
+def run(rows=720, columns=1440, precision=2, tile_size=256):
+    print(f"{'Grid':24s} {'precision':>9s} {'list MB':>8s} {'compact MB':>11s} {'ratio':>6s} {'seconds':>8s}")
+    for name, grid in synthetic_grids(rows, columns).items():
+        list_bytes = len(json.dumps(grid.tolist()))
+        precisions = [None, precision] if grid.dtype.kind == "f" else [None]
+        for digits in precisions:
+            start = time.perf_counter()
+            tiles, _ = _encode_numpy_band(grid, tile_size, digits)
+            seconds = time.perf_counter() - start
+            compact_bytes = sum(
+                len(tile["values"]) + len(tile["mask"] or "") + len(tile["starts"] or "")
+                for tile in tiles
+            )
+            print(
+                f"{name:24s} {str(digits):>9s} {list_bytes / 1e6:8.2f} {compact_bytes / 1e6:11.2f} "
+                f"{list_bytes / compact_bytes:5.1f}x {seconds:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=720)
+    parser.add_argument("--columns", type=int, default=1440)
+    parser.add_argument(
+        "--precision", type=int, default=2, help="Decimal places kept of float grids"
+    )
+    parser.add_argument("--tile-size", type=int, default=256)
+    args = parser.parse_args()
+    run(args.rows, args.columns, args.precision, args.tile_size)
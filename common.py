@@ -7,17 +7,14 @@ import io
 import json
 import math
 import os
-import requests
 import shutil
 import tarfile
+import threading
 import urllib.request
 import warnings
 import zipfile
 
 import ee
-import ipywidgets as widgets
-from IPython.display import display, IFrame
-from ipytree import Node, Tree
 
 
 class TitilerEndpoint:
@@ -199,6 +196,7 @@ def set_proxy(port=1080, ip="http://127.0.0.1", timeout=300):
         ip (str, optional): The IP address. Defaults to 'http://127.0.0.1'.
         timeout (int, optional): The timeout in seconds. Defaults to 300.
     """
+
     try:
 
         if not ip.startswith("http"):
@@ -208,7 +206,7 @@ def set_proxy(port=1080, ip="http://127.0.0.1", timeout=300):
         os.environ["HTTP_PROXY"] = proxy
         os.environ["HTTPS_PROXY"] = proxy
 
-        a = requests.get("https://earthengine.google.com/", timeout=timeout)
+        a = get_http_session().get("https://earthengine.google.com/", timeout=timeout)
 
         if a.status_code != 200:
             print(
@@ -448,7 +446,7 @@ def clone_github_repo(url, out_dir):
     out_file_path = os.path.join(parent_dir, repo_name + ".zip")
 
     try:
-        urllib.request.urlretrieve(url_zip, out_file_path)
+        _download_file(url_zip, out_file_path)
     except Exception:
         print("The provided URL is invalid. Please double check the URL.")
         return
@@ -563,7 +561,7 @@ def open_image_from_url(url, timeout=300, proxies=None):
     # from urllib.parse import urlparse
 
     try:
-        response = requests.get(url, timeout=timeout, proxies=proxies)
+        response = get_http_session().get(url, timeout=timeout, proxies=proxies)
         img = Image.open(io.BytesIO(response.content))
         return img
     except Exception as e:
@@ -580,6 +578,7 @@ def show_image(img_path, width=None, height=None, verbose=True):
         verbose (bool, optional): If True, print the progress. Defaults to True.
 
     """
+    import ipywidgets as widgets
     from IPython.display import display
 
     try:
@@ -793,6 +792,825 @@ def system_fonts(show_full_path=False):
         print(e)
 
 
+########################################
+#           HTTP Transport             #
+########################################
+
+# The settings of the shared HTTP session. See configure_http_session().
+_http_config = {
+    "pool_size": 10,
+    "retries": 3,
+    "backoff_factor": 0.5,
+    "status_forcelist": (429, 500, 502, 503, 504),
+}
+_http_session = None
+_http_lock = threading.Lock()
+_http_stats = {"requests": 0, "retries": 0, "errors": 0, "bytes": 0}
+
+
+def _count_http(key, value=1):
+    with _http_lock:
+        _http_stats[key] += value
+
+
+def _create_http_adapter():
+    """Creates a transport adapter that keeps connections alive, retries and counts its requests.
+
+    Returns:
+        requests.adapters.HTTPAdapter: The adapter.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class CountingAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            _count_http("requests")
+            response = super().send(request, **kwargs)
+            retries = getattr(response.raw, "retries", None)
+            if retries is not None and retries.history:
+                _count_http("retries", len(retries.history))
+            if response.status_code >= 400:
+                _count_http("errors")
+
+            # Count the bytes as the body is read, which may be much later for streamed responses.
+            read = response.raw.read
+
+            def counting_read(*args, **kwargs):
+                data = read(*args, **kwargs)
+                _count_http("bytes", len(data))
+                return data
+
+            response.raw.read = counting_read
+            return response
+
+    retry = Retry(
+        total=_http_config["retries"],
+        backoff_factor=_http_config["backoff_factor"],
+        status_forcelist=_http_config["status_forcelist"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = CountingAdapter(
+        pool_connections=_http_config["pool_size"],
+        pool_maxsize=_http_config["pool_size"],
+        max_retries=retry,
+    )
+    return adapter
+
+
+def _create_http_session():
+    """Creates a requests session that keeps connections alive, retries and counts its requests.
+
+    Returns:
+        requests.Session: The session.
+    """
+    import requests
+
+    adapter = _create_http_adapter()
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_http_session(
+    pool_size=10,
+    retries=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+):
+    """Configures the shared HTTP session that the download functions of this module use.
+
+    Args:
+        pool_size (int, optional): The maximum number of connections kept alive per host. Defaults to 10.
+        retries (int, optional): The maximum number of retries of a request. Defaults to 3.
+        backoff_factor (float, optional): The retries wait backoff_factor * 2 ** (retry - 1) seconds, or as long as the Retry-After header says. Defaults to 0.5.
+        status_forcelist (tuple, optional): The HTTP status codes that are retried. Defaults to (429, 500, 502, 503, 504).
+
+    Returns:
+        requests.Session: The new shared session.
+    """
+    global _http_session
+
+    with _http_lock:
+        _http_config.update(
+            pool_size=pool_size,
+            retries=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(status_forcelist),
+        )
+        old_session, _http_session = _http_session, _create_http_session()
+    if old_session is not None:
+        old_session.close()
+    return _http_session
+
+
+def get_http_session(pool_size=None):
+    """Returns the shared HTTP session, creating it on first use.
+
+    Args:
+        pool_size (int, optional): The number of connections per host needed by the caller, e.g., its number of threads. The pool is enlarged if it is smaller. Defaults to None.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _http_session
+
+    if _http_session is None:
+        with _http_lock:
+            if _http_session is None:
+                _http_session = _create_http_session()
+
+    if pool_size is not None and pool_size > _http_config["pool_size"]:
+        with _http_lock:
+            if pool_size > _http_config["pool_size"]:
+                _http_config["pool_size"] = pool_size
+                # New requests use the larger adapter. The current one is not closed, so that
+                # other threads can finish reading the responses of its connections.
+                adapter = _create_http_adapter()
+                for prefix in ("https://", "http://"):
+                    _http_session.adapters[prefix] = adapter
+    return _http_session
+
+
+def http_stats(reset=False):
+    """Returns the number of requests, retries, error responses and bytes received by the shared HTTP session.
+
+    Args:
+        reset (bool, optional): Whether to reset the counters to zero. Defaults to False.
+
+    Returns:
+        dict: The counters.
+    """
+    with _http_lock:
+        stats = dict(_http_stats)
+        if reset:
+            for key in _http_stats:
+                _http_stats[key] = 0
+    return stats
+
+
+def _download_file(url, out_file, timeout=300, proxies=None):
+    """Downloads a URL to a file with the shared HTTP session, resuming the download if the connection drops.
+
+    Args:
+        url (str): The URL.
+        out_file (str): The output file path.
+        timeout (int, optional): The timeout in seconds for the request. Defaults to 300.
+        proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+
+    Returns:
+        dict: The download report. See DownloadManager.download().
+    """
+    return DownloadManager(timeout=timeout, proxies=proxies).download(url, out_file)
+
+
+def _iter_response(r, min_chunk=64 * 1024, max_chunk=8 * 1024 * 1024):
+    """Yields the decoded body of a streamed response in chunks that double in size while the reads fill them.
+
+    Args:
+        r (requests.Response): The response, requested with stream=True.
+        min_chunk (int, optional): The size of the first read in bytes. Defaults to 64 KB.
+        max_chunk (int, optional): The largest read in bytes. Defaults to 8 MB.
+
+    Yields:
+        bytes: The next chunk of the body.
+    """
+    chunk_size = min_chunk
+    while True:
+        data = r.raw.read(chunk_size, decode_content=True)
+        if not data:
+            break
+        yield data
+        if len(data) == chunk_size and chunk_size < max_chunk:
+            chunk_size *= 2
+
+
+class _UnsupportedZipStream(ValueError):
+    """Raised when a zip archive can not be extracted before its central directory has been read."""
+
+
+class _ZipStreamExtractor:
+    """Extracts the members of a zip archive as its bytes arrive, without saving the archive itself.
+
+    The members are read from their local file headers. Stored and deflated members are supported,
+    including members whose sizes follow their data in a data descriptor, as long as they are deflated.
+    """
+
+    def __init__(self, out_dir):
+        """Initialize the _ZipStreamExtractor object.
+
+        Args:
+            out_dir (str): The directory to extract the members to.
+        """
+        import zlib
+
+        self._zlib = zlib
+        self.out_dir = os.path.abspath(out_dir)
+        self.files = []
+        self._buffer = bytearray()
+        self._state = "header"
+        self._member = None
+
+    def feed(self, data):
+        """Extracts as much of the archive as the bytes received so far contain.
+
+        Args:
+            data (bytes): The next bytes of the archive.
+        """
+        if self._state == "done":
+            return
+        self._buffer += data
+        while self._step():
+            pass
+
+    def close(self):
+        """Checks that the archive was complete.
+
+        Raises:
+            ValueError: If the archive ended in the middle of a member.
+        """
+        if self._state != "done" and (self._state != "header" or self._buffer):
+            self.abort()
+            raise ValueError("The zip archive is truncated.")
+
+    def abort(self):
+        """Closes the member being extracted, e.g., after the download failed."""
+        if self._member is not None and self._member["file"] is not None:
+            self._member["file"].close()
+        self._member = None
+
+    def _step(self):
+        if self._state == "header":
+            return self._read_header()
+        if self._state == "data":
+            return self._read_data()
+        if self._state == "descriptor":
+            return self._read_descriptor()
+        return False
+
+    def _read_header(self):
+        import struct
+
+        buffer = self._buffer
+        if len(buffer) < 4:
+            return False
+        signature = bytes(buffer[:4])
+        if signature in (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06"):
+            # The central directory only repeats what the local headers said.
+            self._state = "done"
+            self._buffer = bytearray()
+            return False
+        if signature != b"PK\x03\x04":
+            raise ValueError("The response is not a zip archive.")
+        if len(buffer) < 30:
+            return False
+        flags, method, crc, compressed, size, name_len, extra_len = struct.unpack(
+            "<2xHH4xIIIHH", buffer[4:30]
+        )
+        if len(buffer) < 30 + name_len + extra_len:
+            return False
+
+        name = bytes(buffer[30 : 30 + name_len]).decode(
+            "utf-8" if flags & 0x800 else "cp437"
+        )
+        extra = bytes(buffer[30 + name_len : 30 + name_len + extra_len])
+        del buffer[: 30 + name_len + extra_len]
+
+        zip64 = False
+        while len(extra) >= 4:
+            header_id, data_len = struct.unpack("<HH", extra[:4])
+            if header_id == 0x0001:
+                zip64 = True
+                count = data_len // 8
+                values = list(struct.unpack(f"<{count}Q", extra[4 : 4 + count * 8]))
+                if size == 0xFFFFFFFF and values:
+                    size = values.pop(0)
+                if compressed == 0xFFFFFFFF and values:
+                    compressed = values.pop(0)
+            extra = extra[4 + data_len :]
+
+        if flags & 0x1:
+            raise _UnsupportedZipStream(f"{name} is encrypted.")
+        if method not in (0, 8):
+            raise _UnsupportedZipStream(f"{name} uses compression method {method}.")
+        descriptor = bool(flags & 0x8)
+        known_size = not descriptor or compressed > 0
+        if method == 0 and not known_size:
+            raise _UnsupportedZipStream(f"The size of {name} follows its data.")
+
+        path = os.path.abspath(os.path.join(self.out_dir, name))
+        if os.path.isabs(name) or not path.startswith(self.out_dir + os.sep):
+            raise ValueError(f"The zip member {name} is outside the output directory.")
+
+        self._member = {
+            "path": path,
+            "crc": crc,
+            "remaining": compressed if known_size else None,
+            "descriptor": descriptor,
+            "zip64": zip64,
+            "decompressor": self._zlib.decompressobj(-15) if method == 8 else None,
+            "crc_so_far": 0,
+            "file": None,
+        }
+        if name.endswith("/"):
+            os.makedirs(path, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._member["file"] = open(path, "wb")
+            self.files.append(path)
+        self._state = "data"
+        return True
+
+    def _write(self, data):
+        member = self._member
+        if member["decompressor"] is not None:
+            data = member["decompressor"].decompress(data)
+        if data:
+            member["crc_so_far"] = self._zlib.crc32(data, member["crc_so_far"])
+            if member["file"] is not None:
+                member["file"].write(data)
+
+    def _read_data(self):
+        member = self._member
+        buffer = self._buffer
+        if member["remaining"] is not None:
+            count = min(len(buffer), member["remaining"])
+            if count:
+                self._write(memoryview(buffer)[:count])
+                del buffer[:count]
+                member["remaining"] -= count
+            if member["remaining"]:
+                return False
+            if member["decompressor"] is not None:
+                rest = member["decompressor"].flush()
+                if rest:
+                    member["crc_so_far"] = self._zlib.crc32(rest, member["crc_so_far"])
+                    if member["file"] is not None:
+                        member["file"].write(rest)
+        else:
+            # Without a size the deflate stream itself marks the end of the member.
+            if not buffer:
+                return False
+            self._write(bytes(buffer))
+            decompressor = member["decompressor"]
+            self._buffer = bytearray(decompressor.unused_data)
+            if not decompressor.eof:
+                return False
+
+        if member["descriptor"]:
+            self._state = "descriptor"
+        else:
+            self._finish_member(member["crc"])
+        return True
+
+    def _read_descriptor(self):
+        import struct
+
+        buffer = self._buffer
+        size = 16 if self._member["zip64"] else 8
+        offset = 4 if bytes(buffer[:4]) == b"PK\x07\x08" else 0
+        if len(buffer) < 4 or len(buffer) < offset + 4 + size:
+            return False
+        (crc,) = struct.unpack("<I", buffer[offset : offset + 4])
+        del buffer[: offset + 4 + size]
+        self._finish_member(crc)
+        return True
+
+    def _finish_member(self, crc):
+        path = self._member["path"]
+        crc_so_far = self._member["crc_so_far"]
+        self.abort()
+        if crc_so_far != crc:
+            raise ValueError(f"The CRC of the zip member {path} does not match.")
+        self._state = "header"
+
+
+def _save_response(r, out_file=None, out_dir=None, url=None, timeout=300, proxies=None):
+    """Writes a streamed response to a file, or extracts the zip archive it contains, in one pass.
+
+    The body is read in large, growing chunks. A zip archive is extracted member by member as it
+    arrives, so it is never written to disk. If the archive can not be extracted from a stream, it
+    is downloaded again from the URL to a temporary zip file and extracted from there.
+
+    Args:
+        r (requests.Response): The response, requested with stream=True.
+        out_file (str, optional): The file path to write the body to. Defaults to None.
+        out_dir (str, optional): The directory to extract the zip archive to, instead of writing out_file. Defaults to None.
+        url (str, optional): The URL of the response, to download a zip archive again that can not be extracted from a stream. Defaults to None.
+        timeout (int, optional): The timeout in seconds for the request. Defaults to 300.
+        proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+
+    Returns:
+        dict: The keys files (the written file paths) and bytes (the number of bytes received).
+    """
+    result = {"files": [], "bytes": 0}
+
+    if out_dir is None:
+        with open(out_file, "wb") as fd:
+            for chunk in _iter_response(r):
+                fd.write(chunk)
+                result["bytes"] += len(chunk)
+        result["files"].append(out_file)
+        return result
+
+    os.makedirs(out_dir, exist_ok=True)
+    extractor = _ZipStreamExtractor(out_dir)
+    try:
+        for chunk in _iter_response(r):
+            result["bytes"] += len(chunk)
+            extractor.feed(chunk)
+        extractor.close()
+    except _UnsupportedZipStream:
+        extractor.abort()
+        r.close()
+        if url is None:
+            raise
+        import tempfile
+
+        fd, zip_file = tempfile.mkstemp(suffix=".zip", dir=out_dir)
+        os.close(fd)
+        try:
+            r = get_http_session().get(
+                url, stream=True, timeout=timeout, proxies=proxies
+            )
+            r.raise_for_status()
+            result = _save_response(r, zip_file)
+            with zipfile.ZipFile(zip_file) as z:
+                z.extractall(out_dir)
+                result["files"] = [
+                    os.path.join(out_dir, name)
+                    for name in z.namelist()
+                    if not name.endswith("/")
+                ]
+        finally:
+            os.remove(zip_file)
+        return result
+    except Exception:
+        extractor.abort()
+        raise
+
+    result["files"] = extractor.files
+    return result
+
+
+class _RangesNotSupported(Exception):
+    """Raised when a server answers a byte range request with the whole file."""
+
+
+class DownloadManager:
+    """Downloads files so that dropped connections resume where they stopped instead of starting over.
+
+    The partial file (<out_file>.part) is accompanied by a sidecar state file (<out_file>.download.json)
+    with the URL, the expected size and the byte ranges received so far. Interrupted transfers are
+    resumed with HTTP range requests, also by a later call for the same URL and output file, when the
+    server supports them, and restarted otherwise. Both files are deleted when the download fails in a
+    way that cannot be resumed, e.g., with an HTTP 404 error or a corrupt file. Large files can be
+    fetched in parallel byte ranges.
+    """
+
+    def __init__(
+        self,
+        segments=1,
+        min_segment_size=32 * 1024 * 1024,
+        retries=5,
+        backoff=1.0,
+        timeout=300,
+        proxies=None,
+        verify=True,
+    ):
+        """Initialize the DownloadManager object.
+
+        Args:
+            segments (int, optional): The maximum number of byte ranges of one file fetched in parallel. Defaults to 1.
+            min_segment_size (int, optional): The minimum size of a byte range in bytes. Smaller files are fetched in one stream. Defaults to 32 MB.
+            retries (int, optional): The number of retries after failed requests that received no new bytes. Defaults to 5.
+            backoff (float, optional): The wait in seconds before the first retry, doubled for every further retry. Defaults to 1.0.
+            timeout (int, optional): The timeout in seconds for the requests. Defaults to 300.
+            proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+            verify (bool | str, optional): Whether to verify the TLS certificate of the server, or the path to a CA bundle. Defaults to True.
+        """
+        self.segments = segments
+        self.min_segment_size = min_segment_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.proxies = proxies
+        self.verify = verify
+
+    def download(self, url, out_file, checksum=None, resume=True):
+        """Downloads a URL to a file, resuming a previous attempt if its state file is found.
+
+        Args:
+            url (str): The URL to download.
+            out_file (str): The output file path.
+            checksum (str, optional): The expected checksum of the file as "<algorithm>:<hex digest>", e.g., "sha256:9f86d0...". Defaults to None, i.e., the MD5 hash reported by Google Cloud Storage is checked if there is one.
+            resume (bool, optional): Whether to continue the partial file of a previous call. Defaults to True.
+
+        Returns:
+            dict: The keys filename, bytes (the file size), received (the bytes received by this call), resumed (the bytes taken over from a previous call), segments, requests and seconds.
+        """
+        import hashlib
+        import time
+
+        if checksum is not None:
+            # An unknown algorithm fails before anything is downloaded, rather than deleting the download.
+            hashlib.new(checksum.partition(":")[0])
+
+        start = time.perf_counter()
+        out_file = os.path.abspath(out_file)
+        job = {
+            "url": url,
+            "part": out_file + ".part",
+            "state_file": out_file + ".download.json",
+            "state": self._load_state(url, out_file) if resume else None,
+            "lock": threading.Lock(),
+            "saved": 0.0,
+            "received": 0,
+            "requests": 0,
+            "cancelled": False,
+            "resumed": 0,
+        }
+
+        if job["state"] is None:
+            self._plan(job)
+        state = job["state"]
+        if len(state["segments"]) == 1:
+            # Only the bytes that reached the partial file count.
+            segment = state["segments"][0]
+            segment["offset"] = min(segment["offset"], os.path.getsize(job["part"]))
+        job["resumed"] = sum(s["offset"] - s["start"] for s in state["segments"])
+
+        try:
+            try:
+                self._fetch_all(job)
+            except _RangesNotSupported:
+                job["cancelled"] = False
+                job["resumed"] = 0
+                state["segments"] = [{"start": 0, "end": state["size"], "offset": 0}]
+                with open(job["part"], "wb"):
+                    pass
+                self._save_state(job, force=True)
+                self._fetch_all(job)
+            self._verify(job, checksum)
+        except ValueError:
+            # Client errors and corrupt files are not retried, so there is nothing to resume.
+            self.discard(out_file)
+            raise
+
+        os.replace(job["part"], out_file)
+        os.remove(job["state_file"])
+        return {
+            "filename": out_file,
+            "bytes": os.path.getsize(out_file),
+            "received": job["received"],
+            "resumed": job["resumed"],
+            "segments": len(state["segments"]),
+            "requests": job["requests"],
+            "seconds": time.perf_counter() - start,
+        }
+
+    def discard(self, out_file):
+        """Deletes the partial file and the state file that a download to a file left behind.
+
+        Args:
+            out_file (str): The output file path.
+        """
+        out_file = os.path.abspath(out_file)
+        for file in [out_file + ".part", out_file + ".download.json"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+    def _load_state(self, url, out_file):
+        try:
+            with open(out_file + ".download.json") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("url") != url or not os.path.exists(out_file + ".part"):
+            return None
+        return state
+
+    def _save_state(self, job, force=False):
+        import time
+
+        with job["lock"]:
+            now = time.monotonic()
+            if not force and now - job["saved"] < 1.0:
+                return
+            job["saved"] = now
+            tmp_file = job["state_file"] + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(job["state"], f)
+            os.replace(tmp_file, job["state_file"])
+
+    def _plan(self, job):
+        """Creates the state of a new download, split into byte ranges if the server supports them."""
+        state = job["state"] = {"url": job["url"], "size": None, "segments": []}
+        size = None
+        if self.segments > 1:
+            r = get_http_session().head(
+                job["url"],
+                allow_redirects=True,
+                headers={"Accept-Encoding": "identity"},
+                timeout=self.timeout,
+                proxies=self.proxies,
+                verify=self.verify,
+            )
+            job["requests"] += 1
+            if r.status_code == 200 and r.headers.get("Accept-Ranges") == "bytes":
+                self._read_headers(job, r)
+                size = state["size"]
+
+        count = 1
+        if size:
+            count = max(1, min(self.segments, size // self.min_segment_size))
+        with open(job["part"], "wb") as f:
+            if count > 1:
+                f.truncate(size)
+        if count == 1:
+            state["segments"] = [{"start": 0, "end": size, "offset": 0}]
+        else:
+            bounds = [size * index // count for index in range(count + 1)]
+            state["segments"] = [
+                {"start": bounds[index], "end": bounds[index + 1], "offset": bounds[index]}
+                for index in range(count)
+            ]
+        self._save_state(job, force=True)
+
+    def _read_headers(self, job, r):
+        """Records the size, the validators and the checksum that a response reports for the whole file."""
+        state = job["state"]
+        content_range = r.headers.get("Content-Range", "")
+        if r.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                state["size"] = int(total)
+        elif r.status_code == 200 and "Content-Encoding" not in r.headers:
+            if r.headers.get("Content-Length", "").isdigit():
+                state["size"] = int(r.headers["Content-Length"])
+        for key in ["ETag", "Last-Modified"]:
+            if key in r.headers and key not in state:
+                state[key] = r.headers[key]
+        for value in r.headers.get("x-goog-hash", "").split(","):
+            name, _, digest = value.strip().partition("=")
+            if name == "md5":
+                state["md5"] = digest
+
+    def _fetch_all(self, job):
+        import concurrent.futures
+
+        segments = job["state"]["segments"]
+        if len(segments) == 1:
+            self._fetch(job, segments[0])
+            return
+
+        get_http_session(pool_size=len(segments))
+        with concurrent.futures.ThreadPoolExecutor(len(segments)) as executor:
+            futures = [executor.submit(self._fetch, job, s) for s in segments]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            except BaseException:
+                job["cancelled"] = True
+                raise
+            finally:
+                self._save_state(job, force=True)
+
+    def _fetch(self, job, segment):
+        """Fetches a byte range, resuming it after dropped connections."""
+        import time
+
+        failures = 0
+        while True:
+            offset = segment["offset"]
+            try:
+                if self._request(job, segment):
+                    return
+            except (ValueError, _RangesNotSupported):
+                raise
+            except Exception:
+                if job["cancelled"]:
+                    raise
+                if segment["offset"] > offset:
+                    failures = 0
+                failures += 1
+                if failures > self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** (failures - 1))
+
+    def _request(self, job, segment):
+        """Requests the rest of a byte range and writes it to the partial file.
+
+        Returns:
+            bool: Whether the byte range is complete.
+        """
+        state = job["state"]
+        segmented = len(state["segments"]) > 1
+        offset, end = segment["offset"], segment["end"]
+
+        headers = {"Accept-Encoding": "identity"}
+        if offset > 0 or segmented:
+            last = "" if end is None else end - 1
+            headers["Range"] = f"bytes={offset}-{last}"
+            # A changed file is sent whole instead of the stale byte range.
+            validator = state.get("ETag", state.get("Last-Modified"))
+            if validator is not None and not validator.startswith("W/"):
+                headers["If-Range"] = validator
+
+        job["requests"] += 1
+        r = get_http_session().get(
+            job["url"],
+            headers=headers,
+            stream=True,
+            timeout=self.timeout,
+            proxies=self.proxies,
+            verify=self.verify,
+        )
+        if r.status_code == 416 and end is None and state["size"] == offset:
+            r.close()
+            return True
+        if r.status_code not in (200, 206):
+            try:
+                message = r.json()["error"]["message"]
+            except Exception:
+                message = f"HTTP error {r.status_code} for {job['url']}"
+            r.close()
+            if 400 <= r.status_code < 500 and r.status_code not in (408, 429):
+                raise ValueError(message)
+            raise Exception(message)
+
+        if r.status_code == 200 and "Range" in headers:
+            r.close()
+            if segmented:
+                raise _RangesNotSupported(job["url"])
+            # The server ignored the range, so the file is received from the start.
+            for key in ["ETag", "Last-Modified", "md5"]:
+                state.pop(key, None)
+            segment["offset"] = job["resumed"] = 0
+            self._save_state(job, force=True)
+            return False
+        if r.status_code == 206:
+            content_range = r.headers.get("Content-Range", "")
+            if not content_range.startswith(f"bytes {offset}-"):
+                r.close()
+                raise Exception(f"Unexpected Content-Range: {content_range}")
+        self._read_headers(job, r)
+        if not segmented and segment["end"] is None:
+            segment["end"] = end = state["size"]
+
+        with open(job["part"], "r+b") as f:
+            f.seek(offset)
+            if offset == 0 and not segmented:
+                f.truncate()
+            try:
+                for chunk in _iter_response(r):
+                    if job["cancelled"]:
+                        raise Exception("The download was cancelled.")
+                    if end is not None:
+                        chunk = chunk[: end - segment["offset"]]
+                    f.write(chunk)
+                    with job["lock"]:
+                        job["received"] += len(chunk)
+                    segment["offset"] += len(chunk)
+                    f.flush()
+                    self._save_state(job)
+                    if end is not None and segment["offset"] >= end:
+                        break
+            finally:
+                r.close()
+                f.flush()
+                self._save_state(job, force=True)
+
+        return end is None or segment["offset"] >= end
+
+    def _verify(self, job, checksum=None):
+        """Checks the size and the checksum of the partial file."""
+        import base64
+        import hashlib
+
+        state = job["state"]
+        error = None
+        size = os.path.getsize(job["part"])
+        if state["size"] is not None and size != state["size"]:
+            error = f"expected {state['size']} bytes, received {size}"
+        elif checksum is not None or "md5" in state:
+            if checksum is not None:
+                algorithm, _, expected = checksum.partition(":")
+            else:
+                algorithm = "md5"
+                expected = base64.b64decode(state["md5"]).hex()
+            digest = hashlib.new(algorithm)
+            with open(job["part"], "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            if digest.hexdigest() != expected.lower():
+                error = f"the {algorithm} checksum {digest.hexdigest()} is not {expected}"
+
+        if error is not None:
+            raise ValueError(f"The download of {job['url']} is corrupt: {error}.")
+
+
 ########################################
 #           Data Download              #
 ########################################
@@ -818,7 +1636,7 @@ def download_from_url(url, out_file_name=None, out_dir=".", unzip=True, verbose=
         print(f"Downloading {url} ...")
 
     try:
-        urllib.request.urlretrieve(url, out_file_path)
+        _download_file(url, out_file_path)
     except Exception:
         raise Exception("The URL is invalid. Please double check the URL.")
 
@@ -1483,7 +2301,7 @@ def ee_export_vector(
         )
         if verbose:
             print(f"Downloading data from {url}\nPlease wait ...")
-        r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+        r = get_http_session().get(url, stream=True, timeout=timeout, proxies=proxies)
 
         if r.status_code != 200:
             print("An error occurred while downloading. \n Retrying ...")
@@ -1494,25 +2312,36 @@ def ee_export_vector(
                     filetype=filetype, selectors=selectors, filename=name
                 )
                 print(f"Downloading data from {url}\nPlease wait ...")
-                r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+                r = get_http_session().get(
+                    url, stream=True, timeout=timeout, proxies=proxies
+                )
             except Exception as e:
                 print(e)
                 raise ValueError
 
-        with open(filename, "wb") as fd:
-            for chunk in r.iter_content(chunk_size=1024):
-                fd.write(chunk)
+        if r.status_code != 200:
+            raise ValueError(r.json()["error"]["message"])
+        if filetype == "shp" and not keep_zip:
+            # Extract the shapefile while it arrives instead of saving the zip file first.
+            _save_response(
+                r,
+                out_dir=os.path.dirname(filename),
+                url=url,
+                timeout=timeout,
+                proxies=proxies,
+            )
+        else:
+            _save_response(r, filename)
     except Exception as e:
         print("An error occurred while downloading.")
-        print(r.json()["error"]["message"])
+        print(e)
         raise ValueError(e)
 
     try:
         if filetype == "shp":
-            with zipfile.ZipFile(filename) as z:
-                z.extractall(os.path.dirname(filename))
-            if not keep_zip:
-                os.remove(filename)
+            if keep_zip:
+                with zipfile.ZipFile(filename) as z:
+                    z.extractall(os.path.dirname(filename))
             filename = filename.replace(".zip", ".shp")
         if verbose:
             print(f"Data downloaded to {filename}")
@@ -2020,7 +2849,7 @@ def ee_export_geojson(
             filetype=filetype, selectors=selectors, filename=name
         )
         # print('Downloading data from {}\nPlease wait ...'.format(url))
-        r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+        r = get_http_session().get(url, stream=True, timeout=timeout, proxies=proxies)
 
         if r.status_code != 200:
             print("An error occurred while downloading. \n Retrying ...")
@@ -2031,13 +2860,13 @@ def ee_export_geojson(
                     filetype=filetype, selectors=selectors, filename=name
                 )
                 print(f"Downloading data from {url}\nPlease wait ...")
-                r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+                r = get_http_session().get(
+                    url, stream=True, timeout=timeout, proxies=proxies
+                )
             except Exception as e:
                 print(e)
 
-        with open(filename, "wb") as fd:
-            for chunk in r.iter_content(chunk_size=1024):
-                fd.write(chunk)
+        _save_response(r, filename)
     except Exception as e:
         print("An error occurred while downloading.")
         print(r.json()["error"]["message"])
@@ -2148,6 +2977,27 @@ def dict_to_csv(data_dict, out_csv, by_row=False, timeout=300, proxies=None):
     ee_export_vector(csv_feat_col, out_csv, timeout=timeout, proxies=proxies)
 
 
+def _download_ee_file(manager, url, out_file):
+    """Downloads an Earth Engine download URL with a DownloadManager, without leaving a partial file behind.
+
+    Earth Engine creates a new download URL for every getDownloadURL() call, so the partial file of a
+    failed download could never be resumed by a later call and is deleted.
+
+    Args:
+        manager (DownloadManager): The download manager.
+        url (str): The download URL.
+        out_file (str): The output file path.
+
+    Returns:
+        dict: The download report. See DownloadManager.download().
+    """
+    try:
+        return manager.download(url, out_file, resume=False)
+    except BaseException:
+        manager.discard(out_file)
+        raise
+
+
 def ee_export_image(
     ee_object,
     filename,
@@ -2160,6 +3010,8 @@ def ee_export_image(
     format="ZIPPED_GEO_TIFF",
     timeout=300,
     proxies=None,
+    resumable=False,
+    segments=1,
 ):
     """Exports an ee.Image as a GeoTIFF.
 
@@ -2176,6 +3028,8 @@ def ee_export_image(
             filePerBand and all band-level transformations will be ignored. Loading a NumPy output results in a structured array.
         timeout (int, optional): The timeout in seconds for the request. Defaults to 300.
         proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+        resumable (bool, optional): Whether to download a zipped GeoTIFF with DownloadManager, which resumes dropped connections, and extract it afterwards, instead of extracting it as it arrives. "GEO_TIFF" and "NPY" downloads always use DownloadManager. As Earth Engine creates a new URL for every call, a failed download is not resumed by a later call. Defaults to False.
+        segments (int, optional): The maximum number of byte ranges fetched in parallel by resumable downloads. Defaults to 1.
     """
 
     if not isinstance(ee_object, ee.Image):
@@ -2186,7 +3040,6 @@ def ee_export_image(
     basename = os.path.basename(filename)
     name = os.path.splitext(basename)[0]
     filetype = os.path.splitext(basename)[1][1:].lower()
-    filename_zip = filename.replace(".tif", ".zip")
 
     if filetype != "tif":
         print("The filename must end with .tif")
@@ -2216,34 +3069,149 @@ def ee_export_image(
             print(e)
             return
         print(f"Downloading data from {url}\nPlease wait ...")
-        r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
-
-        if r.status_code != 200:
-            print("An error occurred while downloading.")
-            return
-
-        with open(filename_zip, "wb") as fd:
-            for chunk in r.iter_content(chunk_size=1024):
-                fd.write(chunk)
+        manager = DownloadManager(segments, timeout=timeout, proxies=proxies)
 
-    except Exception as e:
-        print("An error occurred while downloading.")
-        print(r.json()["error"]["message"])
-        return
+        if format == "ZIPPED_GEO_TIFF" and not resumable:
+            r = get_http_session().get(
+                url, stream=True, timeout=timeout, proxies=proxies
+            )
+            if r.status_code != 200:
+                print("An error occurred while downloading.")
+                print(r.json()["error"]["message"])
+                return
 
-    try:
-        with zipfile.ZipFile(filename_zip) as z:
-            z.extractall(os.path.dirname(filename))
-        os.remove(filename_zip)
+            # The files of the zip archive are extracted as they arrive, so that the archive
+            # itself never touches the disk.
+            _save_response(
+                r,
+                out_dir=os.path.dirname(filename),
+                url=url,
+                timeout=timeout,
+                proxies=proxies,
+            )
+        elif format == "ZIPPED_GEO_TIFF":
+            filename_zip = os.path.splitext(filename)[0] + ".zip"
+            _download_ee_file(manager, url, filename_zip)
+            with zipfile.ZipFile(filename_zip) as z:
+                z.extractall(os.path.dirname(filename))
+            os.remove(filename_zip)
+        else:
+            if format == "NPY":
+                filename = os.path.splitext(filename)[0] + ".npy"
+            _download_ee_file(manager, url, filename)
 
         if file_per_band:
             print(f"Data downloaded to {os.path.dirname(filename)}")
         else:
             print(f"Data downloaded to {filename}")
     except Exception as e:
+        print("An error occurred while downloading.")
         print(e)
 
 
+def _with_retries(func, retries=3, backoff=1.0, retry=None):
+    """Calls a function until it succeeds, waiting exponentially longer between the attempts.
+
+    Args:
+        func (callable): The function to call without arguments.
+        retries (int, optional): The number of attempts after the first one. Defaults to 3.
+        backoff (float, optional): The wait in seconds before the first retry, doubled for every further retry. Defaults to 1.0.
+        retry (callable, optional): A function that takes the raised exception and returns whether to try again. Defaults to None, i.e., retry on any exception.
+
+    Returns:
+        tuple: The return value of the function and the number of attempts.
+    """
+    import time
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return func(), attempt
+        except Exception as e:
+            if attempt > retries or (retry is not None and not retry(e)):
+                raise
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def _export_collection_image(
+    session, image, filename, params, timeout=300, proxies=None, retries=3
+):
+    """Generates the download URL of an image and downloads it. Used by ee_export_image_collection().
+
+    Args:
+        session (requests.Session): The HTTP session.
+        image (ee.Image): The image to download.
+        filename (str): The output GeoTIFF file path. NPY downloads are saved with the .npy extension instead.
+        params (dict): The parameters of ee.Image.getDownloadURL().
+        timeout (int, optional): The timeout in seconds for the request. Defaults to 300.
+        proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+        retries (int, optional): The number of retries of the URL generation and of the download. Defaults to 3.
+
+    Returns:
+        dict: The keys filename, status ('ok' or 'error'), error, bytes, attempts and seconds.
+    """
+    import time
+
+    start = time.perf_counter()
+    result = {
+        "filename": filename,
+        "status": "ok",
+        "error": None,
+        "bytes": 0,
+        "attempts": 0,
+    }
+
+    zipped = params["format"] == "ZIPPED_GEO_TIFF"
+    if params["format"] == "NPY":
+        out_file = result["filename"] = os.path.splitext(filename)[0] + ".npy"
+    else:
+        out_file = filename
+
+    attempts = 0
+
+    def download():
+        nonlocal attempts
+        attempts += 1
+        url = image.getDownloadURL(params)
+        r = session.get(url, stream=True, timeout=timeout, proxies=proxies)
+        if r.status_code != 200:
+            try:
+                message = r.json()["error"]["message"]
+            except Exception:
+                message = f"HTTP error {r.status_code}"
+            # Client errors other than rate limiting fail the same way when retried.
+            if 400 <= r.status_code < 500 and r.status_code != 429:
+                raise ValueError(message)
+            raise Exception(message)
+
+        if zipped:
+            saved = _save_response(
+                r,
+                out_dir=os.path.dirname(filename),
+                url=url,
+                timeout=timeout,
+                proxies=proxies,
+            )
+        else:
+            tmp_file = out_file + ".part"
+            saved = _save_response(r, tmp_file)
+            os.replace(tmp_file, out_file)
+        return saved["bytes"]
+
+    try:
+        result["bytes"], _ = _with_retries(
+            download, retries, retry=lambda e: not isinstance(e, ValueError)
+        )
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["attempts"] = attempts
+    result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
 def ee_export_image_collection(
     ee_object,
     out_dir,
@@ -2256,11 +3224,18 @@ def ee_export_image_collection(
     format="ZIPPED_GEO_TIFF",
     timeout=300,
     proxies=None,
+    workers=4,
+    retries=3,
+    progress=None,
 ):
     """Exports an ImageCollection as GeoTIFFs.
 
+    The IDs and names of all images are fetched in one request. The download URLs are then generated
+    and the images downloaded by a pool of threads, so that the export is limited by the bandwidth
+    rather than by the round-trips to Earth Engine.
+
     Args:
-        ee_object (object): The ee.Image to download.
+        ee_object (object): The ee.ImageCollection to download.
         out_dir (str): The output directory for the exported images.
         scale (float, optional): A default scale to use for any bands that do not specify one; ignored if crs and crs_transform is specified. Defaults to None.
         crs (str, optional): A default CRS string to use for any bands that do not explicitly specify one. Defaults to None.
@@ -2272,7 +3247,14 @@ def ee_export_image_collection(
             filePerBand and all band-level transformations will be ignored. Loading a NumPy output results in a structured array.
         timeout (int, optional): The timeout in seconds for the request. Defaults to 300.
         proxies (dict, optional): A dictionary of proxy servers to use. Defaults to None.
+        workers (int, optional): The number of images downloaded at the same time. Defaults to 4.
+        retries (int, optional): The number of retries of the URL generation and of the download of an image. Defaults to 3.
+        progress (callable, optional): A function called with the number of finished images, the total number of images and the result of the image that finished. Defaults to None, which prints the progress.
+
+    Returns:
+        list: One result per image in collection order, with the keys index, id, name, filename, status ('ok' or 'error'), error, bytes, attempts and seconds.
     """
+    import concurrent.futures
 
     if not isinstance(ee_object, ee.ImageCollection):
         print("The ee_object must be an ee.ImageCollection.")
@@ -2282,32 +3264,75 @@ def ee_export_image_collection(
         os.makedirs(out_dir)
 
     try:
+        info = ee.Dictionary(
+            {
+                "ids": ee_object.aggregate_array("system:id"),
+                "names": ee_object.aggregate_array("system:index"),
+            }
+        ).getInfo()
+    except Exception as e:
+        print(e)
+        return
 
-        count = int(ee_object.size().getInfo())
-        print(f"Total number of images: {count}\n")
+    names = info["names"]
+    # Computed images have no ID, in which case aggregate_array() skips them.
+    ids = info["ids"] if len(info["ids"]) == len(names) else [None] * len(names)
+    count = len(names)
+    print(f"Total number of images: {count}\n")
 
-        for i in range(0, count):
-            image = ee.Image(ee_object.toList(count).get(i))
-            name = image.get("system:index").getInfo() + ".tif"
-            filename = os.path.join(os.path.abspath(out_dir), name)
-            print(f"Exporting {i + 1}/{count}: {name}")
-            ee_export_image(
+    if progress is None:
+
+        def progress(done, total, result):
+            if result["status"] == "ok":
+                print(f"Exported {done}/{total}: {result['filename']}")
+            else:
+                print(f"Failed {done}/{total}: {result['name']}: {result['error']}")
+
+    session = get_http_session(pool_size=max(1, workers))
+
+    results = [None] * count
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for index, name in enumerate(names):
+            # Selecting the image by its index keeps the processing applied to the collection.
+            image = ee.Image(
+                ee_object.filter(ee.Filter.eq("system:index", name)).first()
+            )
+            params = {"name": name, "filePerBand": file_per_band, "scale": scale}
+            params["region"] = region if region is not None else image.geometry()
+            if dimensions is not None:
+                params["dimensions"] = dimensions
+            if crs is not None:
+                params["crs"] = crs
+            if crs_transform is not None:
+                params["crs_transform"] = crs_transform
+            params["format"] = format
+
+            filename = os.path.join(os.path.abspath(out_dir), name + ".tif")
+            future = executor.submit(
+                _export_collection_image,
+                session,
                 image,
-                filename=filename,
-                scale=scale,
-                crs=crs,
-                crs_transform=crs_transform,
-                region=region,
-                dimensions=dimensions,
-                file_per_band=file_per_band,
-                format=format,
-                timeout=timeout,
-                proxies=proxies,
+                filename,
+                params,
+                timeout,
+                proxies,
+                retries,
             )
-            print("\n")
+            futures[future] = index
 
-    except Exception as e:
-        print(e)
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            index = futures[future]
+            result = {"index": index, "id": ids[index], "name": names[index]}
+            result.update(future.result())
+            results[index] = result
+            progress(done, count, result)
+
+    failed = sum(1 for result in results if result["status"] != "ok")
+    if failed:
+        print(f"{failed} of {count} images failed to export.")
+
+    return results
 
 
 def ee_export_image_to_drive(
@@ -2918,15 +3943,13 @@ def get_image_thumbnail(
     vis_params["crs"] = crs
     url = ee_object.getThumbURL(vis_params)
 
-    r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+    r = get_http_session().get(url, stream=True, timeout=timeout, proxies=proxies)
     if r.status_code != 200:
         print("An error occurred while downloading.")
         print(r.json()["error"]["message"])
 
     else:
-        with open(out_img, "wb") as fd:
-            for chunk in r.iter_content(chunk_size=1024):
-                fd.write(chunk)
+        _save_response(r, out_img)
 
 
 def get_image_collection_thumbnails(
@@ -3004,7 +4027,16 @@ def get_image_collection_thumbnails(
         print(e)
 
 
-def netcdf_to_ee(nc_file, var_names, band_names=None, lon="lon", lat="lat"):
+def netcdf_to_ee(
+    nc_file,
+    var_names,
+    band_names=None,
+    lon="lon",
+    lat="lat",
+    encoding="list",
+    precision=None,
+    verbose=False,
+):
     """
     Creates an ee.Image from netCDF variables band_names that are read from nc_file. Currently only supports variables in a regular longitude/latitude grid (EPSG:4326).
 
@@ -3014,6 +4046,9 @@ def netcdf_to_ee(nc_file, var_names, band_names=None, lon="lon", lat="lat"):
         band_names (list, optional): if given, the bands are renamed to band_names. Defaults to the original var_names
         lon (str, optional): the name of the longitude variable in the netCDF file. Defaults to "lon"
         lat (str, optional): the name of the latitude variable in the netCDF file. Defaults to "lat"
+        encoding (str, optional): How the values are sent to Earth Engine, either "list" or "compact", which makes large grids fit into a request. See numpy_to_ee(). Defaults to "list".
+        precision (int, optional): The number of decimal places kept by the compact encoding. Defaults to None, i.e., the values are kept as they are.
+        verbose (bool, optional): Whether to print the payload bytes per band of the compact encoding. Defaults to False.
 
     Returns:
         image: An ee.Image
@@ -3088,7 +4123,13 @@ def netcdf_to_ee(nc_file, var_names, band_names=None, lon="lon", lat="lat"):
             band_names = var_names
 
         image = numpy_to_ee(
-            data_np, "EPSG:4326", transform=transform, band_names=band_names
+            data_np,
+            "EPSG:4326",
+            transform=transform,
+            band_names=band_names,
+            encoding=encoding,
+            precision=precision,
+            verbose=verbose,
         )
 
         return image
@@ -3097,16 +4138,127 @@ def netcdf_to_ee(nc_file, var_names, band_names=None, lon="lon", lat="lat"):
         print(e)
 
 
-def numpy_to_ee(np_array, crs=None, transform=None, transformWkt=None, band_names=None):
+def _encode_numpy_band(band, tile_size=256, precision=None):
+    """Encodes a 2D numpy array as compact JSON text per tile. Used by numpy_to_ee().
+
+    Integers, and floats rounded to precision decimal places, are encoded as the differences between
+    neighbouring values along the second axis if they and their differences are less than 2**53. These are mostly small, so as many of them as fit are
+    packed into the 52 bits of each JSON number when that is shorter. Other floats are encoded in the
+    shortest text that converts back to their dtype. NaN and infinite values are masked.
+
+    Args:
+        band (np.array): The 2D numpy array.
+        tile_size (int, optional): The width and height of the tiles. Defaults to 256.
+        precision (int, optional): The number of decimal places kept of float values. Defaults to None, i.e., floats are kept as they are.
+
+    Returns:
+        tuple: The list of tiles and the number that the decoded values need to be divided by, or None if the values are not delta-encoded. The tiles are dicts with the keys x, y (the offset of the tile), rows, columns, bits (the bits per packed value, or None if not packed), values, mask (JSON text of 2D lists, or None if no value is masked) and starts (JSON text of the first value of each row, or None if not delta-encoded).
+    """
+    import numpy as np
+
+    band = np.asarray(band)
+    mask = None
+    scale = 1
+    values = band
+    if band.dtype.kind == "f":
+        finite = np.isfinite(band)
+        if not finite.all():
+            mask = finite
+            band = values = np.where(finite, band, 0)
+        if precision is not None:
+            scale = 10**precision
+            values = np.round(band * scale)
+        elif not np.array_equal(band, np.round(band)):
+            scale = None
+
+    if scale is not None:
+        # JSON numbers are read as doubles, so the values and their differences are only
+        # delta-encoded if they are integers of less than 2**53. Other values are sent as text.
+        limit = 2**53
+        integers = None
+        if values.size == 0 or (values.min() > -limit and values.max() < limit):
+            integers = values.astype(np.int64)
+            if np.abs(np.diff(integers, axis=1)).max(initial=0) >= limit:
+                integers = None
+        if integers is None:
+            scale = None
+        else:
+            band = integers
+
+    def to_json(block):
+        return "[" + ",".join("[" + ",".join(map(str, row)) + "]" for row in block) + "]"
+
+    tiles = []
+    for x in range(0, band.shape[0], tile_size):
+        for y in range(0, band.shape[1], tile_size):
+            block = band[x : x + tile_size, y : y + tile_size]
+            tile = {"x": x, "y": y, "rows": block.shape[0], "columns": block.shape[1]}
+            tile["bits"] = tile["mask"] = tile["starts"] = None
+            if mask is not None:
+                tile_mask = mask[x : x + tile_size, y : y + tile_size]
+                if not tile_mask.any():
+                    continue
+                if not tile_mask.all():
+                    tile["mask"] = to_json(tile_mask.astype(np.uint8).tolist())
+
+            if scale is None:
+                # The numpy scalars print the shortest text that round-trips their dtype.
+                tile["values"] = to_json(block)
+                tiles.append(tile)
+                continue
+
+            # The first value of each row is sent on its own, so that only the differences
+            # decide how many bits are packed per value.
+            tile["starts"] = to_json([block[:, :1].ravel().tolist()])[1:-1]
+            deltas = np.diff(block, axis=1, prepend=block[:, :1])
+            tile["values"] = to_json(deltas.tolist())
+            zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+            bits = max(1, int(zigzag.max()).bit_length())
+            count = 52 // bits
+            if count < 2:
+                tiles.append(tile)
+                continue
+
+            width = -(-block.shape[1] // count)
+            padded = np.zeros((block.shape[0], width * count), dtype=np.uint64)
+            padded[:, : block.shape[1]] = zigzag
+            padded = padded.reshape(block.shape[0], width, count)
+            shifts = np.arange(count, dtype=np.uint64) * np.uint64(bits)
+            packed = to_json(np.bitwise_or.reduce(padded << shifts, axis=2).tolist())
+            if len(packed) < len(tile["values"]):
+                tile["bits"] = bits
+                tile["values"] = packed
+            tiles.append(tile)
+
+    return tiles, scale
+
+
+def numpy_to_ee(
+    np_array,
+    crs=None,
+    transform=None,
+    transformWkt=None,
+    band_names=None,
+    encoding="list",
+    tile_size=256,
+    precision=None,
+    verbose=False,
+):
     """
     Creates an ee.Image from a 3D numpy array where each 2D numpy slice is added to a band, and a geospatial transform that indicates where to put the data. If the np_array is already 2D only, then it is only a one-band image.
 
+    With encoding="compact", each band is split into tiles that are sent as compact JSON text, with integers and rounded floats delta-encoded, and assembled into the band by Earth Engine. This makes the request many times smaller than with encoding="list", which sends every band as one nested list of numbers. Earth Engine rejects requests of more than 10 MB.
+
     Args:
         np_array (np.array): the 3D (or 2D) numpy array to add to an image
         crs (str): The base coordinate reference system of this Projection, given as a well-known authority code (e.g. 'EPSG:4326') or a WKT string.
         transform (list): The transform between projected coordinates and the base coordinate system, specified as a 2x3 affine transform matrix in row-major order: [xScale, xShearing, xTranslation, yShearing, yScale, yTranslation]. May not specify both this and 'transformWkt'.
         transformWkt (str): The transform between projected coordinates and the base coordinate system, specified as a WKT string. May not specify both this and 'transform'.
         band_names (str or list, optional): The list of names for the bands. The default names are 'constant', and 'constant_1', 'constant_2', etc.
+        encoding (str, optional): How the values are sent to Earth Engine, either "list" or "compact". Defaults to "list".
+        tile_size (int, optional): The width and height of the tiles of the compact encoding. Defaults to 256.
+        precision (int, optional): The number of decimal places kept of float values by the compact encoding. Defaults to None, i.e., floats are kept as they are.
+        verbose (bool, optional): Whether to print the payload bytes per band of the compact encoding. Defaults to False.
 
     Returns:
         image: An ee.Image
@@ -3123,6 +4275,9 @@ def numpy_to_ee(np_array, crs=None, transform=None, transformWkt=None, band_name
     if band_names and not isinstance(band_names, (list, str)):
         print("Band names must be a str or list")
         return
+    if encoding not in ["list", "compact"]:
+        print("The encoding must be either 'list' or 'compact'.")
+        return
 
     try:
 
@@ -3147,12 +4302,80 @@ def numpy_to_ee(np_array, crs=None, transform=None, transformWkt=None, band_name
             image = ee.Image(ee_data).arrayGet(coords)
             return image
 
+        payload = []
+
+        def tiles_to_ee(band):
+            tiles, scale = _encode_numpy_band(band, tile_size, precision)
+            images = []
+            for tile in tiles:
+                local = coords.subtract(ee.Image.constant([tile["x"], tile["y"]]))
+                lx = local.select("x")
+                ly = local.select("y")
+                local = local.updateMask(
+                    lx.gte(0).And(ly.gte(0)).And(lx.lt(tile_size)).And(ly.lt(tile_size))
+                )
+                values = ee.Array(ee.String(tile["values"]).decodeJSON())
+                bits = tile["bits"]
+                if bits is not None:
+                    # Unpack the zigzag-encoded differences, 52 // bits per number.
+                    count = 52 // bits
+                    rows = tile["rows"]
+                    width = -(-tile["columns"] // count)
+                    shifts = ee.Array([[[bits * i for i in range(count)]]])
+                    zigzag = (
+                        values.reshape([rows, width, 1])
+                        .repeat(2, count)
+                        .rightShift(shifts.repeat(0, rows).repeat(1, width))
+                        .bitwiseAnd(2**bits - 1)
+                        .reshape([rows, width * count])
+                        .slice(1, 0, tile["columns"])
+                    )
+                    values = zigzag.rightShift(1).bitwiseXor(
+                        zigzag.bitwiseAnd(1).multiply(-1)
+                    )
+                if scale is not None:
+                    starts = ee.Array(ee.String(tile["starts"]).decodeJSON())
+                    starts = starts.reshape([tile["rows"], 1]).repeat(1, tile["columns"])
+                    values = values.accum(1).add(starts)
+                image = ee.Image(values).arrayGet(local)
+                if tile["mask"] is not None:
+                    mask = ee.Array(ee.String(tile["mask"]).decodeJSON())
+                    image = image.updateMask(ee.Image(mask).arrayGet(local))
+                images.append(image)
+
+            payload.append(
+                sum(
+                    len(t["values"]) + len(t["mask"] or "") + len(t["starts"] or "")
+                    for t in tiles
+                )
+            )
+            if verbose:
+                print(f"Band {len(payload)}: {payload[-1]:,} bytes in {len(tiles)} tiles")
+
+            image = ee.ImageCollection(images).mosaic()
+            if scale not in (None, 1):
+                image = image.divide(scale)
+            return image
+
+        if encoding == "compact":
+            to_ee = tiles_to_ee
+        else:
+
+            def to_ee(band):
+                return list_to_ee(band.tolist())
+
         if len(s) < 3:
-            image = list_to_ee(np_array.tolist())
+            image = to_ee(np_array)
         else:
-            image = list_to_ee(np_array[0].tolist())
+            image = to_ee(np_array[0])
             for z in np.arange(1, dimz):
-                image = image.addBands(list_to_ee(np_array[z].tolist()))
+                image = image.addBands(to_ee(np_array[z]))
+
+        if sum(payload) > 10 * 1024 * 1024:
+            print(
+                f"The encoded bands have {sum(payload):,} bytes, more than Earth Engine "
+                "accepts in one request. Try a lower precision or fewer bands."
+            )
 
         if band_names:
             image = image.rename(band_names)
@@ -3164,16 +4387,36 @@ def numpy_to_ee(np_array, crs=None, transform=None, transformWkt=None, band_name
 
 
 def ee_to_numpy(
-    ee_object, bands=None, region=None, properties=None, default_value=None
+    ee_object,
+    bands=None,
+    region=None,
+    properties=None,
+    default_value=None,
+    tiled=False,
+    scale=None,
+    crs=None,
+    tile_size=None,
+    workers=8,
+    out_file=None,
 ):
     """Extracts a rectangular region of pixels from an image into a 2D numpy array per band.
 
+    By default the region is sampled with ee.Image.sampleRectangle(), which is limited to 262,144 pixels.
+    In tiled mode the region is split into a grid of tiles that are fetched concurrently with
+    ee.data.computePixels(), all bands of a tile in one request, and written into one preallocated array.
+
     Args:
         ee_object (object): The image to sample.
         bands (list, optional): The list of band names to extract. Please make sure that all bands have the same spatial resolution. Defaults to None.
-        region (object, optional): The region whose projected bounding box is used to sample the image. The maximum number of pixels you can export is 262,144. Resampling and reprojecting all bands to a fixed scale can be useful. Defaults to the footprint in each band.
-        properties (list, optional): The properties to copy over from the sampled image. Defaults to all non-system properties.
+        region (object, optional): The region whose projected bounding box is used to sample the image. The maximum number of pixels you can export is 262,144 unless tiled is True. Resampling and reprojecting all bands to a fixed scale can be useful. Defaults to the footprint in each band.
+        properties (list, optional): The properties to copy over from the sampled image. Ignored in tiled mode. Defaults to all non-system properties.
         default_value (float, optional): A default value used when a sampled pixel is masked or outside a band's footprint. Defaults to None.
+        tiled (bool, optional): Whether to fetch the region as a grid of tiles, for regions of more than 262,144 pixels. Defaults to False.
+        scale (float, optional): The pixel size in meters in tiled mode. Defaults to the nominal scale of the first band.
+        crs (str, optional): The CRS of the pixel grid in tiled mode, e.g., "EPSG:3857". Defaults to the CRS of the first band.
+        tile_size (int, optional): The width and height of the tiles in pixels. Defaults to None, i.e., as large as keeps each request under about 32 MB.
+        workers (int, optional): The number of tiles fetched concurrently. Defaults to 8.
+        out_file (str, optional): A .npy file to write the array to as a numpy.memmap, for arrays larger than the memory. Defaults to None.
 
     Returns:
         array: A 3D numpy array.
@@ -3189,6 +4432,19 @@ def ee_to_numpy(
 
     try:
 
+        if tiled or out_file is not None:
+            return _ee_to_numpy_tiled(
+                ee_object,
+                bands,
+                region,
+                default_value,
+                scale,
+                crs,
+                tile_size,
+                workers,
+                out_file,
+            )
+
         if bands is not None:
             ee_object = ee_object.select(bands)
         else:
@@ -3197,20 +4453,153 @@ def ee_to_numpy(
         band_arrs = ee_object.sampleRectangle(
             region=region, properties=properties, defaultValue=default_value
         )
-        band_values = []
+        # Fetch all bands in one request.
+        band_values = band_arrs.toDictionary(bands).getInfo()
 
-        for band in bands:
-            band_arr = band_arrs.get(band).getInfo()
-            band_value = np.array(band_arr)
-            band_values.append(band_value)
-
-        image = np.dstack(band_values)
+        image = np.dstack([np.array(band_values[band]) for band in bands])
         return image
 
     except Exception as e:
         print(e)
 
 
+def _ee_to_numpy_tiled(
+    image,
+    bands=None,
+    region=None,
+    default_value=None,
+    scale=None,
+    crs=None,
+    tile_size=None,
+    workers=8,
+    out_file=None,
+    retries=3,
+):
+    """Fetches the pixels of an image in a region as a grid of tiles into one preallocated array. Used by ee_to_numpy().
+
+    Args:
+        image (ee.Image): The image to sample.
+        bands (list, optional): The list of band names to extract. Defaults to all bands.
+        region (ee.Geometry, optional): The region whose bounding box in the CRS is fetched. Defaults to the footprint of the image.
+        default_value (float, optional): The value of masked pixels. Defaults to None, i.e., as returned by Earth Engine.
+        scale (float, optional): The pixel size in meters. Defaults to the nominal scale of the first band.
+        crs (str, optional): The CRS of the pixel grid. Defaults to the CRS of the first band.
+        tile_size (int, optional): The width and height of the tiles in pixels. Defaults to None, i.e., as large as keeps each request under about 32 MB.
+        workers (int, optional): The number of tiles fetched concurrently. Defaults to 8.
+        out_file (str, optional): A .npy file to write the array to as a numpy.memmap. Defaults to None.
+        retries (int, optional): The number of retries of a failed tile. Defaults to 3.
+
+    Returns:
+        array: A 3D numpy array of shape (rows, columns, bands), or a numpy.memmap if out_file is given.
+    """
+    import concurrent.futures
+
+    import numpy as np
+
+    if bands is not None:
+        image = image.select(bands)
+    if default_value is not None:
+        image = image.unmask(default_value, False)
+    if region is None:
+        region = image.geometry()
+
+    # The grid, the band names and the bounding box are fetched in one request.
+    projection = image.select(0).projection()
+    if crs is not None:
+        projection = ee.Projection(crs)
+    projection = ee.Projection(projection.crs())
+    if scale is None:
+        scale = image.select(0).projection().nominalScale()
+    info = ee.Dictionary(
+        {
+            "crs": projection.crs(),
+            "pixel": projection.atScale(scale),
+            "bands": image.bandNames(),
+            "bounds": ee.Geometry(region).bounds(1, projection).coordinates(),
+        }
+    ).getInfo()
+
+    bands = info["bands"]
+    transform = info["pixel"]["transform"]
+    x_size, y_size = abs(transform[0]), abs(transform[4])
+    xs = [point[0] for point in info["bounds"][0]]
+    ys = [point[1] for point in info["bounds"][0]]
+    x_min, y_max = min(xs), max(ys)
+    width = max(1, math.ceil((max(xs) - x_min) / x_size))
+    height = max(1, math.ceil((y_max - min(ys)) / y_size))
+
+    if tile_size is None:
+        # computePixels() rejects responses of more than 48 MB; assume 8 bytes per value.
+        tile_size = int(math.sqrt(32 * 1024 * 1024 / (8 * len(bands))))
+        tile_size = max(256, min(4096, tile_size // 256 * 256))
+    tiles = [
+        (row, col, min(tile_size, height - row), min(tile_size, width - col))
+        for row in range(0, height, tile_size)
+        for col in range(0, width, tile_size)
+    ]
+
+    def fetch(tile):
+        row, col, rows, cols = tile
+        request = {
+            "expression": image,
+            "fileFormat": "NUMPY_NDARRAY",
+            "bandIds": bands,
+            "grid": {
+                "dimensions": {"width": cols, "height": rows},
+                "affineTransform": {
+                    "scaleX": x_size,
+                    "shearX": 0,
+                    "translateX": x_min + col * x_size,
+                    "shearY": 0,
+                    "scaleY": -y_size,
+                    "translateY": y_max - row * y_size,
+                },
+                "crsCode": info["crs"],
+            },
+        }
+        return _with_retries(lambda: ee.data.computePixels(request), retries)[0]
+
+    # The first tile tells the data type of the output array.
+    first = fetch(tiles[0])
+    dtype = np.result_type(*[first.dtype[band] for band in bands])
+    shape = (height, width, len(bands))
+    if out_file is not None:
+        array = np.lib.format.open_memmap(
+            os.path.abspath(out_file), mode="w+", dtype=dtype, shape=shape
+        )
+    else:
+        array = np.empty(shape, dtype=dtype)
+
+    def write(tile, pixels):
+        row, col, rows, cols = tile
+        for index, band in enumerate(bands):
+            array[row : row + rows, col : col + cols, index] = pixels[band]
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {}
+    try:
+        write(tiles[0], first)
+        futures = {executor.submit(fetch, tile): tile for tile in tiles[1:]}
+        for future in concurrent.futures.as_completed(futures):
+            write(futures[future], future.result())
+    except BaseException:
+        # The first failed tile is raised right away: the tiles that have not started are cancelled
+        # and the ones being fetched are not waited for.
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        if out_file is not None:
+            # The memmap is released before its file is removed, which Windows requires.
+            del array
+            os.remove(os.path.abspath(out_file))
+        raise
+    executor.shutdown()
+
+    if out_file is not None:
+        array.flush()
+    return array
+
+
 def download_ee_video(collection, video_args, out_gif, timeout=300, proxies=None):
     """Downloads a video thumbnail as a GIF image from Earth Engine.
 
@@ -3251,16 +4640,14 @@ def download_ee_video(collection, video_args, out_gif, timeout=300, proxies=None
         url = collection.getVideoThumbURL(video_args)
 
         print(f"Downloading GIF image from {url}\nPlease wait ...")
-        r = requests.get(url, stream=True, timeout=timeout, proxies=proxies)
+        r = get_http_session().get(url, stream=True, timeout=timeout, proxies=proxies)
 
         if r.status_code != 200:
             print("An error occurred while downloading.")
             print(r.json()["error"]["message"])
             return
         else:
-            with open(out_gif, "wb") as fd:
-                for chunk in r.iter_content(chunk_size=1024):
-                    fd.write(chunk)
+            _save_response(r, out_gif)
             print(f"The GIF image has been saved to: {out_gif}")
     except Exception as e:
         print(e)
@@ -3315,6 +4702,7 @@ def show_youtube(id="h0pz3S6Tvx0"):
         id (str, optional): Unique ID of the video. Defaults to 'h0pz3S6Tvx0'.
 
     """
+    import ipywidgets as widgets
     from IPython.display import YouTubeVideo, display
 
     if "/" in id:
@@ -3876,7 +5264,6 @@ def ee_data_thumbnail(asset_id, timeout=300, proxies=None):
     Returns:
         str: An http url of the thumbnail.
     """
-    import urllib
 
     from bs4 import BeautifulSoup
 
@@ -3888,11 +5275,13 @@ def ee_data_thumbnail(asset_id, timeout=300, proxies=None):
         asset_uid
     )
 
-    r = requests.get(thumbnail_url, timeout=timeout, proxies=proxies)
+    r = get_http_session().get(thumbnail_url, timeout=timeout, proxies=proxies)
 
     try:
         if r.status_code != 200:
-            html_page = urllib.request.urlopen(asset_url)
+            html_page = get_http_session().get(
+                asset_url, timeout=timeout, proxies=proxies
+            ).content
             soup = BeautifulSoup(html_page, features="html.parser")
 
             for img in soup.findAll("img"):
@@ -4003,7 +5392,7 @@ def ee_api_to_csv(outfile=None, timeout=300, proxies=None):
 
     try:
 
-        r = requests.get(url, timeout=timeout, proxies=proxies)
+        r = get_http_session().get(url, timeout=timeout, proxies=proxies)
         soup = BeautifulSoup(r.content, "html.parser")
 
         names = []
@@ -4221,6 +5610,9 @@ def build_api_tree(api_dict, output_widget, layout_width="100%"):
     Returns:
         tuple: Returns a tuple containing two items: a tree Output widget and a tree dictionary.
     """
+    import ipywidgets as widgets
+    from IPython.display import display
+    from ipytree import Node, Tree
 
     warnings.filterwarnings("ignore")
 
@@ -4274,6 +5666,7 @@ def search_api_tree(keywords, api_tree):
     Returns:
         object: An ipytree object/widget.
     """
+    from ipytree import Tree
 
     warnings.filterwarnings("ignore")
 
@@ -4293,6 +5686,8 @@ def ee_search(asset_limit=100):
     Args:
         asset_limit (int, optional): The number of assets to display for each asset type, i.e., Image, ImageCollection, and FeatureCollection. Defaults to 100.
     """
+    import ipywidgets as widgets
+    from IPython.display import display
 
     warnings.filterwarnings("ignore")
 
@@ -4443,6 +5838,8 @@ def ee_user_id():
 def build_asset_tree(limit=100):
 
     import geeadd.ee_report as geeadd
+    import ipywidgets as widgets
+    from ipytree import Node, Tree
 
     warnings.filterwarnings("ignore")
 
@@ -4567,6 +5964,7 @@ def build_repo_tree(out_dir=None, name="gee_repos"):
     Returns:
         tuple: Returns a tuple containing a tree widget, an output widget, and a tree dictionary containing nodes.
     """
+    import ipywidgets as widgets
 
     warnings.filterwarnings("ignore")
 
@@ -4689,6 +6087,9 @@ def file_browser(
     Returns:
         object: An ipywidget.
     """
+    import ipywidgets as widgets
+    from IPython.display import display
+    from ipytree import Node, Tree
     import platform
 
     if in_dir is None:
@@ -5190,7 +6591,7 @@ def cog_tile(
         TileMatrixSetId = kwargs["TileMatrixSetId"]
         kwargs.pop("TileMatrixSetId")
 
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/{TileMatrixSetId}/tilejson.json",
         params=kwargs,
         timeout=timeout,
@@ -5236,14 +6637,14 @@ def cog_mosaic(
             print("Creating COG masaic ...")
 
         # Create token
-        r = requests.post(
+        r = get_http_session().post(
             f"{titiler_endpoint}/tokens/create",
             json={"username": username, "scope": ["mosaic:read", "mosaic:create"]},
         ).json()
         token = r["token"]
 
         # Create mosaic
-        requests.post(
+        get_http_session().post(
             f"{titiler_endpoint}/mosaicjson/create",
             json={
                 "username": username,
@@ -5256,7 +6657,7 @@ def cog_mosaic(
             },
         ).json()
 
-        r2 = requests.get(
+        r2 = get_http_session().get(
             f"{titiler_endpoint}/mosaicjson/{username}.{layername}/tilejson.json",
             timeout=timeout,
         ).json()
@@ -5291,12 +6692,12 @@ def cog_mosaic_from_file(
     Returns:
         str: The tile URL for the COG mosaic.
     """
-    import urllib
 
     links = []
     if filepath.startswith("http"):
-        data = urllib.request.urlopen(filepath)
-        for line in data:
+        r = get_http_session().get(filepath)
+        r.raise_for_status()
+        for line in r.content.splitlines():
             links.append(line.decode("utf-8").strip())
 
     else:
@@ -5325,7 +6726,7 @@ def cog_bounds(url, titiler_endpoint="https://titiler.xyz", timeout=300):
 
     url = get_direct_url(url)
 
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/bounds", params={"url": url}, timeout=timeout
     ).json()
 
@@ -5366,7 +6767,7 @@ def cog_bands(url, titiler_endpoint="https://titiler.xyz", timeout=300):
     """
 
     url = get_direct_url(url)
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/info",
         params={
             "url": url,
@@ -5391,7 +6792,7 @@ def cog_stats(url, titiler_endpoint="https://titiler.xyz", timeout=300):
     """
 
     url = get_direct_url(url)
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/statistics",
         params={
             "url": url,
@@ -5421,7 +6822,7 @@ def cog_info(
     if return_geojson:
         info = "info.geojson"
 
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/{info}",
         params={
             "url": url,
@@ -5454,14 +6855,13 @@ def cog_pixel_value(
     Returns:
         list: A dictionary of band info.
     """
-
     url = get_direct_url(url)
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     kwargs["url"] = url
     if bidx is not None:
         kwargs["bidx"] = bidx
 
-    r = requests.get(
+    r = get_http_session().get(
         f"{titiler_endpoint}/cog/point/{lon},{lat}", params=kwargs, timeout=timeout
     ).json()
     bands = cog_bands(url, titiler_endpoint)
@@ -5618,13 +7018,13 @@ def stac_tile(
         kwargs.pop("TileMatrixSetId")
 
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/{TileMatrixSetId}/tilejson.json",
             params=kwargs,
             timeout=timeout,
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_item(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5663,11 +7063,11 @@ def stac_bounds(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/bounds", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_bounds(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5730,11 +7130,11 @@ def stac_bands(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/assets", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_assets(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5782,11 +7182,11 @@ def stac_stats(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/statistics", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_statistics(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5834,11 +7234,11 @@ def stac_info(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/info", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_info(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5886,11 +7286,11 @@ def stac_info_geojson(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/info.geojson", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_info_geojson(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5929,11 +7329,11 @@ def stac_assets(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/assets", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_assets(), params=kwargs, timeout=timeout
         ).json()
 
@@ -5995,11 +7395,11 @@ def stac_pixel_value(
 
     titiler_endpoint = check_titiler_endpoint(titiler_endpoint)
     if isinstance(titiler_endpoint, str):
-        r = requests.get(
+        r = get_http_session().get(
             f"{titiler_endpoint}/stac/{lon},{lat}", params=kwargs, timeout=timeout
         ).json()
     else:
-        r = requests.get(
+        r = get_http_session().get(
             titiler_endpoint.url_for_stac_pixel_value(lon, lat),
             params=kwargs,
             timeout=timeout,
@@ -8813,6 +10213,120 @@ def extract_pixel_values(
         return dict_values
 
 
+def sample_points(
+    image,
+    points,
+    bands=None,
+    scale=None,
+    reducer="FIRST",
+    conversions=None,
+    names=None,
+    tileScale=1,
+    getInfo=True,
+    page_size=5000,
+):
+    """Samples an image at many points with a single reduceRegions request and returns the values as a DataFrame.
+
+    Args:
+        image (ee.Image | ee.ImageCollection): The image to sample. An image collection is converted with toBands().
+        points (list | ee.FeatureCollection): List of [longitude, latitude] coordinates, or an ee.FeatureCollection of points.
+        bands (list, optional): The bands to sample. Defaults to None, i.e., all bands.
+        scale (float, optional): A nominal scale in meters of the projection to sample in. Defaults to None.
+        reducer (str | ee.Reducer, optional): The statistic of the pixels at each point, i.e., FIRST, MEAN, MAXIMUM, MEDIAN, MINIMUM, STD, SUM, VARIANCE, or an ee.Reducer. Defaults to 'FIRST'.
+        conversions (dict, optional): Columns computed from the sampled values, in order, e.g., for unit conversions. Each value is either a (column, multiply, add) tuple or a function that takes the DataFrame and returns the new column. For example, {"kelvin": ("ST_B10", 0.00341802, 149.0), "fahrenheit": ("kelvin", 1.8, -459.4)}. They are applied to the DataFrame, so they do not add to the request. Defaults to None.
+        names (list, optional): Names of the points given as coordinates, saved in the "name" column. Defaults to None, i.e., the index of each point.
+        tileScale (int, optional): A scaling factor used to reduce aggregation tile size; using a larger tileScale (e.g. 2 or 4) may enable computations that run out of memory with the default. Defaults to 1.
+        getInfo (bool, optional): Whether to fetch the values as a DataFrame. If False, the ee.FeatureCollection with the sampled values is returned without any request and conversions are not applied. Defaults to True.
+        page_size (int, optional): The maximum number of points fetched per request, which is limited to 5000 by Earth Engine. Defaults to 5000.
+
+    Raises:
+        TypeError: The image must be an instance of ee.Image or ee.ImageCollection.
+        ValueError: The reducer must be one of the allowed statistics.
+
+    Returns:
+        pd.DataFrame | ee.FeatureCollection: One row per point with the point properties, longitude, latitude, the sampled bands and the converted columns.
+    """
+    if isinstance(image, ee.ImageCollection):
+        image = image.toBands()
+
+    if not isinstance(image, ee.Image):
+        raise TypeError("The image must be an instance of ee.Image or ee.ImageCollection.")
+
+    allowed_stats = {
+        "FIRST": ee.Reducer.first(),
+        "MEAN": ee.Reducer.mean(),
+        "MAXIMUM": ee.Reducer.max(),
+        "MEDIAN": ee.Reducer.median(),
+        "MINIMUM": ee.Reducer.min(),
+        "STD": ee.Reducer.stdDev(),
+        "SUM": ee.Reducer.sum(),
+        "VARIANCE": ee.Reducer.variance(),
+    }
+    if isinstance(reducer, str):
+        if reducer.upper() not in allowed_stats:
+            raise ValueError(
+                f"The reducer must be one of the following {', '.join(allowed_stats.keys())}"
+            )
+        reducer = allowed_stats[reducer.upper()]
+
+    if bands is not None:
+        image = image.select(bands)
+
+    if isinstance(points, ee.FeatureCollection):
+        collection = points
+        num_points = None
+    else:
+        if names is None:
+            names = list(range(len(points)))
+        collection = ee.FeatureCollection(
+            [
+                ee.Feature(ee.Geometry.Point(list(point)), {"name": name})
+                for point, name in zip(points, names)
+            ]
+        )
+        num_points = len(points)
+
+    # Name the outputs after the bands, also when the image has a single band.
+    result = image.reduceRegions(
+        collection=collection,
+        reducer=reducer.forEachBand(image),
+        scale=scale,
+        tileScale=tileScale,
+    )
+
+    if not getInfo:
+        return result
+
+    import pandas as pd
+
+    rows = []
+    offset = 0
+    while True:
+        features = result.toList(page_size, offset).getInfo()
+        for feature in features:
+            row = dict(feature.get("properties") or {})
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                row["longitude"], row["latitude"] = geometry["coordinates"][:2]
+            rows.append(row)
+        offset += page_size
+        if len(features) < page_size or (
+            num_points is not None and offset >= num_points
+        ):
+            break
+
+    df = pd.DataFrame(rows)
+
+    for column, conversion in (conversions or {}).items():
+        if callable(conversion):
+            df[column] = conversion(df)
+        else:
+            source, multiply, add = conversion
+            df[column] = df[source] * multiply + add
+
+    return df
+
+
 def list_vars(var_type=None):
     """Lists all defined avariables.
 
@@ -9862,7 +11376,7 @@ def search_qms(keyword, limit=10, list_only=True, add_prefix=True, timeout=300):
     """
 
     QMS_API = "https://qms.nextgis.com/api/v1/geoservices"
-    services = requests.get(
+    services = get_http_session().get(
         f"{QMS_API}/?search={keyword}&type=tms&epsg=3857&limit={limit}", timeout=timeout
     )
     services = services.json()
@@ -9914,12 +11428,12 @@ def read_file_from_url(url, return_type="list", encoding="utf-8"):
     Returns:
         str | list: The contents of the file.
     """
-    from urllib.request import urlopen
-
+    r = get_http_session().get(url)
+    r.raise_for_status()
     if return_type == "list":
-        return [line.decode(encoding).rstrip() for line in urlopen(url).readlines()]
+        return [line.decode(encoding).rstrip() for line in r.content.splitlines()]
     elif return_type == "string":
-        return urlopen(url).read().decode(encoding)
+        return r.content.decode(encoding)
     else:
         raise ValueError("The return type must be either list or string.")
 
@@ -10170,6 +11684,7 @@ def get_local_tile_layer(
         ipyleaflet.TileLayer | folium.TileLayer: An ipyleaflet.TileLayer or folium.TileLayer.
     """
 
+    import ipywidgets as widgets
     import warnings
 
     warnings.filterwarnings("ignore")
@@ -10767,14 +12282,14 @@ def geojson_to_df(in_geojson, encoding="utf-8", drop_geometry=True):
     """
 
     import pandas as pd
-    from urllib.request import urlopen
 
     if isinstance(in_geojson, str):
 
         if in_geojson.startswith("http"):
             in_geojson = github_raw_url(in_geojson)
-            with urlopen(in_geojson) as f:
-                data = json.load(f)
+            r = get_http_session().get(in_geojson)
+            r.raise_for_status()
+            data = json.loads(r.content)
         else:
             in_geojson = os.path.abspath(in_geojson)
             if not os.path.exists(in_geojson):
@@ -11205,6 +12720,7 @@ def download_file(
     resume=False,
     unzip=True,
     overwrite=False,
+    segments=1,
 ):
     """Download a file from URL, including Google Drive shared URL.
 
@@ -11221,13 +12737,12 @@ def download_file(
         resume (bool, optional): Resume the download from existing tmp file if possible. Defaults to False.
         unzip (bool, optional): Unzip the file. Defaults to True.
         overwrite (bool, optional): Overwrite the file if it already exists. Defaults to False.
+        segments (int, optional): The maximum number of byte ranges fetched in parallel for URLs other than Google Drive. Defaults to 1.
 
     Returns:
         str: The output file path.
     """
 
-    import gdown
-
     if output is None:
         if isinstance(url, str) and url.startswith("http"):
             output = os.path.basename(url)
@@ -11244,9 +12759,26 @@ def download_file(
     if "https://drive.google.com/file/d/" in url:
         fuzzy = True
 
-    output = gdown.download(
-        url, output, quiet, proxy, speed, use_cookies, verify, id, fuzzy, resume
-    )
+    google_drive = any(host in url for host in ["drive.google.com", "docs.google.com"])
+    if id is None and not google_drive and speed is None:
+        # Dropped connections are resumed with range requests. See DownloadManager.
+        # Like gdown, a directory output, e.g., "data/", receives the file named after the URL.
+        if os.path.isdir(output) or (
+            isinstance(output, str) and output.endswith(("/", "\\"))
+        ):
+            os.makedirs(output, exist_ok=True)
+            output = os.path.join(output, os.path.basename(url))
+        if not quiet:
+            print(f"Downloading {url} to {output} ...")
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+        manager = DownloadManager(segments, proxies=proxies, verify=verify)
+        output = manager.download(url, output, resume=resume)["filename"]
+    else:
+        import gdown
+
+        output = gdown.download(
+            url, output, quiet, proxy, speed, use_cookies, verify, id, fuzzy, resume
+        )
 
     if unzip and output.endswith(".zip"):
 
@@ -12489,6 +14021,8 @@ def display_html(src, width=950, height=600):
         width (int, optional): Width of the map. Defaults to 950.
         height (int, optional): Height of the map. Defaults to 600.
     """
+    from IPython.display import display, IFrame
+
     if not os.path.isfile(src):
         raise ValueError(f"{src} is not a valid file path.")
     display(IFrame(src=src, width=width, height=height))
@@ -12589,59 +14123,266 @@ def github_raw_url(url):
     return url
 
 
-def change_require(lib_path):
+class RequireResolver:
+    """Resolves the require() graph of an Earth Engine JavaScript library into a local module store.
 
-    if not isinstance(lib_path, str):
-        raise ValueError("lib_path must be a string.")
+    Starting from a library, every module it requires is fetched, then every module those require, and so
+    on, with the modules of each level fetched concurrently. Modules in Earth Engine repositories (e.g.,
+    'users/gena/packages:grid') are read from a clone of their repository, and each repository is cloned
+    only once, also across runs. Modules referenced by HTTP URL are downloaded once. Every module is then
+    saved in the store under the hash of its content and of the modules it requires, with its require()
+    paths rewritten in one pass to the stored files of its dependencies.
+    """
 
-    if lib_path.startswith("http"):
-        if lib_path.startswith("https://github.com") and "blob" in lib_path:
-            lib_path = lib_path.replace("blob", "raw")
-        basename = os.path.basename(lib_path)
-        r = requests.get(lib_path, allow_redirects=True)
-        open(basename, "wb").write(r.content)
-        lib_path = basename
-
-    elif (
-        lib_path.startswith("user") or lib_path.startswith("projects")
-    ) and ":" in lib_path:
-        repo = f'https://earthengine.googlesource.com/{lib_path.split(":")[0]}'
-        start_index = lib_path.index("/", lib_path.index("/") + 1) + 1
-        lib_path = lib_path[start_index:].replace(":", "/")
-        if not os.path.exists(lib_path):
-            cmd = f"git clone {repo}"
-            os.system(cmd)
-
-    if not os.path.exists(lib_path):
-        raise ValueError(f"{lib_path} does not exist.")
-
-    output = []
-    with open(lib_path, "r") as f:
-        lines = f.readlines()
+    def __init__(
+        self,
+        store_dir=None,
+        workers=8,
+        git_url="https://earthengine.googlesource.com",
+        update=False,
+    ):
+        """Initialize the RequireResolver object.
 
-    for line in lines:
-        if "require(" in line and ":" in line and (not line.strip().startswith("//")):
-            new_line = "// " + line
-            output.append(new_line)
+        Args:
+            store_dir (str, optional): The folder of the module store. Defaults to None, i.e., ~/.ee_modules.
+            workers (int, optional): The number of repositories and URLs fetched at the same time. Defaults to 8.
+            git_url (str, optional): The URL that repository paths like users/name/repo are relative to. Defaults to "https://earthengine.googlesource.com".
+            update (bool, optional): Whether to pull repositories that were cloned in an earlier run. Defaults to False.
+        """
+        import threading
+
+        if store_dir is None:
+            store_dir = os.path.join(os.path.expanduser("~"), ".ee_modules")
+        self.store_dir = os.path.abspath(store_dir)
+        self.workers = workers
+        self.git_url = git_url.rstrip("/")
+        self.update = update
+        # Module id -> {"source_file", "file", "hash", "requires"}
+        self.modules = {}
+        self.stats = {"modules": 0, "cloned": 0, "reused": 0, "downloaded": 0, "seconds": 0.0}
+        self._repos = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def find_requires(source):
+        """Finds the module ids passed to require() in a JavaScript, outside // comment lines.
 
-            if "users/" in line:
-                start_index = line.index("users/")
-                end_index = line.index("/", start_index + 6)
-            elif "projects" in line:
-                start_index = line.index("projects/")
-                end_index = line.index("/", start_index + 9)
+        Args:
+            source (str): The JavaScript source.
 
-            header = line[start_index:end_index]
-            new_line = line.replace(header, os.getcwd()).replace(":", "/")
-            output.append(new_line)
+        Returns:
+            list: The module ids, e.g., ['users/gena/packages:grid'], in order of appearance.
+        """
+        import re
 
-        else:
-            output.append(line)
+        requires = []
+        for line in source.splitlines():
+            if line.strip().startswith("//"):
+                continue
+            for match in re.finditer(r"""\brequire\(\s*(['"])([^'"]+)\1\s*\)""", line):
+                if match.group(2) not in requires:
+                    requires.append(match.group(2))
+        return requires
+
+    def _repo_dir(self, repo):
+        parts = repo.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid repository path {repo}.")
+        return os.path.join(self.store_dir, "repos", *parts)
 
-    with open(lib_path, "w") as f:
-        f.writelines(output)
+    def _clone(self, repo):
+        """Clones a repository into the store unless it is already there.
+
+        Args:
+            repo (str): The repository path, e.g., users/gena/packages.
+        """
+        import subprocess
+
+        repo_dir = self._repo_dir(repo)
+        if os.path.isdir(os.path.join(repo_dir, ".git")):
+            if self.update:
+                subprocess.run(
+                    ["git", "-C", repo_dir, "pull", "--ff-only", "--quiet"],
+                    check=True,
+                    capture_output=True,
+                )
+            with self._lock:
+                self.stats["reused"] += 1
+            return
 
-    return lib_path
+        os.makedirs(os.path.dirname(repo_dir), exist_ok=True)
+        result = subprocess.run(
+            ["git", "clone", "--depth", "1", "--quiet", f"{self.git_url}/{repo}", repo_dir],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Could not clone {repo}: {result.stderr.strip()}")
+        with self._lock:
+            self.stats["cloned"] += 1
+
+    def _download(self, url):
+        """Downloads a module referenced by URL into the store.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            str: The file path of the download.
+        """
+        import hashlib
+
+        url = github_raw_url(url)
+        out_file = os.path.join(
+            self.store_dir, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".js"
+        )
+        if os.path.exists(out_file) and not self.update:
+            return out_file
+
+        r = get_http_session().get(url, allow_redirects=True, timeout=60)
+        r.raise_for_status()
+        os.makedirs(os.path.dirname(out_file), exist_ok=True)
+        with open(out_file, "wb") as f:
+            f.write(r.content)
+        with self._lock:
+            self.stats["downloaded"] += 1
+        return out_file
+
+    def _source_file(self, module):
+        """Finds the local file of a module id, after its repository was cloned or its URL downloaded.
+
+        Args:
+            module (str): The module id, i.e., a repository path and a file path separated by ':', a URL or a local file path.
+
+        Returns:
+            str: The file path.
+        """
+        if module.startswith("http"):
+            return self._download(module)
+        if ":" not in module:
+            if os.path.isfile(module):
+                return os.path.abspath(module)
+            raise ValueError(f"{module} does not exist.")
+
+        repo, path = module.split(":", 1)
+        source_file = os.path.join(self._repo_dir(repo), *path.split("/"))
+        for candidate in (source_file, source_file + ".js"):
+            if os.path.isfile(candidate):
+                return candidate
+        raise ValueError(f"{module} does not exist.")
+
+    def resolve(self, lib_path):
+        """Fetches the require() graph of a library and saves every module with rewritten paths in the store.
+
+        Args:
+            lib_path (str): A local file path or HTTP URL to a JavaScript library. It can also be in a format like 'users/gena/packages:grid'.
+
+        Returns:
+            str: The file path of the library in the store, whose require() calls point to the stored files.
+        """
+        import concurrent.futures
+        import hashlib
+        import re
+        import time
+        from pathlib import Path
+
+        if not isinstance(lib_path, str):
+            raise ValueError("lib_path must be a string.")
+
+        start = time.perf_counter()
+        get_http_session(pool_size=self.workers)
+        level = [lib_path]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while level:
+                # Clone the repositories that this level of modules needs, each one once.
+                repos = set(
+                    module.split(":", 1)[0]
+                    for module in level
+                    if ":" in module and not module.startswith("http")
+                )
+                repos = [repo for repo in repos if repo not in self._repos]
+                for repo in repos:
+                    self._repos[repo] = executor.submit(self._clone, repo)
+                for repo in repos:
+                    self._repos[repo].result()
+
+                source_files = list(executor.map(self._source_file, level))
+                next_level = []
+                for module, source_file in zip(level, source_files):
+                    with open(source_file, "rb") as f:
+                        content = f.read()
+                    requires = self.find_requires(content.decode("utf-8"))
+                    self.modules[module] = {
+                        "source_file": source_file,
+                        "hash": hashlib.sha256(content).hexdigest(),
+                        "requires": requires,
+                    }
+                    for required in requires:
+                        if required not in self.modules and required not in next_level:
+                            next_level.append(required)
+                level = [module for module in next_level if module not in self.modules]
+
+        # The rewritten source of a module depends on its content and on the files of the modules it
+        # requires, directly or transitively, so its file is named by the hash of all their contents.
+        # The file names are known for every module before any file is written, so the paths are
+        # rewritten in one pass, also for modules that require each other.
+        objects_dir = os.path.join(self.store_dir, "objects")
+        os.makedirs(objects_dir, exist_ok=True)
+        for module in self.modules.values():
+            required = set()
+            stack = list(module["requires"])
+            while stack:
+                module_id = stack.pop()
+                if module_id not in required:
+                    required.add(module_id)
+                    stack.extend(self.modules[module_id]["requires"])
+            digest = hashlib.sha256(module["hash"].encode("utf-8"))
+            for module_id in sorted(required):
+                digest.update(f"\n{module_id}\n{self.modules[module_id]['hash']}".encode("utf-8"))
+            module["file"] = os.path.join(objects_dir, digest.hexdigest() + ".js")
+        paths = {
+            module_id: Path(module["file"]).as_posix()
+            for module_id, module in self.modules.items()
+        }
+        pattern = re.compile(r"""(\brequire\(\s*)(['"])([^'"]+)\2""")
+        for module in self.modules.values():
+            if os.path.exists(module["file"]):
+                continue
+            with open(module["source_file"], encoding="utf-8") as f:
+                source = f.read()
+            if module["requires"]:
+                source = pattern.sub(
+                    lambda m: m.group(1) + m.group(2) + paths.get(m.group(3), m.group(3)) + m.group(2),
+                    source,
+                )
+            tmp_file = f"{module['file']}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(source)
+            os.replace(tmp_file, module["file"])
+
+        self.stats["modules"] = len(self.modules)
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.modules[lib_path]["file"]
+
+
+def change_require(lib_path, store_dir=None, workers=8):
+    """Fetches an Earth Engine JavaScript library and the modules it requires, directly or transitively,
+        and rewrites their require() paths to local files. See RequireResolver.
+
+    Args:
+        lib_path (str): A local file path or HTTP URL to a JavaScript library. It can also be in a format like 'users/gena/packages:grid'.
+        store_dir (str, optional): The folder of the module store. Defaults to None, i.e., the folder of lib_path if it is a local file, otherwise the current working directory.
+        workers (int, optional): The number of repositories and URLs fetched at the same time. Defaults to 8.
+
+    Returns:
+        str: The local file path of the library.
+    """
+    if store_dir is None:
+        if isinstance(lib_path, str) and os.path.isfile(lib_path):
+            store_dir = os.path.dirname(os.path.abspath(lib_path))
+        else:
+            store_dir = os.getcwd()
+    return RequireResolver(store_dir, workers).resolve(lib_path)
 
 
 def ee_vector_style(
@@ -12771,7 +14512,7 @@ def get_direct_url(url):
     if not url.startswith("http"):
         raise ValueError("url must start with http.")
 
-    r = requests.head(url, allow_redirects=True)
+    r = get_http_session().head(url, allow_redirects=True)
     return r.url
 
 
@@ -8,6 +8,14 @@ To convert a GEE Python script to Jupyter notebook:
 
 To convert all GEE Python scripts in a folder recursively to Jupyter notebooks:     py_to_ipynb_dir(in_dir, template_file, out_dir)
 
+To rewrite slow Earth Engine patterns of a GEE Python script into faster ones:      optimize_python(source)
+
+To rewrite extra JavaScript text on every line when converting to Python:           register_rewrite_rule(old, new)
+
+To record the time spent in each conversion stage and rewrite rule:                 with ConversionProfiler() as profiler: ...
+
+To download the JavaScript modules of many GEE Apps concurrently:                   download_gee_apps(urls, out_dir)
+
 To execute a Jupyter notebook and save output cells:                                execute_notebook(in_file)
 
 To execute all Jupyter notebooks in a folder recursively:                           execute_notebook_dir(in_dir)           
@@ -15,16 +23,26 @@ To execute all Jupyter notebooks in a folder recursively:
 """
 
 
+import contextlib
+import functools
+import hashlib
+import io
+import json
 import os
+import re
 import shutil
-import urllib.request
+import threading
+import time
 from collections import deque
 from pathlib import Path
 
-import pkg_resources
+# Only lightweight standard library modules are imported at module level, so importing this module
+# stays fast for command line use. Heavier modules are imported in the functions that need them.
 
 #from .common import *
 
+__version__ = "0.2.0"
+
 
 def find_matching_bracket(lines, start_line_index, start_char_index, matching_char="{"):
     """Finds the position of the matching closing bracket from a list of lines.
@@ -81,6 +99,186 @@ def find_matching_bracket(lines, start_line_index, start_char_index, matching_ch
     return matching_line_index, matching_char_index
 
 
+_BRACKET_PAIRS = {"{": "}", "(": ")", "[": "]"}
+_BRACKET_PATTERNS = {}
+
+
+def tokenize_brackets(lines, open_char="{"):
+    """Scans a list of lines once and yields the position of every opening and closing bracket.
+
+    Args:
+        lines (list): The input list of lines.
+        open_char (str, optional): One or more opening brackets to tokenize, e.g., '{(['. Defaults to '{'.
+
+    Yields:
+        tuple: (line_index, char_index, char) for every bracket found.
+    """
+    pattern = _BRACKET_PATTERNS.get(open_char)
+    if pattern is None:
+        chars = "".join(char + _BRACKET_PAIRS[char] for char in open_char)
+        pattern = re.compile("[" + re.escape(chars) + "]")
+        _BRACKET_PATTERNS[open_char] = pattern
+
+    for line_index, line in enumerate(lines):
+        for match in pattern.finditer(line):
+            yield line_index, match.start(), match.group()
+
+
+class BracketIndex:
+    """An index of matching bracket pairs computed with a single stack pass over a list of lines.
+
+    Brackets are matched the same way as find_matching_bracket(), i.e., each bracket type is matched
+    on its own and every bracket character counts, including those inside strings and comments.
+    The index keeps a reference to the list of lines. Edit the lines through strip() and set_line()
+    so that the index stays correct while the lines are rewritten in place.
+    """
+
+    def __init__(self, lines, open_char="{(["):
+        """Initialize the BracketIndex object.
+
+        Args:
+            lines (list): The input list of lines.
+            open_char (str, optional): The opening brackets to index. Defaults to '{(['.
+        """
+        for char in open_char:
+            if char not in _BRACKET_PAIRS:
+                raise ValueError(
+                    "The matching character must be one of the following: {}".format(
+                        ", ".join(_BRACKET_PAIRS.keys())
+                    )
+                )
+        self.lines = lines
+        self.open_char = open_char
+        # Each bracket is a node [line_index, char_index, char, partner_node].
+        self._rows = {}
+
+        stacks = {char: [] for char in open_char}
+        closing = {_BRACKET_PAIRS[char]: char for char in open_char}
+        for line_index, char_index, char in tokenize_brackets(lines, open_char):
+            node = [line_index, char_index, char, None]
+            self._rows.setdefault(line_index, {})[char_index] = node
+            if char in stacks:
+                stacks[char].append(node)
+            else:
+                stack = stacks[closing[char]]
+                if stack:
+                    partner = stack.pop()
+                    partner[3] = node
+                    node[3] = partner
+
+    def match(self, line_index, char_index):
+        """Finds the position of the bracket matching the one at the given position.
+
+        Args:
+            line_index (int): The line index where the bracket is located.
+            char_index (int): The position index of the bracket.
+
+        Returns:
+            matching_line_index (int): The line index of the matching bracket, -1 if not found.
+            matching_char_index (int): The position index of the matching bracket, -1 if not found.
+        """
+        line_index = self._line_index(line_index)
+        node = self._rows.get(line_index, {}).get(char_index)
+        if node is None or node[3] is None:
+            return -1, -1
+        return node[3][0], node[3][1]
+
+    def strip(self, line_index, char_index):
+        """Removes one character from a line and updates the index.
+
+        Args:
+            line_index (int): The line index of the character to remove.
+            char_index (int): The position index of the character to remove.
+        """
+        line_index = self._line_index(line_index)
+        line = self.lines[line_index]
+        self.lines[line_index] = line[:char_index] + line[char_index + 1 :]
+
+        row = self._rows.get(line_index)
+        if not row:
+            return
+        node = row.pop(char_index, None)
+        if node is not None and node[3] is not None:
+            node[3][3] = None
+        new_row = {}
+        for index, node in row.items():
+            if index > char_index:
+                node[1] = index - 1
+            new_row[node[1]] = node
+        self._rows[line_index] = new_row
+
+    def set_line(self, line_index, line):
+        """Replaces a line and updates the index.
+
+        Brackets that the old and new line have in common at the start and at the end keep their
+        partners. The brackets removed from the line become unmatched, and the brackets added to it
+        are only matched among themselves.
+
+        Args:
+            line_index (int): The line index to replace.
+            line (str): The new line.
+        """
+        line_index = self._line_index(line_index)
+        self.lines[line_index] = line
+
+        old_nodes = list(self._rows.pop(line_index, {}).values())
+        new_nodes = [
+            [line_index, char_index, char, None]
+            for _, char_index, char in tokenize_brackets([line], self.open_char)
+        ]
+
+        head = 0
+        while (
+            head < min(len(old_nodes), len(new_nodes))
+            and old_nodes[head][2] == new_nodes[head][2]
+        ):
+            head += 1
+        tail = 0
+        while (
+            tail < min(len(old_nodes), len(new_nodes)) - head
+            and old_nodes[-1 - tail][2] == new_nodes[-1 - tail][2]
+        ):
+            tail += 1
+
+        kept = list(range(head)) + list(range(len(new_nodes) - tail, len(new_nodes)))
+        for new_index in kept:
+            old_index = new_index
+            if new_index >= head:
+                old_index = len(old_nodes) - len(new_nodes) + new_index
+            node = old_nodes[old_index]
+            node[1] = new_nodes[new_index][1]
+            new_nodes[new_index] = node
+
+        for node in old_nodes[head : len(old_nodes) - tail]:
+            if node[3] is not None:
+                node[3][3] = None
+
+        stacks = {char: [] for char in self.open_char}
+        for node in new_nodes[head : len(new_nodes) - tail]:
+            if node[2] in stacks:
+                stacks[node[2]].append(node)
+            else:
+                stack = stacks[self._opening(node[2])]
+                if stack:
+                    partner = stack.pop()
+                    partner[3] = node
+                    node[3] = partner
+
+        if new_nodes:
+            self._rows[line_index] = {node[1]: node for node in new_nodes}
+
+    def _line_index(self, line_index):
+        if line_index < 0:
+            line_index += len(self.lines)
+        return line_index
+
+    @staticmethod
+    def _opening(char):
+        for key, value in _BRACKET_PAIRS.items():
+            if value == char:
+                return key
+
+
 def format_params(line, sep=":"):
     """Formats keys in a dictionary and adds quotes to the keys.
     For example, {min: 0, max: 10} will result in ('min': 0, 'max': 10)
@@ -230,13 +428,14 @@ def check_map_functions(input_lines):
         list: Output JavaScript with map function
     """
     output_lines = []
+    brackets = BracketIndex(input_lines, "{")
     for index, line in enumerate(input_lines):
 
         if (".map(function" in line) or (".map (function") in line:
 
             bracket_index = line.index("{")
-            matching_line_index, matching_char_index = find_matching_bracket(
-                input_lines, index, bracket_index
+            matching_line_index, matching_char_index = brackets.match(
+                index, bracket_index
             )
 
             func_start_index = line.index("function")
@@ -251,7 +450,7 @@ def check_map_functions(input_lines):
                 input_lines[index + 1 : matching_line_index]
             ):
                 output_lines.append(tmp_line)
-                input_lines[index + 1 + sub_index] = ""
+                brackets.set_line(index + 1 + sub_index, "")
 
             header_line = line[:func_start_index] + func_name
             header_line = header_line.rstrip()
@@ -266,7 +465,7 @@ def check_map_functions(input_lines):
                 header_line = header_line + footer_line
                 footer_line = ""
 
-            input_lines[matching_line_index] = footer_line
+            brackets.set_line(matching_line_index, footer_line)
 
             output_lines.append(header_line)
             output_lines.append(footer_line)
@@ -276,7 +475,897 @@ def check_map_functions(input_lines):
     return output_lines
 
 
-def js_to_python(in_file, out_file=None, use_qgis=True, github_repo=None):
+# String literals on a single line; rewrite rules are not applied inside them.
+_JS_STRING_PATTERN = r"""'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|`[^`\\\n]*(?:\\.[^`\\\n]*)*`"""
+# A quote that may start a string literal.
+_QUOTE_PATTERN = re.compile("['\"`]")
+
+
+def _literal_pattern(literals):
+    """Creates a regular expression that matches any of the literals, only at token boundaries.
+
+    The literals are merged into a prefix tree, so the regex engine compares each character once
+    however many literals share a prefix, and the longest literal wins. The left boundary is checked
+    after the first character, so every alternative starts with a literal character and the regex
+    engine can skip ahead to candidates.
+
+    Args:
+        literals (list): List of literal strings.
+
+    Returns:
+        str: The regular expression.
+    """
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = literal
+
+    def subpattern(node):
+        alternatives = [
+            re.escape(char) + subpattern(node[char]) for char in sorted(node) if char
+        ]
+        if "" in node:
+            # Ending here has the lowest priority, so longer literals are tried first.
+            alternatives.append(r"(?![\w$])" if re.search(r"[\w$]$", node[""]) else "")
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    alternatives = []
+    for char in sorted(trie):
+        boundary = r"(?<![\w$].)" if re.match(r"[\w$]", char) else ""
+        alternatives.append(re.escape(char) + boundary + subpattern(trie[char]))
+    return "|".join(alternatives)
+
+
+class RewriteRules:
+    """A table of rewrite rules applied to a line of JavaScript in a single scan.
+
+    All rules are compiled into one regular expression, so adding a rule does not add a pass over the line.
+    Literal rules only match at token boundaries, e.g., "true" is rewritten in "x = true" but not in "untrue",
+    and string literals are left unchanged. The text after a "//" comment is rewritten without string literals,
+    so commented out code is converted as well. Where several rules match at the same position, regular
+    expression rules win in the order they were added, then the longest literal.
+    """
+
+    def __init__(self, rules=None, comment="//"):
+        """Initialize the RewriteRules object.
+
+        Args:
+            rules (list, optional): List of (old, new) or (old, new, count) tuples. See add(). Defaults to None.
+            comment (str, optional): The line comment marker. Defaults to "//".
+        """
+        self.rules = []
+        self.comment = comment
+        self._lock = threading.Lock()
+        for rule in rules or []:
+            self._register(*rule)
+        self._compile()
+
+    def add(self, old, new, count=None, regex=False):
+        """Registers a rewrite rule. A literal rule replaces an earlier literal rule for the same text.
+
+        Args:
+            old (str): The text to rewrite, or a regular expression if regex is True.
+            new (str | callable): The replacement text, or a function that takes the matched text and returns the replacement.
+            count (int, optional): The maximum number of times the rule is applied to a line. Defaults to None, i.e., no limit.
+            regex (bool, optional): Whether old is a regular expression. Regular expressions are used as is, without token boundaries. Defaults to False.
+        """
+        # The table is compiled right away, as apply() may be called from other threads at the same time.
+        with self._lock:
+            self._register(old, new, count, regex)
+            self._compile()
+
+    def _register(self, old, new, count=None, regex=False):
+        rules = self.rules
+        if not regex:
+            rules = [rule for rule in rules if rule["regex"] or rule["old"] != old]
+        self.rules = rules + [{"old": old, "new": new, "count": count, "regex": regex}]
+
+    def _compile(self):
+        # No capturing groups at the top level: they would stop the regex engine from
+        # skipping to the first characters of the alternatives. Matches are told apart by their text.
+        regex_rules = [rule for rule in self.rules if rule["regex"]]
+        literals = [rule for rule in self.rules if not rule["regex"]]
+        rules = [f"(?:{rule['old']})" for rule in regex_rules]
+        if literals:
+            rules.append(_literal_pattern([rule["old"] for rule in literals]))
+        rules = "|".join(rules) or "(?!)"
+
+        code = [_JS_STRING_PATTERN, rules]
+        if self.comment:
+            code.insert(0, re.escape(self.comment) + ".*")
+        self._regex_rules = [(re.compile(rule["old"]), rule) for rule in regex_rules]
+        self._literals = {rule["old"]: rule for rule in literals}
+        self._replacements = {
+            rule["old"]: rule["new"]
+            for rule in literals
+            if rule["count"] is None and not callable(rule["new"])
+        }
+        self._counted_literals = [
+            (rule["old"], rule["count"])
+            for rule in literals
+            if rule["count"] is not None
+        ]
+        self._counted_regex = any(rule["count"] is not None for rule in regex_rules)
+        self._comment_pattern = re.compile(rules)
+
+        # A table of literal rules with plain replacements is applied by splitting the line at the matches
+        # and string literals, and looking up the replacements, without calling back into Python per match.
+        # The comment must be a rule of its own, so that it is found by the split, and must not start with a
+        # word character, as the left boundary is not checked at the start of a comment.
+        self._table = None
+        plain = not regex_rules and not any(
+            callable(rule["new"])
+            or re.search("['\"`\n]", rule["old"])
+            or (rule["count"] is not None and rule["count"] < 1)
+            or (self.comment and self.comment in rule["old"] and self.comment != rule["old"])
+            for rule in literals
+        )
+        comment = self.comment
+        if (
+            literals
+            and plain
+            and (not comment or comment in self._literals)
+            and not re.match(r"[\w$]", comment or "#")
+        ):
+            pattern = _literal_pattern([rule["old"] for rule in literals])
+            self._table = {rule["old"]: rule["new"] for rule in literals}
+            self._split = re.compile(f"({_JS_STRING_PATTERN}|{pattern})").split
+        self._replace = self._replacer(None)
+        self._pattern = re.compile("|".join(code))
+
+    def _rule(self, text):
+        for pattern, rule in self._regex_rules:
+            if pattern.fullmatch(text):
+                return rule
+        return self._literals[text]
+
+    def _replacer(self, counts):
+        """Creates the replacement function of a scan.
+
+        Args:
+            counts (dict): The number of times each rule with a count was applied to the line, or None if the counts cannot be reached.
+
+        Returns:
+            callable: The function passed to re.sub().
+        """
+        comment = self.comment
+        # A regular expression rule may match the same text as a literal rule and takes precedence.
+        replacements = {} if self._regex_rules else self._replacements
+
+        def replace(match):
+            text = match.group()
+            new = replacements.get(text)
+            if new is not None:
+                return new
+            if text[0] in "'\"`":
+                return text
+            if comment and text.startswith(comment) and match.re is self._pattern:
+                return self._comment_pattern.sub(replace, text)
+
+            rule = self._rule(text)
+            if counts is not None and rule["count"] is not None:
+                applied = counts.get(rule["old"], 0)
+                if applied >= rule["count"]:
+                    return text
+                counts[rule["old"]] = applied + 1
+            new = rule["new"]
+            return new(text) if callable(new) else new
+
+        return replace
+
+    def apply(self, line):
+        """Applies the rewrite rules to a line.
+
+        Args:
+            line (str): A line of JavaScript.
+
+        Returns:
+            str: The rewritten line.
+        """
+        table = self._table
+        if table is not None:
+            parts = self._split(line)
+            if len(parts) == 1:
+                return line
+            # The text after a comment is rewritten inside string literals as well, so a comment followed by
+            # quotes needs a full scan, as does a rule with a count that matches the line too often.
+            if len(parts) == 3:
+                found = parts[1]
+                if found != self.comment or not _QUOTE_PATTERN.search(line):
+                    return parts[0] + table.get(found, found) + parts[2]
+            else:
+                found = parts[1::2]
+                for old, count in self._counted_literals:
+                    if found.count(old) > count:
+                        break
+                else:
+                    if not (self.comment in found and _QUOTE_PATTERN.search(line)):
+                        # String literals are not in the table and stay unchanged.
+                        parts[1::2] = map(table.get, found, found)
+                        return "".join(parts)
+
+        # Counting is only needed if a rule with a count may match the line more often than allowed.
+        if self._counted_regex or any(
+            line.count(old) > count for old, count in self._counted_literals
+        ):
+            return self._pattern.sub(self._replacer({}), line)
+        return self._pattern.sub(self._replace, line)
+
+    def matches(self, line):
+        """Finds the rule matches in a line, without applying them. Counts are not taken into account.
+
+        Args:
+            line (str): A line of JavaScript.
+
+        Yields:
+            tuple: The rule (dict) and the matched text.
+        """
+        for match in self._pattern.finditer(line):
+            text = match.group()
+            if text[0] in "'\"`":
+                continue
+            if self.comment and text.startswith(self.comment):
+                for comment_match in self._comment_pattern.finditer(text):
+                    yield self._rule(comment_match.group()), comment_match.group()
+            else:
+                yield self._rule(text), text
+
+
+# The rewrite rules applied to every line by js_to_python().
+JS_REWRITE_RULES = RewriteRules(
+    [
+        ("//", "#"),
+        ("var ", "", 1),
+        ("/*", "#"),
+        ("*/", "#"),
+        ("true", "True"),
+        ("false", "False"),
+        ("null", "None"),
+        (".or", ".Or"),
+        (".and", ".And"),
+        (".not", ".Not"),
+        ("visualize({", "visualize(**{"),
+        ("Math.PI", "math.pi"),
+        ("Math.", "math."),
+        ("= new", "="),
+    ]
+)
+
+
+def register_rewrite_rule(old, new, count=None, regex=False):
+    """Registers an extra rewrite rule applied to every line by js_to_python().
+
+    Args:
+        old (str): The text to rewrite, or a regular expression if regex is True.
+        new (str | callable): The replacement text, or a function that takes the matched text and returns the replacement.
+        count (int, optional): The maximum number of times the rule is applied to a line. Defaults to None, i.e., no limit.
+        regex (bool, optional): Whether old is a regular expression. Defaults to False.
+    """
+    JS_REWRITE_RULES.add(old, new, count, regex)
+
+
+# The active ConversionProfiler, if any.
+_profiler = None
+
+
+def _text_size(args, result):
+    return len(args[0])
+
+
+def _lines_size(args, result):
+    return sum(len(line) for line in args[0])
+
+
+def _file_size(args, result):
+    try:
+        return os.path.getsize(args[0])
+    except (OSError, TypeError):
+        return 0
+
+
+def _bracket_span_size(args, result):
+    # The lines scanned by find_matching_bracket(), up to the match or to the end.
+    lines, start_line_index = args[0], args[1]
+    end = result[0] if result[0] >= 0 else len(lines) - 1
+    return sum(len(line) for line in lines[start_line_index : end + 1])
+
+
+# Module functions that are replaced by profiled versions while a ConversionProfiler is active,
+# with the function that computes the number of bytes processed by a call from its arguments and result.
+# The optimization passes in OPTIMIZATION_PASSES and JS_REWRITE_RULES.apply() are profiled as well.
+_PROFILED_STAGES = {
+    "_convert_js_segment": _lines_size,
+    "check_map_functions": _lines_size,
+    "BracketIndex": _lines_size,
+    "find_matching_bracket": _bracket_span_size,
+    "convert_for_loop": _text_size,
+    "format_params": _text_size,
+    "optimize_python": _text_size,
+    "py_to_notebook": _text_size,
+}
+_unprofiled = {}
+
+
+def _profiled(name, func, size, file_stage=False):
+    """Wraps a function so that its calls are recorded by the active ConversionProfiler.
+
+    Args:
+        name (str): The stage name.
+        func (callable): The function.
+        size (callable): Function that takes the arguments and the result of a call and returns the number of bytes processed.
+        file_stage (bool, optional): Whether the first argument, or in_file, is the file path of an input file whose stages are recorded separately. Defaults to False.
+
+    Returns:
+        callable: The wrapped function.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _profiler
+        if profiler is None:
+            return func(*args, **kwargs)
+
+        file = None
+        if file_stage:
+            file = str(args[0] if args else kwargs["in_file"])
+        profiler._enter(name, file)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler._exit()
+        profiler._measure(name, size, (file,) if file_stage else args, result)
+        return result
+
+    return wrapper
+
+
+def _profiled_file_stage(func):
+    # Conversions of a whole file are checked on every call, so they are recorded however they are imported.
+    return _profiled(func.__name__, func, _file_size, file_stage=True)
+
+
+def _profiled_rewrite_rules(rules):
+    apply = rules.apply
+
+    def wrapper(line):
+        profiler = _profiler
+        if profiler is None:
+            return apply(line)
+
+        profiler._enter("rewrite_rules")
+        try:
+            result = apply(line)
+        finally:
+            profiler._exit()
+        profiler._measure("rewrite_rules", _text_size, (line,), result, rules)
+        return result
+
+    return wrapper
+
+
+def _set_profiling(enabled):
+    """Replaces the profiled stages by wrapped versions, or restores them.
+
+    Args:
+        enabled (bool): Whether to profile the stages.
+    """
+    module = globals()
+    if enabled and not _unprofiled:
+        for name, size in _PROFILED_STAGES.items():
+            _unprofiled[name] = module[name]
+            module[name] = _profiled(name, module[name], size)
+        for name, func in OPTIMIZATION_PASSES.items():
+            _unprofiled["pass:" + name] = func
+            OPTIMIZATION_PASSES[name] = _profiled(func.__name__, func, _text_size)
+        JS_REWRITE_RULES.apply = _profiled_rewrite_rules(JS_REWRITE_RULES)
+    elif not enabled and _unprofiled:
+        for name, func in _unprofiled.items():
+            if name.startswith("pass:"):
+                OPTIMIZATION_PASSES[name[len("pass:") :]] = func
+            else:
+                module[name] = func
+        _unprofiled.clear()
+        del JS_REWRITE_RULES.apply
+
+
+class ConversionProfiler:
+    """Records the wall time, number of calls and bytes processed per conversion stage and per rewrite rule.
+
+    While a profiler is active, between start() and stop() or in a with block, the stages of the conversion
+    (js_to_python(), check_map_functions(), BracketIndex, find_matching_bracket(), convert_for_loop(),
+    format_params(), the rewrite rules, the optimization passes and the notebook conversion) are replaced by
+    versions that record their calls. When no profiler is active, the original functions are called directly.
+    The rewrite rules are applied in a single scan per line, so their time is recorded for the scan as a whole
+    and only the number of matches and matched bytes per rule. Stages are also recorded per input file, to
+    find the files that are slow to convert. Profile one thread at a time.
+
+        with ConversionProfiler() as profiler:
+            js_to_python_dir(in_dir, out_dir)
+        profiler.save_json("profile.json")
+        profiler.save_stacks("profile.folded")  # flamegraph.pl profile.folded > profile.svg
+    """
+
+    def __init__(self):
+        """Initialize the ConversionProfiler object."""
+        # Stage name -> {"calls": int, "seconds": float, "bytes": int}; seconds include nested stages.
+        self.stages = {}
+        # Rule text -> {"calls": int, "bytes": int}
+        self.rules = {}
+        # Input file path -> {"seconds": float, "bytes": int, "stages": {stage name: seconds}}
+        self.files = {}
+        # Semicolon separated stage names -> seconds spent in the last stage itself.
+        self.stacks = {}
+        # Each open stage is a frame [name, start time, seconds of nested stages].
+        self._stack = []
+        self._file = None
+        self._closed_file = None
+        self._previous = None
+        self._active = False
+
+    def start(self):
+        """Starts recording the conversion stages. Profilers can be nested.
+
+        Returns:
+            ConversionProfiler: The profiler itself.
+        """
+        global _profiler
+        if self._active:
+            raise ValueError("The profiler is already started.")
+        self._previous = _profiler
+        self._active = True
+        _profiler = self
+        _set_profiling(True)
+        return self
+
+    def stop(self):
+        """Stops recording the conversion stages."""
+        global _profiler
+        if not self._active:
+            return
+        _profiler = self._previous
+        self._previous = None
+        self._active = False
+        if _profiler is None:
+            _set_profiling(False)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _enter(self, name, file=None):
+        self._stack.append([name, time.perf_counter(), 0.0, self._file])
+        if file is not None:
+            self._file = file
+
+    def _exit(self):
+        name, start, nested, previous_file = self._stack.pop()
+        seconds = time.perf_counter() - start
+
+        stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+        stage["calls"] += 1
+        stage["seconds"] += seconds
+        path = ";".join([frame[0] for frame in self._stack] + [name])
+        self.stacks[path] = self.stacks.get(path, 0.0) + seconds - nested
+        if self._stack:
+            self._stack[-1][2] += seconds
+
+        if self._file is not None:
+            entry = self.files.setdefault(
+                self._file, {"seconds": 0.0, "bytes": 0, "stages": {}}
+            )
+            entry["stages"][name] = entry["stages"].get(name, 0.0) + seconds
+            if self._file != previous_file:
+                entry["seconds"] += seconds
+        self._closed_file = self._file if self._file != previous_file else None
+        self._file = previous_file
+
+    def _measure(self, name, size, args, result, rules=None):
+        # Counting bytes and rule matches is not part of the recorded time of any open stage.
+        start = time.perf_counter()
+        nbytes = size(args, result)
+        self.stages[name]["bytes"] += nbytes
+        if self._closed_file is not None:
+            self.files[self._closed_file]["bytes"] += nbytes
+        if rules is not None:
+            for rule, text in rules.matches(args[0]):
+                entry = self.rules.setdefault(rule["old"], {"calls": 0, "bytes": 0})
+                entry["calls"] += 1
+                entry["bytes"] += len(text)
+        overhead = time.perf_counter() - start
+        for frame in self._stack:
+            frame[1] += overhead
+
+    def slowest_files(self, count=10, stage=None):
+        """Lists the input files that took the longest to convert.
+
+        Args:
+            count (int, optional): The number of files. Defaults to 10.
+            stage (str, optional): Rank the files by the time of this stage instead of the total time. Defaults to None.
+
+        Returns:
+            list: List of (file path, seconds) tuples, slowest first.
+        """
+        times = [
+            (
+                path,
+                entry["seconds"] if stage is None else entry["stages"].get(stage, 0.0),
+            )
+            for path, entry in self.files.items()
+        ]
+        times.sort(key=lambda item: item[1], reverse=True)
+        return times[:count]
+
+    def to_dict(self):
+        """Returns the recorded statistics.
+
+        Returns:
+            dict: The keys stages, rules, files and stacks. See the attributes of the same name.
+        """
+        return {
+            "stages": self.stages,
+            "rules": self.rules,
+            "files": self.files,
+            "stacks": self.stacks,
+        }
+
+    def merge(self, data):
+        """Adds the statistics of another profiler, e.g., one that ran in a worker process.
+
+        Args:
+            data (dict): The statistics returned by to_dict().
+        """
+        for name, stats in data["stages"].items():
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+            for key in stage:
+                stage[key] += stats[key]
+        for old, stats in data["rules"].items():
+            rule = self.rules.setdefault(old, {"calls": 0, "bytes": 0})
+            for key in rule:
+                rule[key] += stats[key]
+        for path, stats in data["files"].items():
+            entry = self.files.setdefault(path, {"seconds": 0.0, "bytes": 0, "stages": {}})
+            entry["seconds"] += stats["seconds"]
+            entry["bytes"] += stats["bytes"]
+            for name, seconds in stats["stages"].items():
+                entry["stages"][name] = entry["stages"].get(name, 0.0) + seconds
+        for path, seconds in data["stacks"].items():
+            self.stacks[path] = self.stacks.get(path, 0.0) + seconds
+
+    def save_json(self, out_file):
+        """Saves the recorded statistics as JSON.
+
+        Args:
+            out_file (str): File path of the output JSON file.
+        """
+        with open(out_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1, sort_keys=True)
+
+    def save_stacks(self, out_file):
+        """Saves the time per stage stack in the folded format read by flamegraph.pl and speedscope.
+
+        Each line is a semicolon separated stack of stage names and the time spent in the last stage
+        itself, in microseconds.
+
+        Args:
+            out_file (str): File path of the output text file.
+        """
+        with open(out_file, "w", encoding="utf-8") as f:
+            for path, seconds in sorted(self.stacks.items()):
+                f.write(f"{path} {max(0, round(seconds * 1e6))}\n")
+
+
+def _rstrip_chunks(chunks):
+    """Strips trailing whitespace from a list of output chunks as if they were joined into one string.
+
+    Args:
+        chunks (list): List of strings to be joined into the output script.
+    """
+    while chunks:
+        chunks[-1] = chunks[-1].rstrip()
+        if chunks[-1]:
+            return
+        chunks.pop()
+
+
+class ConversionError(ValueError):
+    """Raised when an Earth Engine JavaScript cannot be converted to Python."""
+
+
+def _js_segments(lines, min_lines=100):
+    """Groups lines into segments that can be converted independently of each other.
+
+    A segment only ends where all its curly brackets are closed and the next line does not continue
+    a method chain, so every bracket is matched within its own segment.
+
+    Args:
+        lines (iterable): The input lines.
+        min_lines (int, optional): The minimum number of lines of a segment. Defaults to 100.
+
+    Yields:
+        list: List of lines.
+    """
+    segment = []
+    depth = 0
+    for line in lines:
+        if (
+            depth == 0
+            and len(segment) >= min_lines
+            and not line.lstrip().startswith(".")
+        ):
+            yield segment
+            segment = []
+        segment.append(line)
+        depth = _curly_depth([line], depth)
+
+    if segment:
+        yield segment
+
+
+def _curly_depth(lines, depth=0):
+    """Counts the curly brackets left open after a list of lines. Unmatched closing brackets are ignored.
+
+    Args:
+        lines (list): The input list of lines.
+        depth (int, optional): The number of curly brackets open before the lines. Defaults to 0.
+
+    Returns:
+        int: The number of curly brackets open after the lines.
+    """
+    for _, _, char in tokenize_brackets(lines):
+        if char == "{":
+            depth += 1
+        elif depth:
+            depth -= 1
+
+    return depth
+
+
+def _convert_js_segment(lines, chunks, in_file, line_number=1):
+    """Converts a segment of an Earth Engine JavaScript and appends the output to a list of chunks.
+
+    Args:
+        lines (list): The JavaScript lines of the segment, after check_map_functions().
+        chunks (list): The output chunks. Method chain continuation lines strip trailing whitespace from it.
+        in_file (str): Name of the input used in error messages.
+        line_number (int, optional): Line number of the first line of the segment. Defaults to 1.
+    """
+    # The curly brackets are matched once up front and the index is updated as the
+    # closing brackets are stripped, instead of rescanning the rest of the file each time.
+    brackets = BracketIndex(lines, "{")
+
+    def match_bracket(line_index, char_index):
+        if brackets is None:
+            return find_matching_bracket(lines, line_index, char_index)
+        return brackets.match(line_index, char_index)
+
+    def strip_bracket(line_index, char_index):
+        nonlocal brackets
+        if line_index < 0 or brackets is None:
+            # An unmatched bracket mangles the last line, so the index no longer applies.
+            tmp_line = lines[line_index]
+            lines[line_index] = tmp_line[:char_index] + tmp_line[char_index + 1 :]
+            brackets = None
+        else:
+            brackets.strip(line_index, char_index)
+
+    for index, line in enumerate(lines):
+        if ("/* color" in line) and ("*/" in line):
+            line = (
+                line[: line.index("/*")].lstrip()
+                + line[(line.index("*/") + 2) :]
+            )
+
+        if (
+            ("= function" in line)
+            or ("=function" in line)
+            or line.strip().startswith("function")
+        ):
+            try:
+                bracket_index = line.index("{")
+            except Exception as e:
+                raise ConversionError(
+                    f"An error occurred when processing {in_file}. The closing curly bracket could not be found in Line {line_number + index}: {line}. Please reformat the function definition and make sure that both the opening and closing curly brackets apprear on the same line as the function keyword. "
+                )
+
+            matching_line_index, matching_char_index = match_bracket(
+                index, bracket_index
+            )
+
+            line = line[:bracket_index] + line[bracket_index + 1 :]
+            if matching_line_index == index:
+                line = line[:matching_char_index] + line[matching_char_index + 1 :]
+            else:
+                strip_bracket(matching_line_index, matching_char_index)
+
+            line = (
+                line.replace(" = function", "")
+                .replace("=function", "")
+                .replace("function ", "")
+            )
+            if line.lstrip().startswith("//"):
+                line = line.replace("//", "").lstrip()
+                line = (
+                    " " * (len(line) - len(line.lstrip()))
+                    + "# def "
+                    + line.strip()
+                    + ":"
+                )
+            else:
+                line = (
+                    " " * (len(line) - len(line.lstrip()))
+                    + "def "
+                    + line.strip()
+                    + ":"
+                )
+        elif "{" in line:
+            bracket_index = line.index("{")
+            matching_line_index, matching_char_index = match_bracket(
+                index, bracket_index
+            )
+            if (matching_line_index == index) and (":" in line):
+                pass
+            elif ("for (" in line) or ("for(" in line):
+                line = convert_for_loop(line)
+                if brackets is None:
+                    lines[index] = line
+                else:
+                    brackets.set_line(index, line)
+                bracket_index = line.index("{")
+                (
+                    matching_line_index,
+                    matching_char_index,
+                ) = match_bracket(index, bracket_index)
+                strip_bracket(matching_line_index, matching_char_index)
+                line = line.replace("{", "")
+
+        if line is None:
+            line = ""
+
+        line = JS_REWRITE_RULES.apply(line).rstrip()
+
+        if line.endswith("+"):
+            line = line + " \\"
+        elif line.endswith(";"):
+            line = line[:-1]
+
+        if line.lstrip().startswith("*"):
+            line = line.replace("*", "#")
+
+        if (
+            (":" in line)
+            and (not line.strip().startswith("#"))
+            and (not line.strip().startswith("def"))
+            and (not line.strip().startswith("."))
+        ):
+            line = format_params(line)
+
+        if (
+            index < (len(lines) - 1)
+            and line.lstrip().startswith("#")
+            and lines[index + 1].lstrip().startswith(".")
+        ):
+            line = ""
+
+        if line.lstrip().startswith("."):
+            if "#" in line:
+                line = line[: line.index("#")]
+            _rstrip_chunks(chunks)
+            chunks.append(" " + "\\" + "\n" + line + "\n")
+        else:
+            chunks.append(line + "\n")
+
+
+def _convert_js_lines(lines, header, in_file):
+    """Converts Earth Engine JavaScript lines to Python one segment at a time.
+
+    Args:
+        lines (iterable): The JavaScript lines.
+        header (str): The header of the Python script, i.e., the import statements.
+        in_file (str): Name of the input used in error messages.
+
+    Yields:
+        str: Chunks of the Python script. Joined together they form the script.
+    """
+    chunks = [header + "\n"]
+    line_number = 1
+    mapped_lines = []
+    depth = 0
+    for segment in _js_segments(lines):
+        # Extracting map functions can repeat a line with an opening bracket, so the
+        # extracted lines are only converted once all their brackets are closed too.
+        segment = check_map_functions(segment)
+        mapped_lines.extend(segment)
+        depth = _curly_depth(segment, depth)
+        if depth:
+            continue
+
+        _convert_js_segment(mapped_lines, chunks, in_file, line_number)
+        line_number += len(mapped_lines)
+        mapped_lines = []
+
+        # A continuation line may strip whitespace back to the last non-blank chunk, so keep it.
+        last = len(chunks) - 1
+        while last > 0 and not chunks[last].strip():
+            last -= 1
+        yield from chunks[:last]
+        del chunks[:last]
+
+    if mapped_lines:
+        _convert_js_segment(mapped_lines, chunks, in_file, line_number)
+    yield from chunks
+
+
+def _script_header(use_qgis=True, math_import=False, github_url=""):
+    """Creates the import statements of a converted Python script.
+
+    Args:
+        use_qgis (bool, optional): Whether to import Map from ee_plugin instead of geemap. Defaults to True.
+        math_import (bool, optional): Whether to import the math module. Defaults to False.
+        github_url (str, optional): The GitHub URL comment to put at the top. Defaults to "".
+
+    Returns:
+        str: The header.
+    """
+    if use_qgis:
+        import_str = "from ee_plugin import Map\n"
+    else:
+        import_str = "import geemap\n\nMap = geemap.Map()\n"
+
+    math_import_str = ""
+    if math_import:
+        math_import_str = "import math\n"
+
+    return github_url + "import ee \n" + math_import_str + import_str
+
+
+def js_to_python_stream(source, use_qgis=True, math_import=None):
+    """Converts Earth Engine JavaScript to Python lazily, without writing any files.
+
+    The input is converted in segments of top-level statements, so memory use is bounded by the
+    largest top-level block rather than by the size of the input.
+
+    Args:
+        source (str | io.TextIOBase | iterable): JavaScript source code, a text stream (e.g., an open file), or an iterable of lines.
+        use_qgis (bool, optional): Whether to add "from ee_plugin import Map \n" to the output script. Defaults to True.
+        math_import (bool, optional): Whether to add "import math" to the output script. Defaults to None, which checks the source for 'Math.' if it is a string or a list, and adds the import otherwise since a stream cannot be scanned ahead.
+
+    Yields:
+        str: Lines of the Python script.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source, newline=None).readlines()
+    if math_import is None:
+        if isinstance(source, (list, tuple)):
+            math_import = use_math(source)
+        else:
+            math_import = True
+    in_file = getattr(source, "name", "<stream>")
+
+    header = _script_header(use_qgis, math_import)
+    buffer = ""
+    for chunk in _convert_js_lines(source, header, in_file):
+        buffer += chunk
+        if "\n" in buffer:
+            *complete, buffer = buffer.split("\n")
+            for line in complete:
+                yield line + "\n"
+
+    if not use_qgis:
+        buffer += "Map"
+    if buffer:
+        yield buffer
+
+
+@_profiled_file_stage
+def js_to_python(
+    in_file, out_file=None, use_qgis=True, github_repo=None, optimize=False
+):
     """Converts an Earth Engine JavaScript to Python script.
 
     Args:
@@ -284,6 +1373,7 @@ def js_to_python(in_file, out_file=None, use_qgis=True, github_repo=None):
         out_file (str, optional): File path of the output Python script. Defaults to None.
         use_qgis (bool, optional): Whether to add "from ee_plugin import Map \n" to the output script. Defaults to True.
         github_repo (str, optional): GitHub repo url. Defaults to None.
+        optimize (bool | list, optional): Whether to apply the optimization passes to the output script, or a list of pass names. See optimize_python(). Defaults to False.
 
     Returns:
         list: Python script
@@ -300,176 +1390,34 @@ def js_to_python(in_file, out_file=None, use_qgis=True, github_repo=None):
 
     is_python = False
     # add_github_url = False
-    import_str = ""
-    if use_qgis:
-        import_str = "from ee_plugin import Map\n"
-    else:
-        import_str = "import geemap\n\nMap = geemap.Map()\n"
 
     github_url = ""
     if github_repo is not None:
         github_url = "# GitHub URL: " + github_repo + in_file + "\n\n"
 
     math_import = False
-    math_import_str = ""
 
-    lines = []
     with open(in_file, encoding="utf-8") as f:
         lines = f.readlines()
 
-        math_import = use_math(lines)
-
-        for line in lines:
-            line = line.strip()
-            if line == "import ee":
-                is_python = True
-
-    if math_import:
-        math_import_str = "import math\n"
-
-    output = ""
+    for line in lines:
+        if "Math." in line:
+            math_import = True
+        if line.strip() == "import ee":
+            is_python = True
 
     if is_python:  # only update the GitHub URL if it is already a GEE Python script
         output = github_url + "".join(map(str, lines))
     else:  # deal with JavaScript
+        header = _script_header(use_qgis, math_import, github_url)
+        try:
+            output = "".join(_convert_js_lines(lines, header, in_file))
+        except ConversionError as e:
+            print(e)
+            return
 
-        header = github_url + "import ee \n" + math_import_str + import_str
-        # function_defs = []
-        output = header + "\n"
-
-        with open(in_file, encoding="utf-8") as f:
-            lines = f.readlines()
-
-            # print('Processing {}'.format(in_file))
-            lines = check_map_functions(lines)
-
-            for index, line in enumerate(lines):
-                if ("/* color" in line) and ("*/" in line):
-                    line = (
-                        line[: line.index("/*")].lstrip()
-                        + line[(line.index("*/") + 2) :]
-                    )
-
-                if (
-                    ("= function" in line)
-                    or ("=function" in line)
-                    or line.strip().startswith("function")
-                ):
-                    try:
-                        bracket_index = line.index("{")
-                    except Exception as e:
-                        print(
-                            f"An error occurred when processing {in_file}. The closing curly bracket could not be found in Line {index+1}: {line}. Please reformat the function definition and make sure that both the opening and closing curly brackets apprear on the same line as the function keyword. "
-                        )
-                        return
-
-                    (
-                        matching_line_index,
-                        matching_char_index,
-                    ) = find_matching_bracket(lines, index, bracket_index)
-
-                    line = line[:bracket_index] + line[bracket_index + 1 :]
-                    if matching_line_index == index:
-                        line = (
-                            line[:matching_char_index] + line[matching_char_index + 1 :]
-                        )
-                    else:
-                        tmp_line = lines[matching_line_index]
-                        lines[matching_line_index] = (
-                            tmp_line[:matching_char_index]
-                            + tmp_line[matching_char_index + 1 :]
-                        )
-
-                    line = (
-                        line.replace(" = function", "")
-                        .replace("=function", "")
-                        .replace("function ", "")
-                    )
-                    if line.lstrip().startswith("//"):
-                        line = line.replace("//", "").lstrip()
-                        line = (
-                            " " * (len(line) - len(line.lstrip()))
-                            + "# def "
-                            + line.strip()
-                            + ":"
-                        )
-                    else:
-                        line = (
-                            " " * (len(line) - len(line.lstrip()))
-                            + "def "
-                            + line.strip()
-                            + ":"
-                        )
-                elif "{" in line:
-                    bracket_index = line.index("{")
-                    (
-                        matching_line_index,
-                        matching_char_index,
-                    ) = find_matching_bracket(lines, index, bracket_index)
-                    if (matching_line_index == index) and (":" in line):
-                        pass
-                    elif ("for (" in line) or ("for(" in line):
-                        line = convert_for_loop(line)
-                        lines[index] = line
-                        bracket_index = line.index("{")
-                        (
-                            matching_line_index,
-                            matching_char_index,
-                        ) = find_matching_bracket(lines, index, bracket_index)
-                        tmp_line = lines[matching_line_index]
-                        lines[matching_line_index] = (
-                            tmp_line[:matching_char_index]
-                            + tmp_line[matching_char_index + 1 :]
-                        )
-                        line = line.replace("{", "")
-
-                if line is None:
-                    line = ""
-
-                line = line.replace("//", "#")
-                line = line.replace("var ", "", 1)
-                line = line.replace("/*", "#")
-                line = line.replace("*/", "#")
-                line = line.replace("true", "True").replace("false", "False")
-                line = line.replace("null", "None")
-                line = line.replace(".or", ".Or")
-                line = line.replace(".and", ".And")
-                line = line.replace(".not", ".Not")
-                line = line.replace("visualize({", "visualize(**{")
-                line = line.replace("Math.PI", "math.pi")
-                line = line.replace("Math.", "math.")
-                line = line.replace("= new", "=")
-                line = line.rstrip()
-
-                if line.endswith("+"):
-                    line = line + " \\"
-                elif line.endswith(";"):
-                    line = line[:-1]
-
-                if line.lstrip().startswith("*"):
-                    line = line.replace("*", "#")
-
-                if (
-                    (":" in line)
-                    and (not line.strip().startswith("#"))
-                    and (not line.strip().startswith("def"))
-                    and (not line.strip().startswith("."))
-                ):
-                    line = format_params(line)
-
-                if (
-                    index < (len(lines) - 1)
-                    and line.lstrip().startswith("#")
-                    and lines[index + 1].lstrip().startswith(".")
-                ):
-                    line = ""
-
-                if line.lstrip().startswith("."):
-                    if "#" in line:
-                        line = line[: line.index("#")]
-                    output = output.rstrip() + " " + "\\" + "\n" + line + "\n"
-                else:
-                    output += line + "\n"
+    if optimize:
+        output = optimize_python(output, optimize)
 
     if not use_qgis:
         output += "Map"
@@ -484,6 +1432,477 @@ def js_to_python(in_file, out_file=None, use_qgis=True, github_repo=None):
     return output
 
 
+# A function mapped over ee.List.sequence(0, size - 1) that reduces one band of the image at each index of
+# collection.toList(size), e.g.
+#
+#   def func(number):
+#     index = ImagesSeq.get(number)
+#     return (ee.Number(number)).subtract(ee.Number(number)) \
+#            .add(ee.Number(ee.Image(ImagesList.get(index)) \
+#       .select("B1") \
+#       .reduceRegion(**{...}) \
+#       .get("B1")))
+_INDEX_LOOP_PATTERN = re.compile(
+    r"""
+    ^(?P<indent>[ \t]*)def[ ]+(?P<func>\w+)\((?P<arg>\w+)\):[ \t]*\n
+    (?:[ \t]+(?P<index>\w+)[ ]*=[ ]*(?P<seq>\w+)\.get\((?P=arg)\)[ \t]*\n)?
+    (?P<body>[ \t]+)return[ ]+
+    (?P<wrap>\(?ee\.Number\((?P=arg)\)\)?\.subtract\(ee\.Number\((?P=arg)\)\)\s*(?:\\\n)?\s*\.add\()?
+    ee\.Number\(ee\.Image\((?P<list>\w+)\.get\((?P<item>\w+)\)\)\s*(?:\\\n)?
+    \s*\.select\((?P<band>"[^"\n]*"|'[^'\n]*')\)\s*(?:\\\n)?
+    \s*\.reduceRegion\((?P<args>.*?)\)\s*(?:\\\n)?
+    \s*\.get\((?P<key>"[^"\n]*"|'[^'\n]*')\)\)(?(wrap)\))[ \t]*(?:\n|\Z)
+    """,
+    re.M | re.S | re.X,
+)
+
+
+def _last_assignment(source, name, end):
+    """Finds the last assignment to a variable before a position.
+
+    Args:
+        source (str): The Python script.
+        name (str): The variable name.
+        end (int): The position to search up to.
+
+    Returns:
+        re.Match: The match of the assignment line, or None if there is none.
+    """
+    match = None
+    for match in re.finditer(rf"^[ \t]*{name}[ ]*=(?!=).*$", source[:end], re.M):
+        pass
+    return match
+
+
+def _is_assigned(source, names, start, end):
+    """Checks whether any of the variables are assigned or defined between two positions.
+
+    Args:
+        source (str): The Python script.
+        names (iterable): The variable names.
+        start (int): The start position.
+        end (int): The end position.
+
+    Returns:
+        bool: True if any of the variables is assigned.
+    """
+    for name in names:
+        pattern = rf"^[ \t]*(?:{name}[ ]*=(?!=)|def[ ]+{name}\b|for[ ]+{name}\b)"
+        if re.search(pattern, source[start:end], re.M):
+            return True
+    return False
+
+
+def _find_index_loops(source):
+    """Finds the functions mapped over an index sequence to reduce one image of a collection list at a time.
+
+    Args:
+        source (str): The Python script.
+
+    Returns:
+        list: One dict per loop with the matched function, its use and the collection it iterates over.
+    """
+    loops = []
+    for match in _INDEX_LOOP_PATTERN.finditer(source):
+        func = match.group("func")
+        seq = match.group("seq")
+        item = match.group("item")
+        if match.group("index") is not None:
+            if item != match.group("index"):
+                continue
+        elif item != match.group("arg"):
+            continue
+
+        # The function is used once, by the map over the sequence, before it is redefined.
+        redefined = re.compile(rf"^[ \t]*def[ ]+{func}\(", re.M).search(
+            source, match.end()
+        )
+        scope_end = redefined.start() if redefined else len(source)
+        uses = list(
+            re.compile(rf"(?<![\w.]){func}\b").finditer(source, match.end(), scope_end)
+        )
+        if len(uses) != 1:
+            continue
+        use = re.compile(
+            rf"^(?P<indent>[ \t]*)(?P<out>\w+)[ ]*=[ ]*"
+            rf"(?:(?P<cast>ee\.(?:List|Array))\()?(?P<seq>\w+)\.map\({func}\)(?(cast)\))"
+            r"[ \t]*;?[ \t]*$",
+            re.M,
+        ).match(source, source.rfind("\n", 0, uses[0].start()) + 1)
+        if use is None or (seq is not None and use.group("seq") != seq):
+            continue
+        seq = use.group("seq")
+
+        # The sequence runs over the indices of the collection list.
+        seq_def = _last_assignment(source, seq, match.start())
+        list_def = _last_assignment(source, match.group("list"), match.start())
+        if seq_def is None or list_def is None:
+            continue
+        seq_match = re.match(
+            rf"[ \t]*{seq}[ ]*=[ ]*ee\.List\.sequence\(0,[ ]*(\w+)\.size\(\)\.subtract\(1\)\)[ \t]*;?[ \t]*$",
+            seq_def.group(),
+        )
+        list_match = re.match(
+            rf"[ \t]*{match.group('list')}[ ]*=[ ]*(\w+)\.toList\((\w+)\.size\(\)\)[ \t]*;?[ \t]*$",
+            list_def.group(),
+        )
+        if (
+            seq_match is None
+            or list_match is None
+            or not seq_match.group(1) == list_match.group(1) == list_match.group(2)
+        ):
+            continue
+        collection = seq_match.group(1)
+        if _is_assigned(
+            source,
+            [collection, seq, match.group("list")],
+            max(seq_def.end(), list_def.end()),
+            use.start(),
+        ):
+            continue
+
+        loops.append(
+            {
+                "match": match,
+                "use": use,
+                "collection": collection,
+                "seq": seq,
+                "list": match.group("list"),
+            }
+        )
+    return loops
+
+
+def _can_fuse(source, group, loop):
+    """Checks whether a loop can share the reduction of a group of loops over the same collection.
+
+    Args:
+        source (str): The Python script.
+        group (list): The loops of the group, in script order.
+        loop (dict): The loop to add to the group.
+
+    Returns:
+        bool: True if the loop can be added.
+    """
+    first, match = group[0]["match"], loop["match"]
+    if (
+        loop["collection"] != group[0]["collection"]
+        or match.group("indent") != first.group("indent")
+        or match.group("band") != match.group("key")
+        or first.group("band") != first.group("key")
+        or re.sub(r"\s", "", match.group("args")) != re.sub(r"\s", "", first.group("args"))
+    ):
+        return False
+    # The function of the group must still be defined and the reduction arguments unchanged where the loop is used.
+    names = set(re.findall(r"(?<![\w.])[A-Za-z_]\w*", first.group("args"))) - {"ee"}
+    return not _is_assigned(
+        source,
+        names | {first.group("func"), loop["collection"]},
+        first.end(),
+        loop["use"].start(),
+    )
+
+
+def optimize_index_loops(source):
+    """Rewrites functions mapped over an index sequence of a collection list into maps over the collection.
+
+    Converted scripts often build ee.List.sequence(0, size - 1) and collection.toList(size), and map a function
+    that reduces one band of ee.Image(list.get(index)). The function is rewritten to reduce each image of the
+    collection with ImageCollection.map() and the values are collected with aggregate_array(), so Earth Engine
+    does not evaluate a list lookup per image. Loops over the same collection with the same reduction arguments
+    share one multi-band reduction. Each value is set as a one-element list and the lists are flattened, since
+    aggregate_array() skips images whose property is null. An image whose reduction is null thus keeps its
+    place as a null value, and the values stay paired with the indices.
+
+    Args:
+        source (str): The Python script.
+
+    Returns:
+        str: The optimized Python script.
+    """
+    loops = _find_index_loops(source)
+    if not loops:
+        return source
+
+    groups = []
+    for loop in loops:
+        if groups and _can_fuse(source, groups[-1], loop):
+            groups[-1].append(loop)
+        else:
+            groups.append([loop])
+
+    edits = []
+    for group in groups:
+        first = group[0]["match"]
+        indent, body, func = first.group("indent"), first.group("body"), first.group("func")
+        args = first.group("args")
+        if len(group) == 1:
+            code = (
+                f"{indent}def {func}(image):\n"
+                f"{body}return image.set({group[0]['use'].group('out')!r}, ee.List([image.select({first.group('band')})"
+                f".reduceRegion({args}).get({first.group('key')})]))\n"
+            )
+        else:
+            bands = list(dict.fromkeys(loop["match"].group("band") for loop in group))
+            values = ", ".join(
+                f"{loop['use'].group('out')!r}: ee.List([values.get({loop['match'].group('key')})])"
+                for loop in group
+            )
+            code = (
+                f"{indent}def {func}(image):\n"
+                f"{body}values = image.select([{', '.join(bands)}]).reduceRegion({args})\n"
+                f"{body}return image.set({{{values}}})\n"
+            )
+        edits.append((first.start(), first.end(), code))
+
+        for loop in group:
+            if loop is not group[0]:
+                edits.append((loop["match"].start(), loop["match"].end(), ""))
+            use = loop["use"]
+            values = f"{loop['collection']}.map({func}).aggregate_array({use.group('out')!r}).flatten()"
+            if use.group("cast"):
+                values = f"{use.group('cast')}({values})"
+            edits.append(
+                (use.start(), use.end(), f"{use.group('indent')}{use.group('out')} = {values}")
+            )
+
+    for start, end, code in sorted(edits, reverse=True):
+        source = source[:start] + code + source[end:]
+
+    # Drop the index sequences and collection lists that are no longer used.
+    for name in dict.fromkeys(n for loop in loops for n in (loop["seq"], loop["list"])):
+        if len(re.findall(rf"(?<![\w.]){name}\b", source)) == 1:
+            source = re.sub(rf"^[ \t]*{name}[ ]*=.*\n", "", source, count=1, flags=re.M)
+
+    return source
+
+
+# A reduction of one band of an image at a point, e.g.
+#
+#   data = image \
+#   .select("ST_B10") \
+#   .reduceRegion(ee.Reducer.first(),point1,10) \
+#   .get("ST_B10")
+_POINT_REDUCTION_PATTERN = re.compile(
+    r"""
+    ^(?P<indent>[ \t]*)(?P<name>\w+)[ ]*=[ ]*(?P<image>\w+)[ \t]*(?:\\\n[ \t]*)?
+    \.select\((?P<band>"[^"\n]*"|'[^'\n]*')\)[ \t]*(?:\\\n[ \t]*)?
+    \.reduceRegion\([ ]*(?P<reducer>ee\.Reducer\.\w+\(\))[ ]*,[ ]*(?P<point>\w+)[ ]*,[ ]*(?P<scale>[\w.]+)[ ]*\)[ \t]*(?:\\\n[ \t]*)?
+    \.get\((?P<key>"[^"\n]*"|'[^'\n]*')\)[ \t]*;?[ \t]*$
+    """,
+    re.M | re.X,
+)
+
+
+def optimize_point_reductions(source):
+    """Replaces repeated reductions of an image at single points with one reduceRegions request.
+
+    Scripts that sample an image at a few sensor locations often repeat the same
+    image.select(band).reduceRegion(reducer, point, scale).get(band) statement for each point, and
+    each one is a separate reduction on Earth Engine. When two or more of them only differ by the
+    point, all points are reduced at once with reduceRegions(), the same request that
+    common.sample_points() makes, and each value is looked up by the name of its point variable.
+
+    Args:
+        source (str): The Python script.
+
+    Returns:
+        str: The optimized Python script.
+    """
+    groups = {}
+    for match in _POINT_REDUCTION_PATTERN.finditer(source):
+        if match.group("band")[1:-1] != match.group("key")[1:-1]:
+            continue
+        key = (
+            match.group("indent"),
+            match.group("image"),
+            match.group("band")[1:-1],
+            match.group("reducer"),
+            match.group("scale"),
+        )
+        groups.setdefault(key, []).append(match)
+
+    samples_names = set(re.findall(r"\b_point_samples\d*\b", source))
+    edits = []
+    for (indent, image, _, reducer, scale), matches in groups.items():
+        # Keep the reductions that see the same image and points as the first one.
+        group = [matches[0]]
+        for match in matches[1:]:
+            point = match.group("point")
+            points = [m.group("point") for m in group]
+            if (
+                point in points
+                # The point must already be defined where all points are reduced.
+                or not _is_assigned(source, [point], 0, group[0].start())
+                or _is_assigned(
+                    source, [image, point] + points, group[0].start(), match.start()
+                )
+            ):
+                continue
+            group.append(match)
+        if len(group) < 2:
+            continue
+
+        samples, number = "_point_samples", 1
+        while samples in samples_names:
+            number += 1
+            samples = f"_point_samples{number}"
+        samples_names.add(samples)
+
+        band = group[0].group("band")
+        features = "".join(
+            f"{indent}    ee.Feature({m.group('point')}, {{'name': {m.group('point')!r}}}),\n"
+            for m in group
+        )
+        code = (
+            f"{indent}# Reduce all points at once, like common.sample_points().\n"
+            f"{indent}{samples} = {image}.select({band}).reduceRegions(ee.FeatureCollection([\n"
+            f"{features}"
+            f"{indent}]), {reducer}.setOutputs([{band}]), {scale})\n"
+        )
+        for index, match in enumerate(group):
+            value = (
+                f"{indent}{match.group('name')} = ee.Feature({samples}"
+                f".filter(ee.Filter.eq('name', {match.group('point')!r})).first()).get({band})"
+            )
+            if index == 0:
+                value = code + value
+            edits.append((match.start(), match.end(), value))
+
+    for start, end, code in sorted(edits, reverse=True):
+        source = source[:start] + code + source[end:]
+    return source
+
+
+_GET_INFO_PATTERN = re.compile(
+    r"^(?P<indent>[ \t]*)(?P<name>[A-Za-z_]\w*)[ ]*=[ ]*(?P<expr>.+?)\.getInfo\(\)[ \t]*;?[ \t]*$"
+)
+
+
+def _get_info_call(line):
+    """Parses a statement that assigns the result of a getInfo() call to a variable.
+
+    Args:
+        line (str): A line of the Python script.
+
+    Returns:
+        tuple: The indentation, variable name, the expression and the names it uses, or None if the line is not such a statement.
+    """
+    match = _GET_INFO_PATTERN.match(line.rstrip("\n"))
+    if match is None:
+        return None
+    import ast
+
+    try:
+        tree = ast.parse(match.group("expr").strip(), mode="eval")
+    except SyntaxError:
+        return None
+    # getInfo() only applies to the last primary of the expression, e.g. size in count * size.getInfo(), so
+    # an operator or conditional at the root would be applied to an unevaluated object once batched.
+    if not isinstance(tree.body, (ast.Call, ast.Attribute, ast.Subscript, ast.Name)):
+        return None
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    return match.group("indent"), match.group("name"), match.group("expr").strip(), names
+
+
+def optimize_get_info(source):
+    """Fuses runs of independent getInfo() calls into a single request.
+
+    Each getInfo() call is a blocking round-trip to Earth Engine. Consecutive statements of the form
+    name = expression.getInfo() are evaluated together with ee.Dictionary({...}).getInfo() and the values
+    are unpacked locally. Only expressions that are a name, call, attribute or subscript are batched, since
+    in e.g. count * size.getInfo() or -c.getInfo() the call only applies to the last operand. A statement whose expression uses a value fetched earlier in the run starts a new
+    batch, so that evaluation order is kept wherever a value depends on another. Note that if one of the
+    values fails to evaluate, the whole batch fails.
+
+    Args:
+        source (str): The Python script.
+
+    Returns:
+        str: The optimized Python script.
+    """
+    lines = source.splitlines(keepends=True)
+    batch_names = set(re.findall(r"\b_info\d*\b", source))
+
+    def flush(batch, output):
+        if len(batch) < 2:
+            output.extend(line for _, line in batch)
+            return
+        indent = batch[0][0][0]
+        info, number = "_info", 1
+        while info in batch_names:
+            number += 1
+            info = f"_info{number}"
+        batch_names.add(info)
+
+        output.append(f"{indent}{info} = ee.Dictionary({{\n")
+        for (_, name, expr, _), _ in batch:
+            output.append(f"{indent}    {name!r}: {expr},\n")
+        output.append(f"{indent}}}).getInfo()\n")
+        for (_, name, _, _), _ in batch:
+            output.append(f"{indent}{name} = {info}.get({name!r})\n")
+
+    output = []
+    batch = []
+    for index, line in enumerate(lines):
+        call = _get_info_call(line)
+        continued = index + 1 < len(lines) and lines[index + 1].lstrip().startswith(".")
+        if call is None or continued:
+            flush(batch, output)
+            batch = []
+            output.append(line)
+            continue
+
+        names = {name for (_, name, _, _), _ in batch}
+        if batch and (
+            call[0] != batch[0][0][0] or call[1] in names or call[3] & names
+        ):
+            # A different block, or a value that depends on the batch: fetch the batch first.
+            flush(batch, output)
+            batch = []
+        if not line.endswith("\n"):
+            line += "\n"
+        batch.append((call, line))
+
+    flush(batch, output)
+    return "".join(output)
+
+
+# The optimization passes that js_to_python() can apply to the Python script, in the order they are applied.
+OPTIMIZATION_PASSES = {
+    "index_loops": optimize_index_loops,
+    "point_reductions": optimize_point_reductions,
+    "get_info": optimize_get_info,
+}
+
+
+def optimize_python(source, passes=True):
+    """Applies optimization passes to an Earth Engine Python script.
+
+    The passes rewrite patterns that are slow to evaluate on Earth Engine into equivalent ones that need fewer
+    server calls. They are optional since the output may look different from the original script.
+
+    Args:
+        source (str): The Python script.
+        passes (bool | list, optional): True to apply all passes in OPTIMIZATION_PASSES, or a list of pass names. Defaults to True.
+
+    Returns:
+        str: The optimized Python script.
+    """
+    if passes is True:
+        passes = list(OPTIMIZATION_PASSES)
+    elif not passes:
+        return source
+
+    for name in passes:
+        if name not in OPTIMIZATION_PASSES:
+            raise ValueError(
+                f"Unknown optimization pass {name}. Choose from {', '.join(OPTIMIZATION_PASSES)}."
+            )
+        source = OPTIMIZATION_PASSES[name](source)
+    return source
+
+
 def create_new_cell(contents, replace=False):
     """Create a new cell in Jupyter notebook based on the contents.
 
@@ -496,12 +1915,200 @@ def create_new_cell(contents, replace=False):
     shell.set_next_input(contents, replace=replace)
 
 
+class SnippetCache:
+    """A least recently used cache of converted JavaScript snippets, optionally backed by a folder on disk.
+
+    An entry is keyed by a hash of the snippet, the options that change the output, the converter version
+    and the registered rewrite rules. When the memory or disk limits are exceeded, the least recently used
+    entries are evicted. Failed conversions are not cached, and neither are snippets converted while a
+    rewrite rule with a replacement function is registered, as the function cannot be identified reliably.
+    """
+
+    def __init__(
+        self,
+        max_entries=256,
+        max_bytes=16 * 1024 * 1024,
+        cache_dir=None,
+        max_disk_bytes=64 * 1024 * 1024,
+    ):
+        """Initialize the SnippetCache object.
+
+        Args:
+            max_entries (int, optional): The maximum number of entries in memory. Defaults to 256.
+            max_bytes (int, optional): The maximum total size of the entries in memory. Defaults to 16 MB.
+            cache_dir (str, optional): A folder to also store the entries in, so that they outlive the process. Defaults to None.
+            max_disk_bytes (int, optional): The maximum total size of the entries in cache_dir. Defaults to 64 MB.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = {}  # dicts keep insertion order, the least recently used entry is first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(snippet, **options):
+        """Computes the cache key of a snippet.
+
+        Args:
+            snippet (str): The JavaScript snippet.
+            **options: The options that change the output, e.g., import_ee=True.
+
+        Returns:
+            str: The hexadecimal key, or None if the snippet cannot be cached because a rewrite rule has a replacement function.
+        """
+        rules = [
+            (rule["old"], rule["new"], rule["count"], rule["regex"])
+            for rule in JS_REWRITE_RULES.rules
+        ]
+        if any(callable(rule[1]) for rule in rules):
+            return None
+        digest = hashlib.sha256(snippet.encode("utf-8"))
+        digest.update(repr((sorted(options.items()), __version__, rules)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Looks up an entry in memory, then on disk.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            list: A copy of the cached lines, or None if the key is not cached.
+        """
+        with self._lock:
+            lines = self._entries.pop(key, None)
+            if lines is not None:
+                self._entries[key] = lines
+                self.hits += 1
+                return list(lines)
+
+        lines = self._read(key)
+        with self._lock:
+            if lines is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, lines)
+        return list(lines)
+
+    def put(self, key, lines):
+        """Adds an entry, evicting the least recently used entries if a limit is exceeded.
+
+        Args:
+            key (str): The cache key.
+            lines (list): The converted lines.
+        """
+        lines = tuple(lines)
+        self._remember(key, lines)
+        if self.cache_dir is not None:
+            self._write(key, lines)
+
+    def clear(self):
+        """Removes all entries from memory and disk and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+        for path in self._disk_files():
+            os.remove(path)
+
+    def stats(self):
+        """Returns the cache statistics.
+
+        Returns:
+            dict: The number of hits, disk_hits, misses and evictions, and the entries and bytes in memory.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remember(self, key, lines):
+        size = sum(len(line) for line in lines)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sum(len(line) for line in old)
+            self._entries[key] = lines
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                evicted = self._entries.pop(next(iter(self._entries)))
+                self._bytes -= sum(len(line) for line in evicted)
+                self.evictions += 1
+
+    def _disk_files(self):
+        if self.cache_dir is None:
+            return []
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".json")
+        ]
+
+    def _read(self, key):
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(self.cache_dir, key + ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = tuple(json.load(f))
+        except (OSError, ValueError):
+            return None
+        # The modification time orders the files by their last use for eviction.
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return lines
+
+    def _write(self, key, lines):
+        path = os.path.join(self.cache_dir, key + ".json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(lines), f)
+        os.replace(tmp_path, path)
+
+        files = []
+        for file in self._disk_files():
+            with contextlib.suppress(OSError):
+                stat = os.stat(file)
+                files.append((stat.st_mtime_ns, stat.st_size, file))
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(file)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+
+# The cache used by js_snippet_to_py(). Replace it to change the limits or to add a cache folder, e.g.,
+# conversion.SNIPPET_CACHE = SnippetCache(cache_dir=os.path.expanduser("~/.cache/gee_snippets"))
+SNIPPET_CACHE = SnippetCache()
+
+
 def js_snippet_to_py(
     in_js_snippet,
     add_new_cell=True,
     import_ee=True,
     import_geemap=True,
     show_map=True,
+    cache=True,
 ):
     """Converts an Earth Engine JavaScript snippet wrapped in triple quotes to Python directly on a Jupyter notebook.
 
@@ -511,18 +2118,33 @@ def js_snippet_to_py(
         import_ee (bool, optional): Whether to import ee. Defaults to True.
         import_geemap (bool, optional): Whether to import geemap. Defaults to True.
         show_map (bool, optional): Whether to show the map. Defaults to True.
+        cache (bool | SnippetCache, optional): Whether to look up and store the converted snippet in SNIPPET_CACHE, or the cache to use instead. Defaults to True.
 
     Returns:
         list: A list of Python script.
     """
-    work_dir = os.path.expanduser("~")
-    in_js = os.path.join(work_dir, "tmp_js_snippet.js")
-    out_py = os.path.join(work_dir, "tmp_py_snippet.py")
+    if cache is True:
+        cache = SNIPPET_CACHE
+    out_lines = None
+    if cache:
+        key = SnippetCache.key(
+            in_js_snippet,
+            import_ee=import_ee,
+            import_geemap=import_geemap,
+            show_map=show_map,
+        )
+        if key is None:
+            cache = None
+        else:
+            out_lines = cache.get(key)
+    if out_lines is not None:
+        if add_new_cell:
+            create_new_cell("".join(out_lines))
+            return
+        return out_lines
 
     try:
-        with open(in_js, "w") as f:
-            f.write(in_js_snippet)
-        js_to_python(in_js, out_file=out_py, use_qgis=False)
+        lines = list(js_to_python_stream(in_js_snippet, use_qgis=False))
 
         out_lines = []
         if import_ee:
@@ -532,29 +2154,26 @@ def js_snippet_to_py(
             out_lines.append("Map = geemap.Map()\n")
         # if import_ee:
         #     out_lines.append("ee.Initialize()\n")
-        with open(out_py, encoding="utf-8") as f:
-            lines = f.readlines()
-            for index, line in enumerate(lines):
-                if index < (len(lines) - 1):
-                    if line.strip() == "import ee":
-                        continue
-                    # elif import_ee and (line.strip() == 'import ee'):
-                    #     out_lines.append(line)
-                    #     out_lines.append('ee.Initialize()\n')
-                    #     continue
-                    next_line = lines[index + 1]
-                    if line.strip() == "" and next_line.strip() == "":
-                        continue
-                    else:
-                        out_lines.append(line)
-                elif index == (len(lines) - 1) and lines[index].strip() != "":
+        for index, line in enumerate(lines):
+            if index < (len(lines) - 1):
+                if line.strip() == "import ee":
+                    continue
+                # elif import_ee and (line.strip() == 'import ee'):
+                #     out_lines.append(line)
+                #     out_lines.append('ee.Initialize()\n')
+                #     continue
+                next_line = lines[index + 1]
+                if line.strip() == "" and next_line.strip() == "":
+                    continue
+                else:
                     out_lines.append(line)
+            elif index == (len(lines) - 1) and lines[index].strip() != "":
+                out_lines.append(line)
 
         if show_map:
             out_lines.append("Map\n")
-
-        os.remove(in_js)
-        os.remove(out_py)
+        if cache:
+            cache.put(key, out_lines)
 
         if add_new_cell:
             contents = "".join(out_lines)
@@ -566,14 +2185,208 @@ def js_snippet_to_py(
         print(e)
 
 
-def js_to_python_dir(in_dir, out_dir=None, use_qgis=True, github_repo=None):
+class ConversionManifest:
+    """An on-disk record of the files converted by js_to_python_dir() and py_to_ipynb_dir().
+
+    The manifest stores the content hash, size and modification time of every input file together
+    with the converter version and the conversion options. A file is up to date when its output
+    still exists and its content is unchanged. The hash is only recomputed when the size or
+    modification time differs from the recorded one. Changing the converter version or the options
+    invalidates every entry. Invalidated entries are still pruned, so that the outputs of removed input
+    files are deleted.
+    """
+
+    def __init__(self, path, options=None):
+        """Initialize the ConversionManifest object.
+
+        Args:
+            path (str): File path of the manifest. It is created on save() if it does not exist.
+            options (dict, optional): The conversion options. Must be JSON serializable. Defaults to None.
+        """
+        self.path = os.path.abspath(path)
+        self.options = options or {}
+        self.files = {}
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        self.files = manifest.get("files", {})
+        if (
+            manifest.get("version") != __version__
+            or manifest.get("options") != self.options
+        ):
+            # The entries are marked stale until they are recorded again.
+            for entry in self.files.values():
+                entry["stale"] = True
+
+    def is_current(self, in_file, out_file):
+        """Checks whether the output of an input file is up to date.
+
+        Args:
+            in_file (str): File path of the input file.
+            out_file (str): File path of the output file.
+
+        Returns:
+            bool: True if the input file is unchanged since it was recorded and the output file exists.
+        """
+        entry = self.files.get(str(in_file))
+        if (
+            entry is None
+            or entry.get("stale")
+            or entry["out_file"] != str(out_file)
+            or not os.path.exists(out_file)
+        ):
+            return False
+
+        stat = os.stat(in_file)
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        if stat.st_size != entry["size"] or file_digest(in_file) != entry["hash"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record(self, in_file, out_file):
+        """Records an input file and its output as converted.
+
+        Args:
+            in_file (str): File path of the input file.
+            out_file (str): File path of the output file.
+        """
+        stat = os.stat(in_file)
+        self.files[str(in_file)] = {
+            "out_file": str(out_file),
+            "hash": file_digest(in_file),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def forget(self, in_file):
+        """Removes an input file from the manifest so that it is converted again next time.
+
+        Args:
+            in_file (str): File path of the input file.
+        """
+        self.files.pop(str(in_file), None)
+
+    def prune(self, in_files):
+        """Removes the entries of input files that no longer exist and deletes their outputs.
+
+        Args:
+            in_files (list): File paths of the current input files.
+
+        Returns:
+            list: File paths of the deleted output files.
+        """
+        in_files = set(str(in_file) for in_file in in_files)
+        removed = []
+        for in_file in list(self.files.keys()):
+            if in_file in in_files:
+                continue
+            out_file = self.files.pop(in_file)["out_file"]
+            if os.path.exists(out_file):
+                os.remove(out_file)
+                removed.append(out_file)
+
+        return removed
+
+    def save(self):
+        """Writes the manifest to disk."""
+        manifest = {
+            "version": __version__,
+            "options": self.options,
+            "files": self.files,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def file_digest(in_file):
+    """Computes the SHA-256 hash of a file.
+
+    Args:
+        in_file (str): File path of the input file.
+
+    Returns:
+        str: The hexadecimal digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(in_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _convert_js_file(task):
+    """Converts one Earth Engine JavaScript and reports the outcome. Used by js_to_python_dir().
+
+    Args:
+        task (tuple): (in_file, out_file, use_qgis, github_repo, optimize, profile).
+
+    Returns:
+        dict: The input and output file paths, status ('ok' or 'error'), error message and conversion time in seconds, and the statistics of a ConversionProfiler if profile is True.
+    """
+    in_file, out_file, use_qgis, github_repo, optimize, profile = task
+    report = {
+        "in_file": in_file,
+        "out_file": out_file,
+        "status": "ok",
+        "error": None,
+        "seconds": 0.0,
+    }
+    start = time.perf_counter()
+    messages = io.StringIO()
+    # A worker process has no access to the profiler of the parent process, so its statistics are returned.
+    profiler = ConversionProfiler() if profile else contextlib.nullcontext()
+    try:
+        with contextlib.redirect_stdout(messages), profiler:
+            output = js_to_python(in_file, out_file, use_qgis, github_repo, optimize)
+        if output is None:
+            report["status"] = "error"
+            report["error"] = messages.getvalue().strip()
+    except Exception as e:
+        report["status"] = "error"
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["seconds"] = time.perf_counter() - start
+    if profile:
+        report["profile"] = profiler.to_dict()
+
+    return report
+
+
+def js_to_python_dir(
+    in_dir,
+    out_dir=None,
+    use_qgis=True,
+    github_repo=None,
+    workers=1,
+    chunksize=None,
+    incremental=False,
+    optimize=False,
+):
     """Converts all Earth Engine JavaScripts in a folder recursively to Python scripts.
 
+    The conversions are recorded by the active ConversionProfiler, if any, also with several workers.
+
     Args:
         in_dir (str): The input folder containing Earth Engine JavaScripts.
         out_dir (str, optional): The output folder containing Earth Engine Python scripts. Defaults to None.
         use_qgis (bool, optional): Whether to add "from ee_plugin import Map \n" to the output script. Defaults to True.
         github_repo (str, optional): GitHub repo url. Defaults to None.
+        workers (int, optional): Number of processes to convert the scripts in parallel. Set to None to use all CPU cores. Defaults to 1.
+        chunksize (int, optional): Number of scripts sent to a worker process at a time. Defaults to None, which picks a size based on the number of scripts and workers.
+        incremental (bool, optional): Whether to only convert the scripts that changed since the last run, based on a manifest saved in the output folder. Outputs of deleted scripts are removed. Defaults to False.
+        optimize (bool | list, optional): Whether to apply the optimization passes to the output scripts, or a list of pass names. See optimize_python(). Defaults to False.
+
+    Returns:
+        list: One report per script, in sorted input order, with the keys in_file, out_file, status ('ok', 'skipped' or 'error'), error and seconds.
     """
     print("Converting Earth Engine JavaScripts to Python scripts...\n")
     in_dir = os.path.abspath(in_dir)
@@ -585,18 +2398,88 @@ def js_to_python_dir(in_dir, out_dir=None, use_qgis=True, github_repo=None):
     else:
         out_dir = os.path.abspath(out_dir)
 
-    files = list(Path(in_dir).rglob("*.js"))
+    files = sorted(Path(in_dir).rglob("*.js"))
 
-    for index, in_file in enumerate(files):
-        print(f"Processing {index + 1}/{len(files)}: {in_file}")
+    profile = _profiler is not None
+    tasks = []
+    for in_file in files:
         # if use_qgis:
         #     out_file = os.path.splitext(in_file)[0] + "_qgis.py"
         # else:
         out_file = os.path.splitext(in_file)[0] + "_geemap.py"
         out_file = out_file.replace(in_dir, out_dir)
-        js_to_python(in_file, out_file, use_qgis, github_repo)
+        tasks.append((str(in_file), out_file, use_qgis, github_repo, optimize, profile))
+
+    skipped = []
+    if incremental:
+        options = {"use_qgis": use_qgis, "github_repo": github_repo}
+        if optimize:
+            options["optimize"] = optimize
+        manifest = ConversionManifest(
+            os.path.join(out_dir, ".js_to_python_manifest.json"), options
+        )
+        for out_file in manifest.prune(task[0] for task in tasks):
+            print(f"Removed {out_file}")
+        skipped = [task for task in tasks if manifest.is_current(task[0], task[1])]
+        if skipped:
+            print(f"Skipping {len(skipped)} unchanged scripts.")
+            current = set(task[0] for task in skipped)
+            tasks = [task for task in tasks if task[0] not in current]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    if workers == 1:
+        results = map(_convert_js_file, tasks)
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (workers * 4))
+        import concurrent.futures
+
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_convert_js_file, tasks, chunksize=chunksize)
+
+    reports = []
+    try:
+        for index, report in enumerate(results):
+            if profile:
+                _profiler.merge(report.pop("profile"))
+            print(f"Processing {index + 1}/{len(tasks)}: {report['in_file']}")
+            if report["status"] != "ok":
+                print(f"Error: {report['error']}")
+            reports.append(report)
+    finally:
+        if workers > 1:
+            executor.shutdown()
+
+    if incremental:
+        for report in reports:
+            if report["status"] == "ok":
+                manifest.record(report["in_file"], report["out_file"])
+            else:
+                manifest.forget(report["in_file"])
+        manifest.save()
+
+        for in_file, out_file, *_ in skipped:
+            reports.append(
+                {
+                    "in_file": in_file,
+                    "out_file": out_file,
+                    "status": "skipped",
+                    "error": None,
+                    "seconds": 0.0,
+                }
+            )
+        reports.sort(key=lambda report: report["in_file"])
+
+    failed = sum(1 for report in reports if report["status"] == "error")
+    if failed:
+        print(f"{failed} of {len(reports)} scripts failed to convert.")
     # print("Output Python script folder: {}".format(out_dir))
 
+    return reports
+
 
 # def dict_key_str(line):
 
@@ -639,6 +2522,25 @@ def remove_qgis_import(in_file):
                 return lines[index + 1 :]
 
 
+@functools.lru_cache(maxsize=None)
+def package_dir(name):
+    """Locates the folder of an installed package without importing it. The result is cached.
+
+    Args:
+        name (str): The package name, e.g., 'geemap'.
+
+    Returns:
+        str: The folder containing the package.
+    """
+    import importlib.util
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.origin is None:
+        raise ImportError(f"The {name} package could not be found. Please install it.")
+
+    return os.path.dirname(spec.origin)
+
+
 def get_js_examples(out_dir=None):
     """Gets Earth Engine JavaScript examples from the geemap package.
 
@@ -648,7 +2550,7 @@ def get_js_examples(out_dir=None):
     Returns:
         str: The folder containing the JavaScript examples.
     """
-    pkg_dir = os.path.dirname(pkg_resources.resource_filename("geemap", "geemap.py"))
+    pkg_dir = package_dir("geemap")
     example_dir = os.path.join(pkg_dir, "data")
     js_dir = os.path.join(example_dir, "javascripts")
 
@@ -677,7 +2579,7 @@ def get_nb_template(download_latest=False, out_file=None):
     Returns:
         str: The file path of the template.
     """
-    pkg_dir = os.path.dirname(pkg_resources.resource_filename("geemap", "geemap.py"))
+    pkg_dir = package_dir("geemap")
     example_dir = os.path.join(pkg_dir, "data")
     template_dir = os.path.join(example_dir, "template")
     template_file = os.path.join(template_dir, "template.py")
@@ -695,6 +2597,8 @@ def get_nb_template(download_latest=False, out_file=None):
     if download_latest:
         template_url = "https://raw.githubusercontent.com/giswqs/geemap/master/examples/template/template.py"
         print(f"Downloading the latest notebook template from {template_url}")
+        import urllib.request
+
         urllib.request.urlretrieve(template_url, out_file)
     elif out_file is not None:
         shutil.copyfile(template_file, out_file)
@@ -702,28 +2606,53 @@ def get_nb_template(download_latest=False, out_file=None):
     return out_file
 
 
-def template_header(in_template):
-    """Extracts header from the notebook template.
+@functools.lru_cache(maxsize=32)
+def _template_parts(in_template, mtime_ns, size):
+    """Splits the notebook template into the header and footer around the Earth Engine Python script.
+
+    The result is cached for each version of the template file, so a folder of scripts only reads it once.
 
     Args:
         in_template (str): Input notebook template file path.
+        mtime_ns (int): Modification time of the template file, part of the cache key.
+        size (int): Size of the template file, part of the cache key.
 
     Returns:
-        list: List of lines.
+        tuple: The header lines and the footer lines.
     """
-    header = []
-    template_lines = []
     header_end_index = 0
+    footer_start_index = 0
 
     with open(in_template, encoding="utf-8") as f:
         template_lines = f.readlines()
-        for index, line in enumerate(template_lines):
-            if "## Add Earth Engine Python script" in line:
-                header_end_index = index + 6
+    for index, line in enumerate(template_lines):
+        if "## Add Earth Engine Python script" in line:
+            header_end_index = index + 6
+        if "## Display the interactive map" in line:
+            footer_start_index = index - 2
+
+    header = tuple(template_lines[:header_end_index])
+    footer = ("\n",) + tuple(template_lines[footer_start_index:])
+
+    return header, footer
 
-    header = template_lines[:header_end_index]
 
-    return header
+def _read_template(in_template):
+    in_template = os.path.abspath(in_template)
+    stat = os.stat(in_template)
+    return _template_parts(in_template, stat.st_mtime_ns, stat.st_size)
+
+
+def template_header(in_template):
+    """Extracts header from the notebook template.
+
+    Args:
+        in_template (str): Input notebook template file path.
+
+    Returns:
+        list: List of lines.
+    """
+    return list(_read_template(in_template)[0])
 
 
 def template_footer(in_template):
@@ -735,21 +2664,73 @@ def template_footer(in_template):
     Returns:
         list: List of lines.
     """
-    footer = []
-    template_lines = []
-    footer_start_index = 0
+    return list(_read_template(in_template)[1])
 
-    with open(in_template, encoding="utf-8") as f:
-        template_lines = f.readlines()
-        for index, line in enumerate(template_lines):
-            if "## Display the interactive map" in line:
-                footer_start_index = index - 2
 
-    footer = ["\n"] + template_lines[footer_start_index:]
+_NB_CELL_SEPARATOR = "# %%\n"
+
 
-    return footer
+def py_to_notebook(py_str):
+    """Builds a Jupyter notebook from a Python script with "# %%" cell separators.
 
+    Cells are split and converted the same way as the ipynb-py-convert command, i.e., a cell starting with
+    triple quotes becomes a markdown cell, so the notebooks are identical without a temporary file or a subprocess.
 
+    Args:
+        py_str (str): The Python script.
+
+    Returns:
+        dict: The notebook, ready to be saved with json.dump().
+    """
+    if "\r" in py_str:
+        py_str = py_str.replace("\r\n", "\n").replace("\r", "\n")
+    if py_str.startswith(_NB_CELL_SEPARATOR):
+        py_str = py_str[len(_NB_CELL_SEPARATOR) :]
+
+    cells = []
+    for chunk in py_str.split("\n\n" + _NB_CELL_SEPARATOR):
+        cell_type = "code"
+        if chunk.startswith("'''"):
+            chunk = chunk.strip("'\n")
+            cell_type = "markdown"
+        elif chunk.startswith('"""'):
+            chunk = chunk.strip('"\n')
+            cell_type = "markdown"
+
+        cell = {
+            "cell_type": cell_type,
+            "metadata": {},
+            "source": chunk.splitlines(True),
+        }
+        if cell_type == "code":
+            cell.update({"outputs": [], "execution_count": None})
+        cells.append(cell)
+
+    return {
+        "cells": cells,
+        "metadata": {
+            "anaconda-cloud": {},
+            "kernelspec": {
+                "display_name": "Python 3",
+                "language": "python",
+                "name": "python3",
+            },
+            "language_info": {
+                "codemirror_mode": {"name": "ipython", "version": 3},
+                "file_extension": ".py",
+                "mimetype": "text/x-python",
+                "name": "python",
+                "nbconvert_exporter": "python",
+                "pygments_lexer": "ipython3",
+                "version": "3.6.1",
+            },
+        },
+        "nbformat": 4,
+        "nbformat_minor": 4,
+    }
+
+
+@_profiled_file_stage
 def py_to_ipynb(
     in_file,
     template_file=None,
@@ -774,13 +2755,9 @@ def py_to_ipynb(
     if out_file is None:
         out_file = os.path.splitext(in_file)[0] + ".ipynb"
 
-    out_py_file = os.path.splitext(out_file)[0] + "_tmp.py"
-
     out_dir = os.path.dirname(out_file)
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
-    if out_dir == os.path.dirname(in_file):
-        out_py_file = os.path.splitext(out_file)[0] + "_tmp.py"
 
     print(in_file)
     content = remove_qgis_import(in_file)
@@ -814,30 +2791,18 @@ def py_to_ipynb(
 
     out_text = out_text[:-1] + [out_text[-1].strip()]
 
-    if not os.path.exists(os.path.dirname(out_py_file)):
-        os.makedirs(os.path.dirname(out_py_file))
-
-    with open(out_py_file, "w") as f:
-        f.writelines(out_text)
-
-    try:
-        # command = 'ipynb-py-convert ' + out_py_file + ' ' + out_file
-        command = 'ipynb-py-convert "{}" "{}"'.format(out_py_file, out_file)
-        print(os.popen(command).read().rstrip())
-        # os.popen(command)
-    except Exception as e:
-        print("Please install ipynb-py-convert using the following command:\n")
-        print("pip install ipynb-py-convert")
-        raise Exception(e)
-
-    try:
-        os.remove(out_py_file)
-    except Exception as e:
-        print(e)
+    notebook = py_to_notebook("".join(out_text))
+    with open(out_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(notebook, indent=2))
 
 
 def py_to_ipynb_dir(
-    in_dir, template_file=None, out_dir=None, github_username=None, github_repo=None
+    in_dir,
+    template_file=None,
+    out_dir=None,
+    github_username=None,
+    github_repo=None,
+    incremental=False,
 ):
     """Converts Earth Engine Python scripts in a folder recursively to Jupyter notebooks.
 
@@ -847,6 +2812,7 @@ def py_to_ipynb_dir(
         template_file (str): Input jupyter notebook template file.
         github_username (str, optional): GitHub username. Defaults to None.
         github_repo (str, optional): GitHub repo name. Defaults to None.
+        incremental (bool, optional): Whether to only convert the scripts that changed since the last run, based on a manifest saved in the output folder. Notebooks of deleted scripts are removed. Defaults to False.
     """
     print("Converting Earth Engine Python scripts to Jupyter notebooks ...\n")
 
@@ -868,6 +2834,21 @@ def py_to_ipynb_dir(
     else:
         out_dir = os.path.abspath(out_dir)
 
+    if incremental:
+        if template_file is None:
+            template_file = get_nb_template()
+        manifest = ConversionManifest(
+            os.path.join(out_dir, ".py_to_ipynb_manifest.json"),
+            {
+                "template_file": os.path.abspath(template_file),
+                "template_hash": file_digest(template_file),
+                "github_username": github_username,
+                "github_repo": github_repo,
+            },
+        )
+        for out_file in manifest.prune(files):
+            print(f"Removed {out_file}")
+
     for index, file in enumerate(files):
         in_file = str(file)
         out_file = (
@@ -875,38 +2856,206 @@ def py_to_ipynb_dir(
             .replace("_qgis", "")
             .replace(".py", ".ipynb")
         )
+        if incremental and manifest.is_current(in_file, out_file):
+            continue
         print(f"Processing {index + 1}/{len(files)}: {in_file}")
         py_to_ipynb(in_file, template_file, out_file, github_username, github_repo)
+        if incremental:
+            manifest.record(in_file, out_file)
+
+    if incremental:
+        manifest.save()
 
 
-def execute_notebook(in_file):
+def execute_notebook(in_file, timeout=None):
     """Executes a Jupyter notebook and save output cells
 
     Args:
         in_file (str): Input Jupyter notebook.
+        timeout (float, optional): Number of seconds after which the execution is stopped. Defaults to None.
+
+    Returns:
+        dict: The keys in_file, status ('ok', 'error' or 'timeout'), seconds, failing_cell (the index of the cell that raised an error) and error.
     """
+    import subprocess
+
     # command = 'jupyter nbconvert --to notebook --execute ' + in_file + ' --inplace'
-    command = 'jupyter nbconvert --to notebook --execute "{}" --inplace'.format(in_file)
-    print(os.popen(command).read().rstrip())
-    # os.popen(command)
+    command = [
+        "jupyter",
+        "nbconvert",
+        "--to",
+        "notebook",
+        "--execute",
+        str(in_file),
+        "--inplace",
+    ]
+    result = {
+        "in_file": str(in_file),
+        "status": "ok",
+        "seconds": 0.0,
+        "failing_cell": None,
+        "error": None,
+    }
+
+    # Run in a new session, or process group on Windows, so that the kernel is stopped together with
+    # nbconvert on timeout.
+    if os.name == "nt":
+        options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {"start_new_session": True}
+
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            **options,
+        )
+    except FileNotFoundError:
+        result["status"] = "error"
+        result["error"] = "jupyter is not installed. Please install it using: pip install nbconvert"
+        return result
+
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_process_tree(process)
+        process.communicate()
+        result["status"] = "timeout"
+        result["error"] = f"The notebook did not finish within {timeout} seconds."
+    else:
+        if stdout.strip():
+            print(stdout.rstrip())
+        if process.returncode != 0:
+            result["status"] = "error"
+            result["failing_cell"] = _failing_cell(in_file, stderr)
+            errors = [line for line in stderr.splitlines() if line.strip()]
+            result["error"] = errors[-1] if errors else f"Exit status {process.returncode}"
+    result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def _kill_process_tree(process):
+    """Kills a process started in a new session or process group, together with the processes it started.
+
+    Args:
+        process (subprocess.Popen): The process.
+    """
+    import subprocess
+
+    if os.name == "nt":
+        # Windows has neither sessions nor SIGKILL. taskkill /T stops the child processes as well.
+        try:
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            pass
+        process.kill()
+    else:
+        import signal
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _failing_cell(in_file, stderr):
+    """Finds the index of the cell that nbconvert reports as failing.
+
+    Args:
+        in_file (str): Input Jupyter notebook.
+        stderr (str): The error output of nbconvert.
+
+    Returns:
+        int: The index of the failing cell in the notebook, or None if it cannot be found.
+    """
+    marker = "An error occurred while executing the following cell:"
+    separator = "------------------"
+    if marker not in stderr:
+        return None
+    block = stderr[stderr.index(marker) + len(marker) :].split(separator)
+    if len(block) < 3:
+        return None
+    source = block[1].strip()
+
+    try:
+        with open(in_file, encoding="utf-8") as f:
+            cells = json.load(f).get("cells", [])
+    except (OSError, ValueError):
+        return None
 
+    for index, cell in enumerate(cells):
+        cell_source = cell.get("source", "")
+        if isinstance(cell_source, list):
+            cell_source = "".join(cell_source)
+        if cell.get("cell_type") == "code" and cell_source.strip() == source:
+            return index
 
-def execute_notebook_dir(in_dir):
+    return None
+
+
+def execute_notebook_dir(in_dir, workers=1, timeout=None):
     """Executes all Jupyter notebooks in the given directory recursively and save output cells.
 
     Args:
         in_dir (str): Input folder containing notebooks.
+        workers (int, optional): Number of notebooks to execute concurrently. Set to None to use all CPU cores. Defaults to 1.
+        timeout (float, optional): Number of seconds after which the execution of a notebook is stopped. Defaults to None.
+
+    Returns:
+        list: One result per notebook, in sorted order. See execute_notebook().
     """
     print("Executing Earth Engine Jupyter notebooks ...\n")
 
     in_dir = os.path.abspath(in_dir)
-    files = list(Path(in_dir).rglob("*.ipynb"))
+    files = sorted(
+        file
+        for file in Path(in_dir).rglob("*.ipynb")
+        if ".ipynb_checkpoints" not in file.parts
+    )
     count = len(files)
-    if files is not None:
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, count))
+
+    results = [None] * count
+    if workers == 1:
         for index, file in enumerate(files):
-            in_file = str(file)
             print(f"Processing {index + 1}/{count}: {file} ...")
-            execute_notebook(in_file)
+            results[index] = execute_notebook(str(file), timeout)
+    else:
+        import concurrent.futures
+
+        # Each notebook runs in its own nbconvert process and kernel, so threads are enough.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(execute_notebook, str(file), timeout): index
+                for index, file in enumerate(files)
+            }
+            for done, future in enumerate(concurrent.futures.as_completed(futures)):
+                index = futures[future]
+                results[index] = future.result()
+                print(
+                    f"Processing {done + 1}/{count}: {files[index]} ... {results[index]['status']}"
+                )
+
+    for result in results:
+        if result["status"] != "ok":
+            cell = result["failing_cell"]
+            location = f" (cell {cell})" if cell is not None else ""
+            print(
+                f"{result['status'].upper()}: {result['in_file']}{location}: {result['error']}"
+            )
+
+    return results
 
 
 def update_nb_header(in_file, github_username=None, github_repo=None):
@@ -1029,53 +3178,346 @@ def update_nb_header_dir(in_dir, github_username=None, github_repo=None):
 #     print('Data downloaded to: {}'.format(final_path))
 
 
-def download_gee_app(url, out_file=None):
-    """Downloads JavaScript source code from a GEE App
+def _gee_app_json_url(url):
+    """Builds the URL of the JSON file with the JavaScript modules of a GEE App.
 
     Args:
-        url (str): The URL of the GEE App.
-        out_file (str, optional): The output file path for the downloaded JavaScript. Defaults to None.
+        url (str): The URL of the GEE App, e.g., https://user.users.earthengine.app/view/name.
+
+    Returns:
+        str: The URL of the modules JSON, e.g., https://user.users.earthengine.app/javascript/name-modules.json.
     """
-    cwd = os.getcwd()
-    out_file_name = os.path.basename(url) + ".js"
-    out_file_path = os.path.join(cwd, out_file_name)
-    items = url.split("/")
+    items = url.rstrip("/").split("/")
+    if len(items) < 5:
+        raise ValueError(f"The URL {url} is invalid. Please double check the URL.")
     items[3] = "javascript"
     items[4] = items[4] + "-modules.json"
-    json_url = "/".join(items)
-    print(f"The json url: {json_url}")
+    return "/".join(items)
 
-    if out_file is not None:
-        out_file_path = out_file
-        if not out_file_path.endswith("js"):
-            out_file_path += ".js"
 
-    out_dir = os.path.dirname(out_file_path)
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
+def parse_gee_app_modules(text):
+    """Parses the modules JSON of a GEE App.
+
+    Args:
+        text (str): The JSON text, e.g., {"dependencies": {"users/name/repo:main": "..."}, "path": "users/name/repo:main"}.
+
+    Returns:
+        tuple: The path of the main module and a dict of module path -> JavaScript source.
+    """
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("The GEE App modules JSON is not an object.")
+
+    modules = data.get("dependencies")
+    if not isinstance(modules, dict):
+        modules = {key: value for key, value in data.items() if key != "path"}
+    modules = {
+        path: source.replace("\r", "")
+        for path, source in modules.items()
+        if isinstance(source, str)
+    }
+    if not modules:
+        raise ValueError("The GEE App modules JSON has no JavaScript modules.")
+
+    main = data.get("path")
+    if main not in modules:
+        main = next(iter(modules))
+    return main, modules
+
+
+def _module_file(out_dir, module):
+    """Builds the local file path of a GEE module, e.g., users/name/repo:dir/file -> out_dir/users/name/repo/dir/file.js.
+
+    Args:
+        out_dir (str): The root folder of the modules.
+        module (str): The module path.
+
+    Returns:
+        str: The file path.
+    """
+    parts = module.replace(":", "/").split("/")
+    if any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Invalid module path {module}.")
+    path = os.path.join(out_dir, *parts)
+    if not path.endswith(".js"):
+        path += ".js"
+    return path
+
+
+def _write_if_changed(out_file, text):
+    """Writes a text file unless it already has the same content.
+
+    Args:
+        out_file (str): The file path.
+        text (str): The file content.
+
+    Returns:
+        bool: True if the file was written.
+    """
+    try:
+        with open(out_file, encoding="utf-8", newline="") as f:
+            if f.read() == text:
+                return False
+    except (OSError, ValueError):
+        pass
+
+    out_dir = os.path.dirname(out_file)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+    with open(out_file, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return True
+
+
+def _create_http_session(pool_size=10):
+    """Creates a requests session that keeps connections alive and retries failed requests.
+
+    The transport is configured like the shared HTTP session of common.py, which is not imported here as it
+    needs Earth Engine: server errors and 429 Too Many Requests are retried, as long as the Retry-After
+    header says if there is one.
+
+    Args:
+        pool_size (int, optional): The maximum number of connections kept alive per host, e.g., the number of threads. Defaults to 10.
+
+    Returns:
+        requests.Session: The session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
-    json_path = out_file_path + "on"
 
+class GeeAppFetcher:
+    """Downloads the JavaScript modules of GEE Apps concurrently, with a local cache revalidated by the server.
+
+    The modules JSON of every app is kept in the cache folder together with its ETag and Last-Modified
+    headers, so fetching an unchanged app again is a conditional request answered with 304 Not Modified.
+    Module files are only written when their content changed.
+    """
+
+    def __init__(self, cache_dir=None, workers=8, timeout=60):
+        """Initialize the GeeAppFetcher object.
+
+        Args:
+            cache_dir (str, optional): The folder of the cached modules JSON files. Defaults to None, i.e., no cache.
+            workers (int, optional): The number of apps downloaded at the same time. Defaults to 8.
+            timeout (int, optional): The timeout of a request in seconds. Defaults to 60.
+        """
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.session = _create_http_session(workers)
+
+    def close(self):
+        """Closes the connections kept open between requests."""
+        self.session.close()
+
+    def _cache_file(self, json_url):
+        digest = hashlib.sha256(json_url.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _read_cache(self, json_url):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._cache_file(json_url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == json_url else None
+
+    def _write_cache(self, json_url, headers, text):
+        if self.cache_dir is None:
+            return
+        entry = {
+            "url": json_url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "text": text,
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_file = self._cache_file(json_url)
+        tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_file, cache_file)
+
+    def fetch(self, url):
+        """Fetches the modules of a GEE App, revalidating the cached copy if there is one.
+
+        Args:
+            url (str): The URL of the GEE App.
+
+        Returns:
+            dict: The keys url, json_url, status ('ok', 'not_modified' or 'error'), error, main (path of the main module), modules (dict of module path -> JavaScript source) and seconds.
+        """
+        start = time.perf_counter()
+        report = {
+            "url": url,
+            "json_url": None,
+            "status": "ok",
+            "error": None,
+            "main": None,
+            "modules": {},
+        }
+        try:
+            json_url = report["json_url"] = _gee_app_json_url(url)
+            cached = self._read_cache(json_url)
+            headers = {}
+            if cached is not None:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+            r = self.session.get(json_url, headers=headers, timeout=self.timeout)
+            if r.status_code == 304 and cached is not None:
+                report["status"] = "not_modified"
+                text = cached["text"]
+            elif r.status_code == 200:
+                text = r.content.decode("utf-8")
+                self._write_cache(json_url, r.headers, text)
+            else:
+                raise ValueError(f"HTTP error {r.status_code} for {json_url}")
+
+            report["main"], report["modules"] = parse_gee_app_modules(text)
+        except Exception as e:
+            report["status"] = "error"
+            report["error"] = f"{type(e).__name__}: {e}"
+        report["seconds"] = time.perf_counter() - start
+
+        return report
+
+    def download(self, url, out_file=None, modules_dir=None):
+        """Downloads a GEE App and writes its main script and the other modules.
+
+        Args:
+            url (str): The URL of the GEE App.
+            out_file (str, optional): The file path of the main script. Defaults to None, i.e., <app name>.js in the current folder.
+            modules_dir (str, optional): The root folder of the other modules, written as users/name/repo/file.js. Defaults to None, i.e., the folder of out_file.
+
+        Returns:
+            dict: The report of fetch() with the extra keys out_file, files (list of the module files) and written (number of files that changed).
+        """
+        if out_file is None:
+            out_file = os.path.join(os.getcwd(), os.path.basename(url.rstrip("/")) + ".js")
+        elif not out_file.endswith("js"):
+            out_file += ".js"
+        out_file = os.path.abspath(out_file)
+        if modules_dir is None:
+            modules_dir = os.path.dirname(out_file)
+
+        report = self.fetch(url)
+        report["out_file"] = out_file
+        report["files"] = []
+        report["written"] = 0
+        if report["status"] == "error":
+            return report
+
+        try:
+            for module, source in report["modules"].items():
+                if module == report["main"]:
+                    path = out_file
+                else:
+                    path = _module_file(modules_dir, module)
+                report["files"].append(path)
+                report["written"] += _write_if_changed(path, source)
+        except (OSError, ValueError) as e:
+            report["status"] = "error"
+            report["error"] = f"{type(e).__name__}: {e}"
+
+        return report
+
+    def download_all(self, urls, out_dir=None):
+        """Downloads several GEE Apps concurrently.
+
+        Args:
+            urls (list): The URLs of the GEE Apps.
+            out_dir (str, optional): The output folder. The main script of each app is saved as <app name>.js and the other modules under users/name/repo/. Defaults to None, i.e., the current folder.
+
+        Returns:
+            list: One report per app, in the order of the URLs. See download().
+        """
+        import concurrent.futures
+
+        out_dir = os.path.abspath(out_dir or os.getcwd())
+        tasks = [
+            (url, os.path.join(out_dir, os.path.basename(url.rstrip("/")) + ".js"), out_dir)
+            for url in urls
+        ]
+        workers = max(1, min(self.workers, len(tasks)))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda task: self.download(*task), tasks))
+
+
+def download_gee_apps(urls, out_dir=None, workers=8, cache_dir=None):
+    """Downloads the JavaScript modules of many GEE Apps concurrently.
+
+    Args:
+        urls (list): The URLs of the GEE Apps.
+        out_dir (str, optional): The output folder. The main script of each app is saved as <app name>.js and the other modules under users/name/repo/. Defaults to None, i.e., the current folder.
+        workers (int, optional): The number of apps downloaded at the same time. Defaults to 8.
+        cache_dir (str, optional): The folder of the cached modules JSON files, which are revalidated instead of downloaded again. Defaults to None, i.e., no cache.
+
+    Returns:
+        list: One report per app, in the order of the URLs. See GeeAppFetcher.download().
+    """
+    fetcher = GeeAppFetcher(cache_dir, workers)
     try:
-        urllib.request.urlretrieve(json_url, json_path)
-    except Exception:
-        raise Exception("The URL is invalid. Please double check the URL.")
-
-    with open(out_file_path, "w") as f1:
-
-        with open(json_path, encoding="utf-8") as f2:
-            lines = f2.readlines()
-            for line in lines:
-                # print(line)
-                items = line.split("\\n")
-                for index, item in enumerate(items):
-                    if (index > 0) and (index < (len(items) - 1)):
-                        item = item.replace('\\"', '"')
-                        item = item.replace(r"\\", "\n")
-                        item = item.replace("\\r", "")
-                        f1.write(item + "\n")
-    os.remove(json_path)
-    print(f"The JavaScript is saved at: {out_file_path}")
+        reports = fetcher.download_all(urls, out_dir)
+    finally:
+        fetcher.close()
+    for report in reports:
+        if report["status"] == "error":
+            print(f"Error: {report['url']}: {report['error']}")
+    failed = sum(1 for report in reports if report["status"] == "error")
+    unchanged = sum(1 for report in reports if report["status"] == "not_modified")
+    print(f"Downloaded {len(reports) - failed} GEE Apps ({unchanged} not modified), {failed} failed.")
+
+    return reports
+
+
+def download_gee_app(url, out_file=None, cache_dir=None):
+    """Downloads JavaScript source code from a GEE App
+
+    The modules other than the main script are saved next to it, under users/name/repo/.
+
+    Args:
+        url (str): The URL of the GEE App.
+        out_file (str, optional): The output file path for the downloaded JavaScript. Defaults to None.
+        cache_dir (str, optional): The folder of the cached modules JSON files, which are revalidated instead of downloaded again. Defaults to None, i.e., no cache.
+    """
+    print(f"The json url: {_gee_app_json_url(url)}")
+    if out_file is None:
+        out_file = os.path.join(os.getcwd(), os.path.basename(url) + ".js")
+    elif not out_file.endswith("js"):
+        out_file += ".js"
+
+    fetcher = GeeAppFetcher(cache_dir)
+    try:
+        report = fetcher.download(url, out_file)
+    finally:
+        fetcher.close()
+    if report["status"] == "error":
+        raise Exception(
+            f"The URL is invalid. Please double check the URL. {report['error']}"
+        )
+    print(f"The JavaScript is saved at: {report['out_file']}")
 
 
 # # Download file shared via Google Drive
@@ -1113,13 +3555,13 @@ if __name__ == "__main__":
     js_dir = 'ConversionFolder'
 
     # Convert all Earth Engine JavaScripts in a folder recursively to Python scripts.
-    js_to_python_dir(in_dir=js_dir, out_dir=js_dir, use_qgis=True)
+    js_to_python_dir(in_dir=js_dir, out_dir=js_dir, use_qgis=True, incremental=True)
     print(f"Python scripts saved at: {js_dir}")
 
     # Convert all Earth Engine Python scripts in a folder recursively to Jupyter notebooks.
     # Get the notebook template from the package folder.
     nb_template = get_nb_template()
-    py_to_ipynb_dir(js_dir, nb_template)
+    py_to_ipynb_dir(js_dir, nb_template, incremental=True)
 
     # Execute all Jupyter notebooks in a folder recursively and save the output cells.
     execute_notebook_dir(in_dir=js_dir)
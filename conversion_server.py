@@ -0,0 +1,333 @@
+""" Module for serving Google Earth Engine (GEE) JavaScript to Python conversion from a long-running process.
+
+To start a conversion server on a local HTTP port:                                  python conversion_server.py --port 8765
+
+To start a conversion server on a Unix socket:                                      python conversion_server.py --socket /tmp/gee_conversion.sock
+
+To convert a GEE JavaScript with a running server:                                  convert_with_server(source, address)
+
+To convert several GEE JavaScripts with a running server in one request:           convert_batch_with_server(sources, address)
+
+The server accepts JSON requests:
+
+    POST /convert   {"source": "...", "use_qgis": true, "optimize": false} -> {"status": "ok", "output": "...", "error": null, "seconds": 0.001}
+    POST /batch     {"requests": [{"source": "..."}, ...]}                 -> {"results": [...], "seconds": 0.01}
+    GET  /stats                                                            -> {"version": "...", "requests": 10, "errors": 0, "seconds": 0.02}
+
+"""
+
+
+import argparse
+import concurrent.futures
+import http.client
+import http.server
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from conversion import __version__, js_to_python_stream, optimize_python
+
+
+def convert_request(request):
+    """Converts the JavaScript source of one request to Python.
+
+    Args:
+        request (dict): The request with the keys source, use_qgis (optional, defaults to True), math_import (optional) and optimize (optional, see optimize_python()).
+
+    Returns:
+        dict: The response with the keys status ('ok' or 'error'), output, error and seconds.
+    """
+    start = time.perf_counter()
+    response = {"status": "ok", "output": None, "error": None}
+    try:
+        source = request["source"]
+        use_qgis = request.get("use_qgis", True)
+        lines = source.splitlines(keepends=True)
+        if any(line.strip() == "import ee" for line in lines):
+            # only update the GitHub URL if it is already a GEE Python script
+            output = source
+            if not use_qgis:
+                output += "Map"
+        else:
+            output = "".join(
+                js_to_python_stream(lines, use_qgis, request.get("math_import"))
+            )
+        if request.get("optimize"):
+            output = optimize_python(output, request["optimize"])
+        response["output"] = output
+    except Exception as e:
+        # Any failure is reported in the response, so that /convert still answers and /batch converts the other requests.
+        response["status"] = "error"
+        response["error"] = f"{type(e).__name__}: {e}"
+    response["seconds"] = time.perf_counter() - start
+
+    return response
+
+
+class ConversionServer:
+    """A long-running conversion server that keeps the converter loaded between requests."""
+
+    def __init__(self, port=8765, host="127.0.0.1", socket_path=None, workers=1):
+        """Initialize the ConversionServer object.
+
+        Args:
+            port (int, optional): The local HTTP port to listen on. Defaults to 8765.
+            host (str, optional): The host to bind to. Defaults to "127.0.0.1".
+            socket_path (str, optional): File path of a Unix socket to listen on instead of a port. Defaults to None.
+            workers (int, optional): Number of processes to convert requests in parallel. With 1, requests are converted in the threads that handle them. Defaults to 1.
+        """
+        self.socket_path = socket_path
+        self.workers = workers
+        self.executor = None
+        if workers > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.httpd = _ThreadingUnixHTTPServer(socket_path, _ConversionHandler)
+            self.address = socket_path
+        else:
+            self.httpd = http.server.ThreadingHTTPServer(
+                (host, port), _ConversionHandler
+            )
+            self.address = f"http://{host}:{self.httpd.server_port}"
+        self.httpd.daemon_threads = True
+        self.httpd.conversion_server = self
+
+    def convert(self, requests):
+        """Converts a list of requests and records their latency.
+
+        Args:
+            requests (list): List of requests. See convert_request().
+
+        Returns:
+            list: List of responses in the same order as the requests.
+        """
+        if self.executor is None:
+            responses = [convert_request(request) for request in requests]
+        else:
+            responses = list(self.executor.map(convert_request, requests))
+
+        with self._lock:
+            self.requests += len(responses)
+            self.errors += sum(1 for r in responses if r["status"] != "ok")
+            self.seconds += sum(r["seconds"] for r in responses)
+
+        return responses
+
+    def stats(self):
+        """Returns the number of converted requests, errors and the total conversion time.
+
+        Returns:
+            dict: The server statistics.
+        """
+        with self._lock:
+            return {
+                "version": __version__,
+                "workers": self.workers,
+                "requests": self.requests,
+                "errors": self.errors,
+                "seconds": self.seconds,
+            }
+
+    def serve_forever(self):
+        """Handles requests until shutdown() is called."""
+        print(f"Conversion server listening on {self.address}")
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def start(self):
+        """Handles requests in a background thread.
+
+        Returns:
+            threading.Thread: The server thread.
+        """
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """Stops handling requests and releases the socket."""
+        self.httpd.shutdown()
+        self.close()
+
+    def close(self):
+        """Releases the socket and the worker processes."""
+        self.httpd.server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+class _ConversionHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.server.conversion_server.stats())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON request: {e}"})
+            return
+
+        server = self.server.conversion_server
+        start = time.perf_counter()
+        if self.path == "/convert" and isinstance(body, dict):
+            self._send_json(200, server.convert([body])[0])
+        elif (
+            self.path == "/batch"
+            and isinstance(body, dict)
+            and isinstance(body.get("requests"), list)
+        ):
+            results = server.convert(body["requests"])
+            self._send_json(
+                200, {"results": results, "seconds": time.perf_counter() - start}
+            )
+        else:
+            self._send_json(400, {"error": f"Invalid request for {self.path}"})
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _request(address, method, path, data=None, timeout=300):
+    if address.startswith("http://"):
+        host = address[len("http://") :].rstrip("/")
+        connection = http.client.HTTPConnection(host, timeout=timeout)
+    else:
+        connection = _UnixHTTPConnection(address, timeout=timeout)
+
+    try:
+        body = None
+        headers = {}
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        result = json.loads(response.read().decode("utf-8"))
+        if response.status != 200:
+            raise Exception(result.get("error", f"HTTP error {response.status}"))
+        return result
+    finally:
+        connection.close()
+
+
+def convert_with_server(
+    source,
+    address="http://127.0.0.1:8765",
+    use_qgis=True,
+    math_import=None,
+    optimize=False,
+):
+    """Converts an Earth Engine JavaScript to Python with a running conversion server.
+
+    Args:
+        source (str): Earth Engine JavaScript source code.
+        address (str, optional): The server URL or the file path of its Unix socket. Defaults to "http://127.0.0.1:8765".
+        use_qgis (bool, optional): Whether to add "from ee_plugin import Map \n" to the output script. Defaults to True.
+        math_import (bool, optional): Whether to add "import math" to the output script. Defaults to None, which checks the source for 'Math.'.
+        optimize (bool | list, optional): Whether to apply the optimization passes to the output script, or a list of pass names. Defaults to False.
+
+    Returns:
+        dict: The response with the keys status ('ok' or 'error'), output, error and seconds.
+    """
+    request = {
+        "source": source,
+        "use_qgis": use_qgis,
+        "math_import": math_import,
+        "optimize": optimize,
+    }
+    return _request(address, "POST", "/convert", request)
+
+
+def convert_batch_with_server(
+    sources, address="http://127.0.0.1:8765", use_qgis=True, optimize=False
+):
+    """Converts several Earth Engine JavaScripts to Python with a running conversion server in one request.
+
+    Args:
+        sources (list): List of Earth Engine JavaScript source code.
+        address (str, optional): The server URL or the file path of its Unix socket. Defaults to "http://127.0.0.1:8765".
+        use_qgis (bool, optional): Whether to add "from ee_plugin import Map \n" to the output scripts. Defaults to True.
+        optimize (bool | list, optional): Whether to apply the optimization passes to the output scripts, or a list of pass names. Defaults to False.
+
+    Returns:
+        list: List of responses in the same order as the sources. See convert_with_server().
+    """
+    requests = [
+        {"source": source, "use_qgis": use_qgis, "optimize": optimize}
+        for source in sources
+    ]
+    return _request(address, "POST", "/batch", {"requests": requests})["results"]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Serve GEE JavaScript to Python conversion from a long-running process."
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Local HTTP port")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--socket", type=str, help="Unix socket path to listen on")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of conversion processes"
+    )
+    args = parser.parse_args()
+
+    server = ConversionServer(args.port, args.host, args.socket, args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass